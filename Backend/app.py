@@ -1,163 +1,784 @@
-import json
-import random
+import time
+INICIO_ARRANQUE = time.perf_counter()
+
+import os
+import re
+import threading
 import numpy as np
-import tensorflow as tf
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
+import registro_modelos
+from recursos_modelo import cargar_recursos
+from banco_preguntas import BancoPreguntas
+from sesiones import AlmacenSesiones, Sesion
+from monticulo_indexado import MonticuloIndexado
+from trazado_conocimiento import EstadoConocimiento, ParametrosBKT, PARAMETROS_POR_DEFECTO as BKT
+from cola_inferencia import ColaInferencia, ColaLlenaError
+from registro_eventos import RegistroEventos
+from codificacion_respuestas import (PreguntasSerializadas, TIPO_JSON, TIPO_MSGPACK, codificar,
+                                     elegir_formato, acepta_gzip, etag_coincide)
+from metricas import RegistroMetricas, TIPO_CONTENIDO as TIPO_CONTENIDO_METRICAS
+
+# Ningún import de arriba carga TensorFlow; solo se importa al cargar el
+# modelo con MOTOR_INFERENCIA=keras.
+TIEMPOS_ARRANQUE = {'imports': round(time.perf_counter() - INICIO_ARRANQUE, 4)}
+
 # Configuración inicial.
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
-# Carga de modelos y datos.
-print("Cargando recursos de IA...")
-try:
-    modelo = tf.keras.models.load_model('modelo_tutor.keras')
-    with open('mapa_usuarios.json', 'r') as f:
-        mapa_usuarios = json.load(f)
-    with open('mapa_habilidades.json', 'r') as f:
-        mapa_habilidades = json.load(f)
-    print("Modelo y mapas cargados correctamente.")
-except Exception as e:
-    print(f"Error crítico al cargar modelos o mapas: {e}")
-    exit()
-
-# Carga de preguntas.
-def cargar_preguntas():
-    with open('preguntas.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return data['preguntas']
-preguntas_db = cargar_preguntas()
-print(f"Cargadas {len(preguntas_db)} preguntas en memoria.")
-
-# Simulación de usuario y memoria.
-
-# Parámetros de aprendizaje.
-AJUSTE_ACIERTO = 0.05  # Cuánto sube tu habilidad con un acierto.
-AJUSTE_ERROR = -0.025 # Cuánto baja con un error.
-
-# Configuración del usuario de demo.
+# Motor de inferencia: 'numpy' (por defecto, sin TensorFlow), 'tflite'
+# (intérprete LiteRT sobre modelo_tutor.tflite) o 'keras'.
+MOTOR_INFERENCIA = os.environ.get('MOTOR_INFERENCIA', 'numpy')
+
+# Registro de versiones del modelo (registro_modelos.py). Si está vacío se
+# sirven los archivos sueltos de este directorio como versión 'local'.
+REGISTRO_MODELOS = os.environ.get('REGISTRO_MODELOS', registro_modelos.DIRECTORIO_REGISTRO)
+
+# Con MATRIZ_PREDICCIONES=0 no se precalcula la matriz y cada perfil se
+# puntúa con el modelo a través de la cola de inferencia.
+USAR_MATRIZ = os.environ.get('MATRIZ_PREDICCIONES', '1') != '0'
+
+def cargar_version(version=None):
+    return cargar_recursos(version, motor=MOTOR_INFERENCIA, usar_matriz=USAR_MATRIZ,
+                           registro=REGISTRO_MODELOS)
+
+# Todo lo que depende de la versión del modelo vive en `recursos`, que se
+# reemplaza entero al recargar; cada petición toma una referencia al principio
+# y trabaja con ella hasta el final. Es None hasta que termina el arranque.
+recursos = None
+
+# Con CARGA_EN_SEGUNDO_PLANO=1 el servidor acepta conexiones enseguida y carga
+# el modelo en un hilo; /api/listo responde 503 hasta que termina.
+CARGA_EN_SEGUNDO_PLANO = os.environ.get('CARGA_EN_SEGUNDO_PLANO', '0') == '1'
+error_arranque = None
+
+# Carga de preguntas, indexadas por id y por habilidad.
+banco_preguntas = BancoPreguntas.cargar('preguntas.json')
+print(f"Cargadas {len(banco_preguntas)} preguntas en memoria.")
+# Las preguntas no cambian: se serializan una vez y se reutilizan los bytes.
+preguntas_serializadas = PreguntasSerializadas(banco_preguntas)
+
+# Parámetros de aprendizaje (Bayesian Knowledge Tracing, ver trazado_conocimiento.py).
+# El dominio inicial sale de la probabilidad que da el modelo; adivinar y
+# desliz se bajan por habilidad donde esa probabilidad queda fuera de su rango.
+PARAMETROS_BKT = ParametrosBKT(
+    transicion=float(os.environ.get('BKT_TRANSICION', BKT.transicion)), # Probabilidad de aprender en cada respuesta.
+    desliz=float(os.environ.get('BKT_DESLIZ', BKT.desliz)), # Probabilidad de fallar sabiendo.
+    adivinar=float(os.environ.get('BKT_ADIVINAR', BKT.adivinar)), # Probabilidad de acertar sin saber.
+)
+
+# Configuración del usuario de demo (el que se usa si la petición no indica otro).
+# Si no está en el mapa, al arrancar se toma el primero.
 DEMO_USER_STR = 'usuario_1'
-if DEMO_USER_STR not in mapa_usuarios:
-    DEMO_USER_STR = list(mapa_usuarios.keys())[0]
-DEMO_USER_ID_NUM = mapa_usuarios[DEMO_USER_STR]
-
-lista_habilidades = list(mapa_habilidades.keys())
-historial_usuario = set()
-
-# Guardar el "estado en vivo" del usuario en este diccionario.
-estado_usuario_actual = {}
-
-# Usa el modelo de IA para establecer los puntajes INICIALES del usuario. Se llama al inicio y al reiniciar.
-def inicializar_estado_usuario():
-    global estado_usuario_actual
-    estado_usuario_actual.clear() # Limpia el estado anterior.
-    historial_usuario.clear() # Limpia el historial de preguntas.
-    
-    input_usuario = np.array([DEMO_USER_ID_NUM])
-    
-    print(f"\nGenerando perfil inicial para {DEMO_USER_STR}...")
-    for habilidad in lista_habilidades:
-        skill_id_num = mapa_habilidades[habilidad]
-        input_habilidad = np.array([skill_id_num])
-        
-        input_modelo = [input_usuario, input_habilidad]
-        prob_acierto = modelo.predict(input_modelo, verbose=0)[0][0]
-        
-        estado_usuario_actual[habilidad] = float(prob_acierto)
-    print("Perfil inicial generado.")
-
-# Convierte el diccionario de estado en la lista ordenada que espera el front.
-def obtener_predicciones_actuales():
-    lista_preds = [
-        {'habilidad': hab, 'prob_acierto': prob} 
-        for hab, prob in estado_usuario_actual.items()
+
+# Configuración de las sesiones.
+SESIONES_CAPACIDAD = int(os.environ.get('SESIONES_CAPACIDAD', 10000)) # Máximo de sesiones en memoria.
+SESIONES_TTL = float(os.environ.get('SESIONES_TTL', 3600)) # Segundos de inactividad antes de expirar.
+SESIONES_SQLITE = os.environ.get('SESIONES_SQLITE') # Ruta del respaldo en disco (opcional).
+
+# Cada respuesta se anexa a este CSV para el entrenamiento incremental
+# (entrenamiento_incremental.py). Con REGISTRO_EVENTOS vacío se desactiva.
+REGISTRO_EVENTOS = os.environ.get('REGISTRO_EVENTOS', 'eventos_respuestas.csv')
+registro_eventos = RegistroEventos(REGISTRO_EVENTOS) if REGISTRO_EVENTOS else None
+
+# Tamaño máximo de lote para una sola llamada a predict.
+TAMANO_LOTE_PREDICCION = 8192
+
+# Configuración de la cola de inferencia con micro-lotes.
+COLA_TAMANO_LOTE = int(os.environ.get('COLA_TAMANO_LOTE', 1024)) # Pares por pasada del modelo.
+COLA_ESPERA_MS = float(os.environ.get('COLA_ESPERA_MS', 2)) # Espera máxima para juntar un lote.
+COLA_PROFUNDIDAD = int(os.environ.get('COLA_PROFUNDIDAD', 10000)) # Peticiones pendientes máximas.
+
+# Métricas expuestas en GET /metrics (formato de texto de Prometheus). Los
+# medidores con función se calculan solo cuando se consultan.
+metricas = RegistroMetricas()
+metrica_peticiones = metricas.contador(
+    'tutor_peticiones_total', 'Peticiones atendidas.', ('endpoint', 'metodo', 'codigo'))
+metrica_latencia = metricas.histograma(
+    'tutor_peticion_segundos', 'Latencia de cada petición por endpoint.', ('endpoint',))
+metrica_inferencia = metricas.histograma(
+    'tutor_inferencia_segundos', 'Duración de cada pasada del modelo.')
+metrica_pares_inferencia = metricas.histograma(
+    'tutor_inferencia_pares', 'Pares (usuario, habilidad) por pasada del modelo.',
+    limites=(1, 4, 16, 64, 256, 1024, 4096, 16384))
+metrica_perfil = metricas.histograma(
+    'tutor_perfil_segundos', 'Tiempo para obtener perfiles base, por origen.', ('origen',))
+metrica_seleccion = metricas.histograma(
+    'tutor_seleccion_pregunta_segundos', 'Tiempo de elegir la siguiente pregunta.')
+metrica_ajuste_frio = metricas.histograma(
+    'tutor_ajuste_frio_segundos', 'Tiempo de reajustar el embedding de un usuario en frío.')
+
+# Puntúa pares (usuario, habilidad) con el modelo cargado. Solo lo llama el
+# hilo de la cola, así el modelo nunca recibe llamadas concurrentes. Tras una
+# recarga, el siguiente lote ya usa el modelo nuevo.
+def predecir_pares(ids_usuarios, ids_habilidades):
+    inicio = time.perf_counter()
+    probs = recursos.modelo.predict(
+        [ids_usuarios, ids_habilidades],
+        batch_size=min(len(ids_usuarios), TAMANO_LOTE_PREDICCION),
+        verbose=0
+    ).reshape(-1)
+    metrica_inferencia.observar(time.perf_counter() - inicio)
+    metrica_pares_inferencia.observar(len(ids_usuarios))
+    return probs
+
+cola_inferencia = ColaInferencia(
+    predecir_pares,
+    tamano_lote_max=COLA_TAMANO_LOTE,
+    espera_max=COLA_ESPERA_MS / 1000,
+    profundidad_max=COLA_PROFUNDIDAD
+)
+
+# Devuelve {usuario: {habilidad: prob_acierto}} para un grupo de usuarios.
+# Con la matriz precalculada es una lectura de filas; sin ella, la rejilla
+# completa (usuario, habilidad) se puntúa en un solo envío a la cola, que
+# además la agrupa con las peticiones concurrentes de otros usuarios.
+def predecir_perfiles(usuarios, habilidades=None, r=None):
+    r = r or recursos
+    if habilidades is None:
+        habilidades = r.lista_habilidades
+    if not usuarios or not habilidades:
+        return {usuario: {} for usuario in usuarios}
+
+    ids_usuarios = np.array([r.mapa_usuarios[u] for u in usuarios], dtype=np.int32)
+    ids_habilidades = np.array([r.mapa_habilidades[h] for h in habilidades], dtype=np.int32)
+
+    inicio = time.perf_counter()
+    if r.matriz_probs is not None:
+        probs = r.matriz_probs[ids_usuarios][:, ids_habilidades]
+        metrica_perfil.observar(time.perf_counter() - inicio, origen='matriz')
+    else:
+        # Rejilla completa: cada usuario se repite una vez por habilidad.
+        entrada_usuarios = np.repeat(ids_usuarios, len(ids_habilidades))
+        entrada_habilidades = np.tile(ids_habilidades, len(ids_usuarios))
+
+        probs = cola_inferencia.predecir(entrada_usuarios, entrada_habilidades)
+        probs = probs.reshape(len(usuarios), len(habilidades))
+        metrica_perfil.observar(time.perf_counter() - inicio, origen='cola')
+
+    return {
+        usuario: {hab: float(p) for hab, p in zip(habilidades, fila)}
+        for usuario, fila in zip(usuarios, probs)
+    }
+
+# Usa el modelo de IA para establecer los puntajes INICIALES del usuario.
+def puntajes_iniciales(usuario, r):
+    # Una sola lectura de la fila del usuario en la matriz precalculada.
+    perfil = predecir_perfiles([usuario], r=r)[usuario]
+    puntajes = np.zeros(len(r.mapa_habilidades))
+    for habilidad, prob in perfil.items():
+        puntajes[r.mapa_habilidades[habilidad]] = prob
+    return puntajes
+
+# Arranque en frío: un usuario que no está en mapa_usuarios.json no tiene fila
+# en embedding_usuario. Se le da un vector propio que parte de la media y se
+# reajusta (solo ese vector, en NumPy) con sus primeras respuestas.
+ARRANQUE_FRIO_RESPUESTAS = int(os.environ.get('ARRANQUE_FRIO_RESPUESTAS', 10))
+
+def puntajes_con_embedding(embedding, r):
+    return r.modelo_frio.predecir_con_embedding(embedding, np.arange(len(r.mapa_habilidades)))
+
+# Reajusta el vector de un usuario en frío con las respuestas de su sesión.
+# El vector nuevo solo cambia las habilidades que aún no respondió: las
+# respondidas ya tienen su dominio actualizado con BKT y se conservan, salvo
+# con conservar_respondidas=False (cuando los puntajes actuales no sirven).
+def ajustar_usuario_frio(sesion, r, conservar_respondidas=True):
+    inicio = time.perf_counter()
+    # Las preguntas de habilidades que el modelo no conoce no entran al ajuste.
+    ids_habilidades, resultados = [], []
+    for id_pregunta, correcta in zip(sesion.respondidas, sesion.resultados):
+        indice = r.mapa_habilidades.get(banco_preguntas.obtener(id_pregunta)['habilidad'])
+        if indice is not None:
+            ids_habilidades.append(indice)
+            resultados.append(correcta)
+    sesion.embedding = r.modelo_frio.ajustar_embedding(ids_habilidades, resultados,
+                                                       embedding=sesion.embedding, previo=sesion.embedding_base)
+    puntajes = puntajes_con_embedding(sesion.embedding, r)
+    if conservar_respondidas and ids_habilidades:
+        respondidas = np.unique(ids_habilidades)
+        puntajes[respondidas] = sesion.puntajes[respondidas]
+    sesion.puntajes = puntajes
+    metrica_ajuste_frio.observar(time.perf_counter() - inicio)
+
+# Crea la sesión de un usuario con su perfil base y todas las preguntas disponibles.
+def crear_sesion(clave, usuario):
+    r = recursos
+    if usuario in r.mapa_usuarios:
+        sesion = Sesion(clave, usuario, puntajes_iniciales(usuario, r), banco_preguntas.nuevo_pool(),
+                        estado=estado_conocimiento)
+    else:
+        embedding = r.modelo_frio.embedding_inicial()
+        sesion = Sesion(clave, usuario, puntajes_con_embedding(embedding, r),
+                        banco_preguntas.nuevo_pool(), embedding=embedding, estado=estado_conocimiento)
+    sesion.recursos = r
+    return sesion
+
+# Pasa una sesión creada con una versión anterior del modelo a la actual. Los
+# puntajes en vivo se conservan; solo se reubican si cambió el mapa de
+# habilidades. Se llama bajo sesion.lock y devuelve los recursos a usar.
+def sincronizar_sesion(sesion):
+    r = recursos
+    previos = sesion.recursos
+    if previos is r:
+        return r
+    if sesion.embedding is not None and len(sesion.embedding) != len(r.modelo_frio.embedding_inicial()):
+        # Cambió la dimensión del embedding: el vector se vuelve a ajustar desde la media.
+        sesion.embedding = sesion.embedding_base = None
+        sesion.puntajes = np.zeros(len(r.mapa_habilidades))
+        ajustar_usuario_frio(sesion, r, conservar_respondidas=False)
+    elif previos is not None and previos.mapa_habilidades != r.mapa_habilidades:
+        if sesion.embedding is not None:
+            puntajes = puntajes_con_embedding(sesion.embedding, r)
+        elif sesion.usuario in r.mapa_usuarios:
+            puntajes = puntajes_iniciales(sesion.usuario, r)
+        else:
+            puntajes = np.full(len(r.mapa_habilidades), 0.5)
+        anteriores = sesion.puntajes
+        for habilidad, indice in r.mapa_habilidades.items():
+            if habilidad in previos.mapa_habilidades:
+                puntajes[indice] = anteriores[previos.mapa_habilidades[habilidad]]
+        sesion.puntajes = puntajes
+    sesion.recursos = r
+    return r
+
+# Devuelve la sesión al estado inicial. Se llama al reiniciar.
+def inicializar_estado_usuario(sesion, r):
+    if sesion.embedding is not None:
+        # Un usuario en frío conserva el vector aprendido como perfil base:
+        # las respuestas nuevas lo reajustan partiendo de él y tirando hacia él.
+        sesion.embedding_base = sesion.embedding
+        sesion.puntajes = puntajes_con_embedding(sesion.embedding, r)
+    elif sesion.usuario in r.mapa_usuarios:
+        sesion.puntajes = puntajes_iniciales(sesion.usuario, r)
+    sesion.limpiar_historial() # Limpia el historial y repone todas las preguntas.
+
+# Dominio de todas las sesiones activas en una sola matriz (filas = sesiones).
+estado_conocimiento = EstadoConocimiento(len(banco_preguntas.ids_por_habilidad), PARAMETROS_BKT,
+                                         capacidad=min(SESIONES_CAPACIDAD, 1024))
+
+sesiones = AlmacenSesiones(
+    crear_sesion,
+    capacidad=SESIONES_CAPACIDAD,
+    ttl=SESIONES_TTL,
+    ruta_sqlite=SESIONES_SQLITE
+)
+
+# Medidores que se leen al consultar /metrics.
+def preguntas_pendientes():
+    pendientes = {(h,): 0 for h in banco_preguntas.ids_por_habilidad}
+    for sesion in sesiones.sesiones():
+        for (habilidad,) in pendientes:
+            pendientes[(habilidad,)] += sesion.pool.quedan(habilidad)
+    return pendientes
+
+metricas.medidor('tutor_sesiones_activas', 'Sesiones en memoria.', funcion=lambda: len(sesiones))
+metricas.medidor('tutor_conocimiento_filas', 'Filas en uso de la matriz de dominio.',
+                 funcion=lambda: len(estado_conocimiento))
+metricas.medidor('tutor_preguntas_pendientes',
+                 'Preguntas sin responder en los pools de las sesiones activas.',
+                 ('habilidad',), funcion=preguntas_pendientes)
+metricas.medidor('tutor_preguntas_banco', 'Preguntas en el banco por habilidad.', ('habilidad',),
+                 funcion=lambda: {(h,): len(ids) for h, ids in banco_preguntas.ids_por_habilidad.items()})
+metricas.medidor('tutor_cola_profundidad', 'Peticiones esperando en la cola de inferencia.',
+                 funcion=lambda: cola_inferencia.metricas()['profundidad_cola'])
+metricas.medidor('tutor_cola_tamano_lote_promedio', 'Pares por lote de la cola de inferencia.',
+                 funcion=lambda: cola_inferencia.metricas()['tamano_lote_promedio'])
+metricas.medidor('tutor_modelo_info', 'Versión del modelo en uso.', ('version', 'motor'),
+                 funcion=lambda: {} if recursos is None else {(recursos.version, MOTOR_INFERENCIA): 1})
+
+# Identifica al usuario de la petición: parámetro 'usuario' (query o JSON) o
+# cabecera X-Usuario. Sin indicarlo se usa el usuario de demo.
+def usuario_de_peticion():
+    datos = request.get_json(silent=True) or {}
+    return (
+        request.args.get('usuario') or
+        datos.get('usuario') or
+        request.headers.get('X-Usuario') or
+        DEMO_USER_STR
+    )
+
+# Los nombres de usuario van al registro de eventos (CSV): sin comas ni saltos.
+PATRON_USUARIO = re.compile(r'^[\w.@-]{1,64}$')
+
+# Obtiene la sesión del usuario de la petición (conocido o en frío), o None
+# si el nombre no es válido.
+def sesion_de_peticion():
+    usuario = usuario_de_peticion()
+    if not isinstance(usuario, str) or not PATRON_USUARIO.match(usuario):
+        return None
+    return sesiones.obtener(usuario)
+
+def respuesta_usuario_invalido():
+    return jsonify({"error": "Usuario inválido"}), 400
+
+# Convierte los puntajes de la sesión en la lista ordenada que espera el front.
+# Aquí se mantiene el orden completo y no se usa el montículo: la lista lleva
+# todas las habilidades, también las que ya no tienen preguntas (y no están en
+# el montículo), y sacarlas del montículo en orden costaría O(S log S) igual
+# que ordenar. El montículo solo ahorra la elección de la más débil.
+def obtener_predicciones_actuales(sesion, r):
+    puntajes = sesion.puntajes
+    # Ordena de más débil a más fuerte (argsort en NumPy, sin dicts intermedios).
+    return [
+        {'habilidad': r.lista_habilidades[i], 'prob_acierto': float(puntajes[i])}
+        for i in np.argsort(puntajes, kind='stable')
     ]
-    # Ordena de más débil a más fuerte.
-    lista_preds.sort(key=lambda x: x['prob_acierto'])
-    return lista_preds
+
+# Habilidades con preguntas pendientes de la sesión, ordenadas por
+# probabilidad de acierto. Se arma en O(S) solo cuando cambian todos los
+# puntajes a la vez (perfil inicial, reinicio, ajuste en frío); cada
+# respuesta lo actualiza en O(log S) (Sesion.registrar_respuestas).
+def monticulo_habilidades(sesion, r):
+    if sesion.prioridad is None:
+        puntajes = sesion.puntajes
+        sesion.prioridad = MonticuloIndexado(
+            (i, float(puntajes[i])) for i, hab in enumerate(r.lista_habilidades) if sesion.pool.quedan(hab)
+        )
+    return sesion.prioridad
+
+# Latencia y conteo de todas las peticiones. La etiqueta es la regla de la
+# ruta (no la URL) para que las rutas desconocidas no creen series nuevas.
+@app.before_request
+def iniciar_cronometro():
+    g.inicio_peticion = time.perf_counter()
+
+@app.after_request
+def registrar_peticion(respuesta):
+    inicio = getattr(g, 'inicio_peticion', None)
+    if inicio is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'desconocido'
+        metrica_latencia.observar(time.perf_counter() - inicio, endpoint=endpoint)
+        metrica_peticiones.inc(endpoint=endpoint, metodo=request.method, codigo=respuesta.status_code)
+    return respuesta
+
+@app.route('/metrics', methods=['GET'])
+def exponer_metricas():
+    return Response(metricas.exponer(), content_type=TIPO_CONTENIDO_METRICAS)
+
+# Respuesta en JSON o en msgpack (con Accept: application/msgpack), con gzip
+# si el cuerpo es grande y el cliente lo acepta. Las preguntas van como
+# bytes ya serializados (preguntas_serializadas.crudo).
+def responder(datos, codigo=200):
+    cuerpo, cabeceras = codificar(datos, request.headers.get('Accept'), request.headers.get('Accept-Encoding'))
+    return Response(cuerpo, status=codigo, headers=cabeceras)
 
 # Endpoints de la API.
+# Si la cola está saturada se responde 503 para que el cliente reintente.
+@app.errorhandler(ColaLlenaError)
+def cola_llena(e):
+    return jsonify({"error": str(e)}), 503
+
 @app.route('/')
 def home():
     return "¡El backend está funcionando!"
 
+# Una pregunta por id, cacheable: ETag estable y 304 si el cliente ya la tiene.
+@app.route('/api/preguntas/<int:id_pregunta>', methods=['GET'])
+def obtener_pregunta(id_pregunta):
+    crudo = preguntas_serializadas.crudo(id_pregunta)
+    if crudo is None:
+        return jsonify({"error": "Pregunta no encontrada"}), 404
+
+    formato = elegir_formato(request.headers.get('Accept'))
+    etag = preguntas_serializadas.etag(id_pregunta, formato)
+    cabeceras = {'ETag': etag, 'Cache-Control': 'public, max-age=86400', 'Vary': 'Accept, Accept-Encoding'}
+    if etag_coincide(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=cabeceras)
+    if formato == 'msgpack':
+        return Response(crudo.msgpack, headers=cabeceras, content_type=TIPO_MSGPACK)
+    if acepta_gzip(request.headers.get('Accept-Encoding')):
+        cabeceras['Content-Encoding'] = 'gzip'
+        return Response(preguntas_serializadas.json_gzip(id_pregunta), headers=cabeceras, content_type=TIPO_JSON)
+    return Response(crudo.json, headers=cabeceras, content_type=TIPO_JSON)
+
 @app.route('/api/pregunta', methods=['GET'])
 def get_question():
-    # Predice el dominio del usuario en CADA habilidad y obtiene el ranking de habilidades desde el estado actual.
-    predicciones_actuales = obtener_predicciones_actuales()
-    
-    # Busca una pregunta para la habilidad más débil.
+    sesion = sesion_de_peticion()
+    if sesion is None:
+        return respuesta_usuario_invalido()
+
+    anticipar = cantidad_anticipo(request.args.get('anticipar'))
+    with sesion.lock:
+        inicio = time.perf_counter()
+        respuesta = seleccionar_pregunta(sesion, sincronizar_sesion(sesion), anticipar)
+        metrica_seleccion.observar(time.perf_counter() - inicio)
+        return respuesta
+
+# Busca una pregunta para la habilidad más débil que aún tenga preguntas, o None.
+def elegir_pregunta(sesion, r):
+    monticulo = monticulo_habilidades(sesion, r)
     pregunta_seleccionada = None
-    for pred in predicciones_actuales:
-        habilidad_debil = pred['habilidad']
-        preguntas_disponibles = [
-            p for p in preguntas_db 
-            if p['habilidad'] == habilidad_debil 
-            and p['id'] not in historial_usuario
-        ]
-        
-        if preguntas_disponibles:
-            pregunta_seleccionada = random.choice(preguntas_disponibles)
+    while len(monticulo):
+        indice, _ = monticulo.minimo()
+        # Sorteo O(1) entre las preguntas sin responder de la habilidad.
+        id_pregunta = sesion.pool.sortear(r.lista_habilidades[indice])
+        if id_pregunta is not None:
+            pregunta_seleccionada = banco_preguntas.obtener(id_pregunta)
             break
+        # Pool agotado: la habilidad sale del montículo hasta el próximo reinicio.
+        monticulo.quitar(indice)
+    return pregunta_seleccionada
 
-    # Envía la pregunta.
-    if pregunta_seleccionada:
-        return jsonify({
-            "pregunta": pregunta_seleccionada,
-            "predicciones": predicciones_actuales # Envía el estado actual.
-        })
-    else:
-        return jsonify({
-            "completado": True,
-            "predicciones": predicciones_actuales # Envía el estado final.
-        })
+# Anticipo: para cada resultado posible de `pregunta`, las k siguientes
+# candidatas (una por habilidad, de la más débil a la más fuerte) según los
+# puntajes que quedarían tras esa respuesta. Es especulativo: en arranque en
+# frío el reajuste del embedding puede cambiar el orden real.
+ANTICIPO_MAX = int(os.environ.get('ANTICIPO_MAX', 5))
+
+def cantidad_anticipo(valor):
+    try:
+        return max(0, min(int(valor or 0), ANTICIPO_MAX))
+    except (TypeError, ValueError):
+        return 0
+
+def anticipar_preguntas(sesion, r, pregunta, k):
+    puntajes = sesion.puntajes
+    quedan = np.array([sesion.pool.quedan(hab) for hab in r.lista_habilidades])
+    # Fila 0: si acierta. Fila 1: si falla.
+    hipoteticos = np.tile(puntajes, (2, 1))
+    indice = r.mapa_habilidades.get(pregunta['habilidad'])
+    if indice is not None:
+        hipoteticos[:, indice] = sesion.simular_respuesta(indice, [True, False])
+        quedan[indice] -= 1 # La pregunta actual ya no estará disponible.
+    hipoteticos[:, quedan <= 0] = np.inf
+    orden = np.argsort(hipoteticos, axis=1, kind='stable')[:, :k]
+
+    anticipo = {}
+    for resultado, fila, indices in zip(('correcta', 'incorrecta'), hipoteticos, orden):
+        anticipo[resultado] = [
+            preguntas_serializadas.crudo(sesion.pool.sortear(r.lista_habilidades[i], excluir=pregunta['id']))
+            for i in indices if np.isfinite(fila[i])
+        ]
+    return anticipo
+
+# La siguiente pregunta (y su anticipo, si se pide) o {"completado": True}.
+def siguiente_pregunta(sesion, r, anticipar=0):
+    pregunta = elegir_pregunta(sesion, r)
+    if pregunta is None:
+        return {"completado": True}
+    datos = {"pregunta": preguntas_serializadas.crudo(pregunta['id'])}
+    if anticipar:
+        datos["anticipo"] = anticipar_preguntas(sesion, r, pregunta, anticipar)
+    return datos
+
+def seleccionar_pregunta(sesion, r, anticipar=0):
+    datos = siguiente_pregunta(sesion, r, anticipar)
+    # Envía la pregunta (o el aviso de completado) con el estado actual.
+    datos["predicciones"] = obtener_predicciones_actuales(sesion, r)
+    return responder(datos)
 
 @app.route('/api/verificar', methods=['POST'])
 def verificar_respuesta():
-    global estado_usuario_actual
     data = request.json
     pregunta_id = data.get('id')
     respuesta_usuario = data.get('respuesta')
 
-    pregunta_encontrada = next((p for p in preguntas_db if p['id'] == int(pregunta_id)), None)
+    pregunta_encontrada = banco_preguntas.obtener(int(pregunta_id))
     if not pregunta_encontrada:
         return jsonify({"error": "Pregunta no encontrada"}), 404
 
-    historial_usuario.add(int(pregunta_id))
+    sesion = sesion_de_peticion()
+    if sesion is None:
+        return respuesta_usuario_invalido()
+
     es_correcta = (pregunta_encontrada['respuesta_correcta'] == respuesta_usuario)
-    
-    # Actualización en vivo.
-    habilidad_pregunta = pregunta_encontrada['habilidad']
-    if habilidad_pregunta in estado_usuario_actual:
-        score_actual = estado_usuario_actual[habilidad_pregunta]
-        
-        if es_correcta:
-            score_actual += AJUSTE_ACIERTO
+
+    with sesion.lock:
+        previos = sesion.recursos
+        r = sincronizar_sesion(sesion)
+        antes = sesion.puntajes
+        nueva_respuesta = sesion.marcar_respondida(int(pregunta_id), es_correcta)
+        if nueva_respuesta and registro_eventos is not None:
+            registro_eventos.agregar(
+                sesion.usuario, pregunta_encontrada['id'], pregunta_encontrada['habilidad'], es_correcta
+            )
+
+        # Actualización en vivo del dominio de la habilidad (BKT).
+        habilidad_pregunta = pregunta_encontrada['habilidad']
+        if habilidad_pregunta in r.mapa_habilidades:
+            indice = r.mapa_habilidades[habilidad_pregunta]
+            sesion.registrar_respuesta(indice, es_correcta)
+
+            # En frío, las primeras respuestas reajustan el vector del usuario.
+            if (sesion.embedding is not None and nueva_respuesta and
+                    len(sesion.respondidas) <= ARRANQUE_FRIO_RESPUESTAS):
+                ajustar_usuario_frio(sesion, r)
+
+            print(f"[{sesion.usuario}] Habilidad '{habilidad_pregunta}' actualizada a: {sesion.puntajes[indice]:.3f}")
+
+        sesiones.guardar(sesion)
+        # Con "delta": true solo van las habilidades que cambiaron (normalmente
+        # una). Si la sesión pasó a otra versión del modelo, va la lista completa.
+        if data.get('delta') and previos is r:
+            despues = sesion.puntajes
+            predicciones = None
+            delta = [
+                {'habilidad': r.lista_habilidades[i], 'prob_acierto': float(despues[i])}
+                for i in np.flatnonzero(despues != antes)
+            ]
         else:
-            score_actual += AJUSTE_ERROR
-            
-        # Asegurarse de que el score se mantenga entre 0.0 y 1.0.
-        score_actual = max(0.0, min(1.0, score_actual))
-        
-        estado_usuario_actual[habilidad_pregunta] = score_actual
-        print(f"Habilidad '{habilidad_pregunta}' actualizada a: {score_actual:.3f}")
-        
+            predicciones = obtener_predicciones_actuales(sesion, r)
+
+        # Con "siguiente" (o "anticipar": K) la respuesta ya trae la próxima
+        # pregunta y el front se ahorra la llamada a /api/pregunta.
+        anticipar = cantidad_anticipo(data.get('anticipar'))
+        siguiente = siguiente_pregunta(sesion, r, anticipar) if data.get('siguiente') or anticipar else None
+
     # Devuelve el resultado y las predicciones actualizadas.
-    return jsonify({
+    respuesta = {
         "resultado": "correcta" if es_correcta else "incorrecta",
         "respuesta_correcta": pregunta_encontrada['respuesta_correcta'],
-        "predicciones_actualizadas": obtener_predicciones_actuales()
+    }
+    if predicciones is not None:
+        respuesta["predicciones_actualizadas"] = predicciones
+    else:
+        respuesta["predicciones_delta"] = delta
+    if siguiente is not None:
+        respuesta["siguiente"] = siguiente
+    return responder(respuesta)
+
+# Máximo de respuestas por llamada a /api/verificar_lote.
+LOTE_RESPUESTAS_MAX = int(os.environ.get('LOTE_RESPUESTAS_MAX', 1000))
+
+# Corrige varias respuestas de una vez (modo examen u offline). Recibe
+# {"respuestas": [{"id": ..., "respuesta": ...}, ...]} y devuelve los
+# resultados alineados con la entrada y una sola foto final de predicciones.
+@app.route('/api/verificar_lote', methods=['POST'])
+def verificar_lote():
+    data = request.get_json(silent=True) or {}
+    respuestas = data.get('respuestas')
+    if not isinstance(respuestas, list) or not all(isinstance(x, dict) for x in respuestas):
+        return jsonify({"error": "Se espera 'respuestas': una lista de {id, respuesta}"}), 400
+    if len(respuestas) > LOTE_RESPUESTAS_MAX:
+        return jsonify({"error": f"Máximo {LOTE_RESPUESTAS_MAX} respuestas por lote"}), 413
+
+    sesion = sesion_de_peticion()
+    if sesion is None:
+        return respuesta_usuario_invalido()
+
+    # Corrección contra el índice de preguntas, antes de tomar el lock.
+    preguntas, correctas = [], []
+    for item in respuestas:
+        try:
+            pregunta = banco_preguntas.obtener(int(item.get('id')))
+        except (TypeError, ValueError):
+            pregunta = None
+        preguntas.append(pregunta)
+        correctas.append(pregunta is not None and pregunta['respuesta_correcta'] == item.get('respuesta'))
+
+    with sesion.lock:
+        r = sincronizar_sesion(sesion)
+        previas = len(sesion.respondidas)
+        indices, aciertos, eventos = [], [], []
+        for pregunta, es_correcta in zip(preguntas, correctas):
+            if pregunta is None:
+                continue
+            if sesion.marcar_respondida(pregunta['id'], es_correcta):
+                eventos.append((sesion.usuario, pregunta['id'], pregunta['habilidad'], es_correcta))
+            if pregunta['habilidad'] in r.mapa_habilidades:
+                indices.append(r.mapa_habilidades[pregunta['habilidad']])
+                aciertos.append(es_correcta)
+        if eventos and registro_eventos is not None:
+            registro_eventos.agregar_varios(eventos)
+
+        # Todas las actualizaciones de dominio en una sola operación.
+        if indices:
+            sesion.registrar_respuestas(indices, aciertos)
+        if sesion.embedding is not None and eventos and previas < ARRANQUE_FRIO_RESPUESTAS:
+            ajustar_usuario_frio(sesion, r)
+
+        sesiones.guardar(sesion)
+        predicciones = obtener_predicciones_actuales(sesion, r)
+
+    print(f"[{sesion.usuario}] Lote de {len(respuestas)} respuestas: {sum(correctas)} correctas.")
+    return jsonify({
+        "resultados": [
+            None if p is None else ("correcta" if c else "incorrecta") for p, c in zip(preguntas, correctas)
+        ],
+        "respuestas_correctas": [None if p is None else p['respuesta_correcta'] for p in preguntas],
+        "correctas": sum(correctas),
+        "total": len(respuestas),
+        "predicciones_actualizadas": predicciones
+    })
+
+# Estado de la cola de inferencia (profundidad, tamaño de lotes, tiempos).
+@app.route('/api/inferencia/estado', methods=['GET'])
+def estado_inferencia():
+    return jsonify({
+        "matriz_precalculada": recursos.matriz_probs is not None,
+        "cola": cola_inferencia.metricas()
     })
 
 # Endpoint para reiniciar el test.
 @app.route('/api/reiniciar', methods=['POST'])
 def reiniciar_test():
+    sesion = sesion_de_peticion()
+    if sesion is None:
+        return respuesta_usuario_invalido()
+
     # Recalcula el perfil base usando el modelo.
-    inicializar_estado_usuario() 
+    with sesion.lock:
+        inicializar_estado_usuario(sesion, sincronizar_sesion(sesion))
+        sesiones.guardar(sesion)
     return jsonify({"mensaje": "Perfil y historial reiniciados"}), 200
 
+# --- Recarga en caliente del modelo ---
+# La versión nueva se carga y se calienta en un hilo aparte mientras se siguen
+# atendiendo peticiones con la anterior; al terminar se reemplaza `recursos`
+# con una sola asignación. Si la carga falla, la versión en uso no cambia.
+# `confirmar` (por ejemplo, activar la versión en el registro) solo se llama
+# después del reemplazo: una versión que no carga nunca queda en ACTUAL.
+lock_recarga = threading.Lock()
+estado_recarga = {"en_curso": False, "ultimo_error": None, "ultima_duracion_s": None}
+
+def recargar_modelo(version=None, confirmar=None):
+    global recursos
+    if not lock_recarga.acquire(blocking=False):
+        return False
+    try:
+        estado_recarga.update(en_curso=True, ultimo_error=None)
+        inicio = time.perf_counter()
+        nuevos = cargar_version(version)
+        recursos = nuevos
+        if confirmar is not None:
+            confirmar()
+        estado_recarga["ultima_duracion_s"] = round(time.perf_counter() - inicio, 3)
+        print(f"Modelo recargado: versión {nuevos.version} en {estado_recarga['ultima_duracion_s']}s.")
+    except Exception as e:
+        estado_recarga["ultimo_error"] = f"{type(e).__name__}: {e}"
+        print(f"Error al recargar el modelo; se mantiene la versión {recursos.version}: {e}")
+    finally:
+        estado_recarga["en_curso"] = False
+        lock_recarga.release()
+    return True
+
+def recargar_en_segundo_plano(version=None, confirmar=None):
+    if estado_recarga["en_curso"]:
+        return False
+    threading.Thread(target=recargar_modelo, args=(version, confirmar), daemon=True).start()
+    return True
+
+# Si se define, los endpoints de administración del modelo exigen la cabecera X-Token-Admin.
+TOKEN_ADMIN = os.environ.get('TOKEN_ADMIN')
+
+def admin_autorizado():
+    return not TOKEN_ADMIN or request.headers.get('X-Token-Admin') == TOKEN_ADMIN
+
+# Versión en uso, versiones publicadas y estado de la última recarga.
+@app.route('/api/modelo', methods=['GET'])
+def info_modelo():
+    return jsonify({
+        "actual": recursos.describir(),
+        "registro": {
+            "activa": registro_modelos.version_actual(REGISTRO_MODELOS),
+            "versiones": registro_modelos.listar(REGISTRO_MODELOS),
+        },
+        "recarga": estado_recarga
+    })
+
+# Carga la versión activa del registro (o la indicada en {"version": ...},
+# que queda activada solo si carga bien) sin detener el servidor.
+@app.route('/api/modelo/recargar', methods=['POST'])
+def recargar():
+    if not admin_autorizado():
+        return jsonify({"error": "No autorizado"}), 403
+    version = (request.get_json(silent=True) or {}).get('version')
+    confirmar = None
+    if version:
+        if version not in registro_modelos.listar(REGISTRO_MODELOS):
+            return jsonify({"error": f"La versión '{version}' no existe en {REGISTRO_MODELOS}/"}), 404
+        confirmar = lambda: registro_modelos.activar(version, REGISTRO_MODELOS)
+    if not recargar_en_segundo_plano(version, confirmar):
+        return jsonify({"error": "Ya hay una recarga en curso"}), 409
+    return jsonify({"mensaje": "Recarga iniciada", "version": version or registro_modelos.version_actual(REGISTRO_MODELOS)}), 202
+
+# Vuelve a la versión activada antes de la actual.
+@app.route('/api/modelo/rollback', methods=['POST'])
+def rollback_modelo():
+    if not admin_autorizado():
+        return jsonify({"error": "No autorizado"}), 403
+    if estado_recarga["en_curso"]:
+        return jsonify({"error": "Ya hay una recarga en curso"}), 409
+    version = registro_modelos.version_anterior(REGISTRO_MODELOS)
+    if version is None:
+        return jsonify({"error": "No hay una versión anterior a la cual volver."}), 409
+    # Como en recargar: el registro vuelve atrás solo si la versión carga.
+    recargar_en_segundo_plano(version, lambda: registro_modelos.rollback(REGISTRO_MODELOS))
+    return jsonify({"mensaje": "Rollback iniciado", "version": version}), 202
+
+# Con VIGILAR_REGISTRO=<segundos> un hilo revisa el puntero ACTUAL del registro
+# y recarga solo cuando cambia (por ejemplo, tras `registro_modelos.py activar`).
+VIGILAR_REGISTRO = float(os.environ.get('VIGILAR_REGISTRO', 0))
+
+def vigilar_registro():
+    fallida = None # No reintenta una versión que ya falló hasta que se active otra.
+    while True:
+        time.sleep(VIGILAR_REGISTRO)
+        activa = registro_modelos.version_actual(REGISTRO_MODELOS)
+        if recursos is not None and activa is not None and activa not in (recursos.version, fallida):
+            recargar_modelo()
+            fallida = None if recursos.version == activa else activa
+
+if VIGILAR_REGISTRO > 0:
+    threading.Thread(target=vigilar_registro, daemon=True).start()
+
+# --- Arranque y sondas ---
+# Mientras el modelo se carga, la API responde 503 (salvo las sondas).
+RUTAS_SIN_MODELO = ('/api/listo', '/api/salud')
+
+@app.before_request
+def esperar_modelo():
+    if recursos is None and request.path.startswith('/api/') and request.path not in RUTAS_SIN_MODELO:
+        respuesta = jsonify({"error": "El modelo se está cargando"})
+        respuesta.headers['Retry-After'] = '1'
+        return respuesta, 503
+
+# Sonda de vida: el proceso responde.
+@app.route('/api/salud', methods=['GET'])
+def salud():
+    return jsonify({"estado": "ok"})
+
+# Sonda de disponibilidad: 200 solo con el modelo cargado y calentado.
+@app.route('/api/listo', methods=['GET'])
+def listo():
+    if recursos is None:
+        return jsonify({"listo": False, "error": error_arranque}), 503
+    return jsonify({"listo": True, "version": recursos.version, "tiempos_arranque_s": TIEMPOS_ARRANQUE})
+
+# Carga el modelo, los mapas y la matriz, y hace la primera inferencia antes
+# de publicar `recursos`. Imprime cuánto tardó cada etapa.
+def arrancar():
+    global recursos, DEMO_USER_STR
+    print("Cargando recursos de IA...")
+    nuevos = cargar_version()
+    if DEMO_USER_STR not in nuevos.mapa_usuarios:
+        DEMO_USER_STR = list(nuevos.mapa_usuarios.keys())[0]
+    TIEMPOS_ARRANQUE.update(nuevos.tiempos)
+    TIEMPOS_ARRANQUE['total'] = round(time.perf_counter() - INICIO_ARRANQUE, 4)
+    recursos = nuevos
+    print(f"Modelo y mapas cargados correctamente (versión {recursos.version}).")
+    print("Tiempos de arranque: " + ", ".join(f"{etapa} {seg:.3f}s" for etapa, seg in TIEMPOS_ARRANQUE.items()))
+
+def arrancar_en_segundo_plano():
+    global error_arranque
+    try:
+        arrancar()
+    except Exception as e:
+        error_arranque = f"{type(e).__name__}: {e}"
+        print(f"Error crítico al cargar modelos o mapas: {e}")
+
+if CARGA_EN_SEGUNDO_PLANO:
+    threading.Thread(target=arrancar_en_segundo_plano, daemon=True).start()
+else:
+    try:
+        arrancar()
+    except Exception as e:
+        print(f"Error crítico al cargar modelos o mapas: {e}")
+        exit()
+
 # Iniciar el servidor.
 if __name__ == '__main__':
-    print(f"\nServidor listo. Simulando como usuario: {DEMO_USER_STR} (ID: {DEMO_USER_ID_NUM})")
+    print(f"\nServidor listo. Simulando como usuario: {DEMO_USER_STR}")
     app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+=============================================================================
+BANCO DE PREGUNTAS INDEXADO
+Índice id -> pregunta y pools por habilidad con sorteo y borrado en O(1).
+Las listas por habilidad son del banco y se comparten; cada sesión guarda
+solo lo que cambió al responder
+=============================================================================
+"""
+
+import json
+import random
+
+ARCHIVO_PREGUNTAS = 'preguntas.json'
+
+
+class BancoPreguntas:
+    """Preguntas de solo lectura indexadas por id y por habilidad."""
+
+    def __init__(self, preguntas):
+        self.preguntas = preguntas
+        self.por_id = {p['id']: p for p in preguntas}
+        ids_por_habilidad = {}
+        for p in preguntas:
+            ids_por_habilidad.setdefault(p['habilidad'], []).append(p['id'])
+        self.ids_por_habilidad = {h: tuple(ids) for h, ids in ids_por_habilidad.items()}
+        # id -> (habilidad, posición en ids_por_habilidad[habilidad])
+        self.ubicacion = {
+            id_pregunta: (h, i)
+            for h, ids in self.ids_por_habilidad.items()
+            for i, id_pregunta in enumerate(ids)
+        }
+
+    @classmethod
+    def cargar(cls, ruta=ARCHIVO_PREGUNTAS):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['preguntas'])
+
+    def __len__(self):
+        return len(self.por_id)
+
+    def obtener(self, id_pregunta):
+        """Devuelve la pregunta o None si el id no existe"""
+        return self.por_id.get(id_pregunta)
+
+    def nuevo_pool(self):
+        return PoolPreguntas(self)
+
+
+class PoolPreguntas:
+    """
+    Ids de preguntas sin responder, agrupados por habilidad, sin copiar el
+    banco. Cada habilidad es una permutación por intercambios de su tupla en
+    el banco: las primeras `quedan` posiciones están sin responder y quitar
+    una pregunta la intercambia con la última de ellas. La permutación se
+    guarda dispersa (solo las posiciones movidas, en diccionarios), así que
+    sortear y quitar cuestan O(1) y la memoria crece con las respuestas de
+    la sesión, no con el tamaño del banco.
+    """
+
+    __slots__ = ('banco', '_quedan', '_movidas', '_donde')
+
+    def __init__(self, banco):
+        self.banco = banco
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Vuelve a poner todas las preguntas del banco como disponibles"""
+        # Solo las habilidades con respuestas; las demás siguen como en el banco.
+        self._quedan = {}
+        self._movidas = {} # habilidad -> {posición: índice en la tupla del banco}
+        self._donde = {}   # habilidad -> {índice en la tupla del banco: posición}
+
+    def quedan(self, habilidad):
+        return self._quedan.get(habilidad, len(self.banco.ids_por_habilidad.get(habilidad, ())))
+
+    def _indice_en(self, habilidad, posicion):
+        movidas = self._movidas.get(habilidad)
+        return posicion if movidas is None else movidas.get(posicion, posicion)
+
+    def _posicion_de(self, habilidad, indice):
+        donde = self._donde.get(habilidad)
+        return indice if donde is None else donde.get(indice, indice)
+
+    def _colocar(self, habilidad, posicion, indice):
+        movidas = self._movidas.setdefault(habilidad, {})
+        donde = self._donde.setdefault(habilidad, {})
+        if posicion == indice:
+            movidas.pop(posicion, None)
+            donde.pop(indice, None)
+        else:
+            movidas[posicion] = indice
+            donde[indice] = posicion
+
+    def _posicion_pendiente(self, id_pregunta):
+        """(habilidad, posición) si la pregunta está sin responder; si no, None"""
+        ubicacion = self.banco.ubicacion.get(id_pregunta)
+        if ubicacion is None:
+            return None
+        habilidad, indice = ubicacion
+        posicion = self._posicion_de(habilidad, indice)
+        return (habilidad, posicion) if posicion < self.quedan(habilidad) else None
+
+    def __contains__(self, id_pregunta):
+        return self._posicion_pendiente(id_pregunta) is not None
+
+    def sortear(self, habilidad, rng=random, excluir=None):
+        """Id aleatorio sin responder de la habilidad (sin quitarlo), o None"""
+        quedan = self.quedan(habilidad)
+        if not quedan:
+            return None
+        ids = self.banco.ids_por_habilidad[habilidad]
+        pendiente = self._posicion_pendiente(excluir) if excluir is not None else None
+        if pendiente is None or pendiente[0] != habilidad:
+            return ids[self._indice_en(habilidad, rng.randrange(quedan))]
+        if quedan == 1:
+            return None
+        # Sortea entre los demás saltando la posición excluida.
+        elegido = rng.randrange(quedan - 1)
+        return ids[self._indice_en(habilidad, elegido + (elegido >= pendiente[1]))]
+
+    def quitar(self, id_pregunta):
+        """Marca la pregunta como respondida. Devuelve False si ya no estaba"""
+        pendiente = self._posicion_pendiente(id_pregunta)
+        if pendiente is None:
+            return False
+        habilidad, posicion = pendiente
+        ultima = self.quedan(habilidad) - 1
+        # Intercambia con la última sin responder y acorta la parte pendiente.
+        indice = self.banco.ubicacion[id_pregunta][1]
+        self._colocar(habilidad, posicion, self._indice_en(habilidad, ultima))
+        self._colocar(habilidad, ultima, indice)
+        self._quedan[habilidad] = ultima
+        return True
@@ -0,0 +1,310 @@
+"""
+=============================================================================
+BARRIDO DE HIPERPARÁMETROS
+Entrena muchas configuraciones de entrenar_modelo.entrenar() en paralelo,
+una por proceso, con un número fijo de hilos de TensorFlow por proceso.
+El dataset se carga una sola vez en memoria compartida y todos los procesos
+lo leen sin copiarlo. Cada entrenamiento usa parada temprana y el resultado
+(pérdida y precisión de validación, épocas, tiempo) se guarda en un CSV.
+
+    python barrido_hiperparametros.py --embedding-usuario 8 16 --capas-densas 16,8 32,16
+    python barrido_hiperparametros.py --tasa-aprendizaje 0.001 0.003 --procesos 4
+=============================================================================
+"""
+
+import os
+import time
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+ARCHIVO_RESULTADOS = 'resultados_barrido.csv'
+
+# Columnas del dataset que se comparten entre procesos.
+COLUMNAS = (('usuarios', np.int32), ('habilidades', np.int32), ('resultados', np.float32))
+
+
+# --- DATASET EN MEMORIA COMPARTIDA ---
+
+class DatasetCompartido:
+    """
+    Las columnas de entrenamiento y validación en bloques de memoria
+    compartida. El proceso que lo crea es el dueño y debe llamar a liberar();
+    los trabajadores lo abren con abrir(descripcion()).
+    """
+
+    def __init__(self, bloques, num_usuarios, num_habilidades, dueno):
+        # (particion, columna) -> (SharedMemory, np.ndarray sobre ese bloque)
+        self._bloques = bloques
+        self.num_usuarios = num_usuarios
+        self.num_habilidades = num_habilidades
+        self._dueno = dueno
+
+    @classmethod
+    def crear(cls, particiones, num_usuarios, num_habilidades):
+        """`particiones` es {'train': {columna: array}, 'val': {...}}"""
+        bloques = {}
+        try:
+            for particion, columnas in particiones.items():
+                for nombre, tipo in COLUMNAS:
+                    origen = np.asarray(columnas[nombre], dtype=tipo)
+                    memoria = shared_memory.SharedMemory(create=True, size=max(origen.nbytes, 1))
+                    destino = np.ndarray(origen.shape, dtype=tipo, buffer=memoria.buf)
+                    destino[:] = origen
+                    bloques[(particion, nombre)] = (memoria, destino)
+        except BaseException:
+            cls(bloques, num_usuarios, num_habilidades, dueno=True).liberar()
+            raise
+        return cls(bloques, num_usuarios, num_habilidades, dueno=True)
+
+    def descripcion(self):
+        """Lo necesario para abrirlo en otro proceso (se puede enviar por pickle)"""
+        return {
+            'bloques': {clave: (memoria.name, array.shape, array.dtype.str)
+                        for clave, (memoria, array) in self._bloques.items()},
+            'num_usuarios': self.num_usuarios,
+            'num_habilidades': self.num_habilidades,
+        }
+
+    @classmethod
+    def abrir(cls, descripcion):
+        bloques = {}
+        for clave, (nombre, forma, tipo) in descripcion['bloques'].items():
+            memoria = shared_memory.SharedMemory(name=nombre)
+            bloques[clave] = (memoria, np.ndarray(forma, dtype=tipo, buffer=memoria.buf))
+        return cls(bloques, descripcion['num_usuarios'], descripcion['num_habilidades'], dueno=False)
+
+    def columnas(self, particion):
+        return tuple(self._bloques[(particion, nombre)][1] for nombre, _ in COLUMNAS)
+
+    def filas(self, particion):
+        return len(self._bloques[(particion, 'resultados')][1])
+
+    def nbytes(self):
+        return sum(array.nbytes for _, array in self._bloques.values())
+
+    def liberar(self):
+        for memoria, _ in self._bloques.values():
+            memoria.close()
+            if self._dueno:
+                memoria.unlink()
+        self._bloques = {}
+
+
+def cargar_dataset(fuente, tamano_bloque):
+    """Lee el dataset una vez, con la misma partición que entrenar_modelo.py"""
+    import entrenar_modelo as em
+    user_map, skill_map, total_filas = em.crear_mapas(fuente, tamano_bloque)
+    particiones = {p: {nombre: [] for nombre, _ in COLUMNAS} for p in ('train', 'val')}
+    for inicio, usuarios, habilidades, resultados in em.leer_bloques(fuente, user_map, skill_map, tamano_bloque):
+        mascara = em.mascara_validacion(np.arange(inicio, inicio + len(resultados)))
+        for particion, seleccion in (('train', ~mascara), ('val', mascara)):
+            destino = particiones[particion]
+            destino['usuarios'].append(usuarios[seleccion])
+            destino['habilidades'].append(habilidades[seleccion])
+            destino['resultados'].append(resultados[seleccion])
+    particiones = {p: {n: np.concatenate(partes) for n, partes in columnas.items()}
+                   for p, columnas in particiones.items()}
+    return DatasetCompartido.crear(particiones, len(user_map), len(skill_map)), total_filas
+
+
+# --- PROCESOS TRABAJADORES ---
+
+# Un dataset abierto por proceso, creado al iniciar el trabajador.
+_dataset = None
+
+def _iniciar_trabajador(descripcion, hilos, contador, fijar_cpus):
+    global _dataset
+    # Antes de que TensorFlow arranque su runtime: sin esto cada proceso
+    # usaría todos los núcleos y se pisarían entre sí.
+    for variable in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[variable] = str(hilos)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    if fijar_cpus and hasattr(os, 'sched_setaffinity'):
+        with contador.get_lock():
+            indice = contador.value
+            contador.value += 1
+        cpus = sorted(os.sched_getaffinity(0))
+        inicio = indice * hilos % len(cpus)
+        os.sched_setaffinity(0, {cpus[(inicio + i) % len(cpus)] for i in range(hilos)})
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(hilos)
+    tf.config.threading.set_inter_op_parallelism_threads(hilos)
+    _dataset = DatasetCompartido.abrir(descripcion)
+
+
+def _flujo(columnas, batch_size, mezclar, semilla):
+    """tf.data sobre los arrays compartidos: solo se copia cada lote"""
+    import tensorflow as tf
+    usuarios, habilidades, resultados = columnas
+    rng = np.random.default_rng(semilla)
+
+    def generador():
+        # Una permutación nueva cada vez que Keras recorre el dataset (cada época).
+        orden = rng.permutation(len(resultados)) if mezclar else np.arange(len(resultados))
+        for inicio in range(0, len(orden), batch_size):
+            indices = orden[inicio:inicio + batch_size]
+            yield usuarios[indices], habilidades[indices], resultados[indices]
+
+    firma = (
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32),
+    )
+    dataset = tf.data.Dataset.from_generator(generador, output_signature=firma)
+    dataset = dataset.map(lambda u, h, r: ((u, h), r), num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def _entrenar_configuracion(config, paciencia, semilla):
+    import tensorflow as tf
+    import entrenar_modelo as em
+    tf.keras.utils.set_random_seed(semilla)
+    datos = {
+        'train': _flujo(_dataset.columnas('train'), config['batch_size'], True, semilla),
+        'val': _flujo(_dataset.columnas('val'), config['batch_size'], False, semilla),
+        'num_usuarios': _dataset.num_usuarios,
+        'num_habilidades': _dataset.num_habilidades,
+    }
+    parada = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=paciencia,
+                                              restore_best_weights=True)
+    _, history, duracion = em.entrenar(config, datos, [parada], verbose=0)
+
+    historial = history.history
+    mejor = int(np.argmin(historial['val_loss']))
+    return {
+        'val_loss': float(historial['val_loss'][mejor]),
+        'val_accuracy': float(historial['val_accuracy'][mejor]),
+        'loss': float(historial['loss'][mejor]),
+        'mejor_epoca': mejor + 1,
+        'epocas_entrenadas': len(historial['val_loss']),
+        'tiempo_s': round(duracion, 2),
+    }
+
+
+# --- BARRIDO ---
+
+def rejilla(opciones):
+    """Producto cartesiano de {hiperparámetro: [valores]} como lista de configuraciones"""
+    nombres = list(opciones)
+    return [dict(zip(nombres, valores)) for valores in itertools.product(*opciones.values())]
+
+
+def barrer(configuraciones, dataset, procesos, hilos_por_proceso=None, paciencia=2,
+           semilla=42, fijar_cpus=False):
+    """
+    Entrena cada configuración en un proceso del pool y devuelve un
+    DataFrame ordenado por val_loss. Las que fallan quedan con su error.
+    """
+    import entrenar_modelo as em
+    if hilos_por_proceso is None:
+        hilos_por_proceso = max(1, (os.cpu_count() or 1) // procesos)
+
+    # 'spawn' y no 'fork': el padre ya importó TensorFlow y su runtime no
+    # sobrevive a un fork.
+    contexto = multiprocessing.get_context('spawn')
+    contador = contexto.Value('i', 0)
+    filas = []
+    with ProcessPoolExecutor(procesos, mp_context=contexto, initializer=_iniciar_trabajador,
+                             initargs=(dataset.descripcion(), hilos_por_proceso, contador, fijar_cpus)) as ejecutor:
+        futuros = {}
+        for numero, config in enumerate(configuraciones):
+            config = em.completar_configuracion(config)
+            futuros[ejecutor.submit(_entrenar_configuracion, config, paciencia, semilla)] = (numero, config)
+
+        for futuro in as_completed(futuros):
+            numero, config = futuros[futuro]
+            fila = {'configuracion': numero, **config,
+                    'capas_densas': '-'.join(map(str, config['capas_densas']))}
+            try:
+                fila.update(futuro.result())
+                print(f"  [{len(filas) + 1}/{len(futuros)}] #{numero}: val_loss={fila['val_loss']:.4f} "
+                      f"val_accuracy={fila['val_accuracy']:.4f} en {fila['tiempo_s']:.1f}s")
+            except Exception as error:
+                fila['error'] = repr(error)
+                print(f"  [{len(filas) + 1}/{len(futuros)}] #{numero}: error {error!r}")
+            filas.append(fila)
+
+    resultados = pd.DataFrame(filas)
+    if 'val_loss' in resultados:
+        resultados = resultados.sort_values('val_loss', na_position='last')
+    return resultados.reset_index(drop=True)
+
+
+def _capas(texto):
+    return tuple(int(n) for n in texto.split(','))
+
+
+def main(args):
+    import entrenar_modelo as em
+    opciones = {
+        'embedding_usuario': args.embedding_usuario,
+        'embedding_habilidad': args.embedding_habilidad,
+        'capas_densas': args.capas_densas,
+        'tasa_aprendizaje': args.tasa_aprendizaje,
+        'batch_size': args.batch_size,
+        'epocas': [args.epocas],
+    }
+    configuraciones = rejilla(opciones)
+    procesos = args.procesos or min(len(configuraciones), os.cpu_count() or 1)
+
+    fuente = em.elegir_fuente(args.csv, args.columnas)
+    inicio = time.perf_counter()
+    try:
+        dataset, total_filas = cargar_dataset(fuente, args.tamano_bloque)
+    except FileNotFoundError:
+        print(f"Error: No se encontró '{fuente['ruta']}'.")
+        print("Asegúrate de ejecutar 'generar_datos.py' primero.")
+        return
+    print(f"Datos ({fuente['tipo']}): {total_filas} registros, {dataset.filas('train')} de entrenamiento y "
+          f"{dataset.filas('val')} de validación, {dataset.nbytes() / 2**20:.1f} MB compartidos "
+          f"(cargados en {time.perf_counter() - inicio:.1f}s).")
+
+    try:
+        print(f"Entrenando {len(configuraciones)} configuraciones en {procesos} proceso(s)...")
+        inicio = time.perf_counter()
+        resultados = barrer(configuraciones, dataset, procesos, args.hilos, args.paciencia,
+                            args.semilla, args.fijar_cpus)
+        print(f"Barrido completado en {time.perf_counter() - inicio:.1f}s.\n")
+    finally:
+        dataset.liberar()
+
+    columnas = [c for c in ('configuracion', *opciones, 'val_loss', 'val_accuracy', 'mejor_epoca',
+                            'epocas_entrenadas', 'tiempo_s', 'error') if c in resultados]
+    print(resultados[columnas].to_string(index=False))
+    resultados[columnas].to_csv(args.salida, index=False)
+    print(f"\nResultados guardados en '{args.salida}'.")
+    return resultados
+
+
+if __name__ == '__main__':
+    import datos_columnares
+    from entrenar_modelo import CONFIGURACION_POR_DEFECTO, ARCHIVO_CSV, TAMANO_BLOQUE
+    por_defecto = CONFIGURACION_POR_DEFECTO
+    parser = argparse.ArgumentParser(description='Barrido de hiperparámetros en paralelo.')
+    parser.add_argument('--csv', help=f"CSV de entrenamiento (por defecto '{ARCHIVO_CSV}').")
+    parser.add_argument('--columnas', help=f"Directorio columnar (por defecto '{datos_columnares.DIRECTORIO_COLUMNAS}'). "
+                                           "Sin ninguno de los dos se usa el más reciente.")
+    parser.add_argument('--embedding-usuario', type=int, nargs='+', default=[por_defecto['embedding_usuario']])
+    parser.add_argument('--embedding-habilidad', type=int, nargs='+', default=[por_defecto['embedding_habilidad']])
+    parser.add_argument('--capas-densas', type=_capas, nargs='+', default=[por_defecto['capas_densas']],
+                        help='Una arquitectura por valor, con las neuronas separadas por comas: 16,8 32,16')
+    parser.add_argument('--tasa-aprendizaje', type=float, nargs='+', default=[por_defecto['tasa_aprendizaje']])
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[por_defecto['batch_size']])
+    parser.add_argument('--epocas', type=int, default=20, help='Máximo de épocas; la parada temprana corta antes.')
+    parser.add_argument('--paciencia', type=int, default=2,
+                        help='Épocas sin mejorar val_loss antes de detener y restaurar los mejores pesos.')
+    parser.add_argument('--procesos', type=int, help='Por defecto, uno por núcleo (sin pasar de las configuraciones).')
+    parser.add_argument('--hilos', type=int, help='Hilos de TensorFlow por proceso (por defecto, núcleos / procesos).')
+    parser.add_argument('--fijar-cpus', action='store_true',
+                        help='Fija cada proceso a sus propios núcleos (Linux).')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', default=ARCHIVO_RESULTADOS)
+    main(parser.parse_args())
@@ -0,0 +1,267 @@
+"""
+=============================================================================
+BENCHMARK DE LA API Y DEL MODELO
+Recorre /api/reiniciar, /api/pregunta y /api/verificar con el cliente de
+pruebas de Flask y con un servidor local real, mide modelo.predict con
+lotes de 1 a 100k pares y guarda latencias (p50/p95/p99), rendimiento y
+memoria pico en un JSON para comparar entre commits
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import contextlib
+import platform
+import threading
+import subprocess
+import http.client
+from collections import defaultdict
+
+# El benchmark no debe dejar eventos en el registro de entrenamiento incremental.
+os.environ.setdefault('REGISTRO_EVENTOS', '')
+
+import numpy as np
+from benchmark_motores import rss_pico_mb
+
+LOTES_PREDICCION = [1, 10, 100, 1000, 10000, 100000]
+ARCHIVO_SALIDA = 'benchmark_api.json'
+
+
+def resumir(tiempos, duracion_total=None):
+    """p50/p95/p99 en milisegundos y, si se da la duración, peticiones por segundo"""
+    tiempos = np.asarray(tiempos)
+    resumen = {
+        'n': int(len(tiempos)),
+        'media_ms': round(float(tiempos.mean()) * 1000, 4),
+        'p50_ms': round(float(np.percentile(tiempos, 50)) * 1000, 4),
+        'p95_ms': round(float(np.percentile(tiempos, 95)) * 1000, 4),
+        'p99_ms': round(float(np.percentile(tiempos, 99)) * 1000, 4),
+    }
+    if duracion_total:
+        resumen['por_s'] = round(len(tiempos) / duracion_total, 1)
+    return resumen
+
+
+class ClientePruebas:
+    """Peticiones con app.test_client(): mide la aplicación sin la red"""
+
+    def __init__(self, app):
+        self._cliente = app.test_client()
+
+    def get(self, ruta):
+        return self._cliente.get(ruta).get_json()
+
+    def post(self, ruta, datos):
+        return self._cliente.post(ruta, json=datos).get_json()
+
+
+class ClienteHTTP:
+    """Peticiones HTTP reales con conexión persistente (una por hilo)"""
+
+    def __init__(self, puerto):
+        self._conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+
+    def _pedir(self, metodo, ruta, datos=None):
+        cuerpo = None if datos is None else json.dumps(datos)
+        cabeceras = {} if datos is None else {'Content-Type': 'application/json'}
+        self._conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+        return json.loads(self._conexion.getresponse().read())
+
+    def get(self, ruta):
+        return self._pedir('GET', ruta)
+
+    def post(self, ruta, datos):
+        return self._pedir('POST', ruta, datos)
+
+
+def jugar(cliente, usuario, preguntas_max, prob_acierto, rng, tiempos):
+    """Una partida: reiniciar y luego pregunta/verificar hasta terminar"""
+    inicio = time.perf_counter()
+    cliente.post('/api/reiniciar', {'usuario': usuario})
+    tiempos['/api/reiniciar'].append(time.perf_counter() - inicio)
+
+    for _ in range(preguntas_max):
+        inicio = time.perf_counter()
+        datos = cliente.get(f'/api/pregunta?usuario={usuario}')
+        tiempos['/api/pregunta'].append(time.perf_counter() - inicio)
+        if datos.get('completado'):
+            break
+        pregunta = datos['pregunta']
+        respuesta = (pregunta['respuesta_correcta'] if rng.random() < prob_acierto
+                     else rng.choice(pregunta['opciones']))
+
+        inicio = time.perf_counter()
+        cliente.post('/api/verificar', {'usuario': usuario, 'id': pregunta['id'], 'respuesta': respuesta})
+        tiempos['/api/verificar'].append(time.perf_counter() - inicio)
+
+
+def recorrer_api(crear_cliente, usuarios, hilos, preguntas_max, prob_acierto, semilla):
+    """Reparte los usuarios entre hilos; cada hilo usa su propio cliente"""
+    tiempos_por_hilo = [defaultdict(list) for _ in range(hilos)]
+
+    def trabajar(indice):
+        cliente = crear_cliente()
+        rng = random.Random(semilla + indice)
+        for usuario in usuarios[indice::hilos]:
+            jugar(cliente, usuario, preguntas_max, prob_acierto, rng, tiempos_por_hilo[indice])
+
+    # Los print del backend (uno por respuesta) van a /dev/null durante la medición.
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        trabajadores = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        duracion = time.perf_counter() - inicio
+
+    tiempos = defaultdict(list)
+    for parcial in tiempos_por_hilo:
+        for ruta, valores in parcial.items():
+            tiempos[ruta].extend(valores)
+    resultado = {ruta: resumir(valores, duracion) for ruta, valores in sorted(tiempos.items())}
+    total = sum(len(v) for v in tiempos.values())
+    resultado['total'] = {'peticiones': total, 'duracion_s': round(duracion, 3),
+                          'por_s': round(total / duracion, 1)}
+    return resultado
+
+
+def iniciar_servidor(app):
+    """Servidor werkzeug con hilos en un puerto libre; devuelve (servidor, puerto)"""
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.WARNING) # Sin una línea por petición.
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, servidor.server_port
+
+
+def medir_prediccion(modelo, num_usuarios, num_habilidades, lotes, presupuesto_s, semilla):
+    """Latencia de modelo.predict por tamaño de lote; repite hasta agotar el presupuesto"""
+    rng = np.random.default_rng(semilla)
+    resultados = {}
+    for lote in lotes:
+        ids_usuarios = rng.integers(0, num_usuarios, lote).astype(np.int32)
+        ids_habilidades = rng.integers(0, num_habilidades, lote).astype(np.int32)
+        modelo.predict([ids_usuarios, ids_habilidades], batch_size=lote, verbose=0) # Calentamiento.
+        tiempos = []
+        limite = time.perf_counter() + presupuesto_s
+        while len(tiempos) < 5 or (time.perf_counter() < limite and len(tiempos) < 10000):
+            inicio = time.perf_counter()
+            modelo.predict([ids_usuarios, ids_habilidades], batch_size=lote, verbose=0)
+            tiempos.append(time.perf_counter() - inicio)
+        resumen = resumir(tiempos)
+        resumen['pares_por_s'] = round(lote / float(np.median(tiempos)))
+        resultados[str(lote)] = resumen
+    return resultados
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, anterior, umbral):
+    """Imprime las latencias p50/p95 que empeoraron más de `umbral` (fracción)"""
+    regresiones = 0
+    for seccion in ('test_client', 'servidor', 'prediccion'):
+        for clave, metricas in actual.get(seccion, {}).items():
+            previas = anterior.get(seccion, {}).get(clave)
+            if not previas or 'p50_ms' not in metricas:
+                continue
+            for percentil in ('p50_ms', 'p95_ms'):
+                antes, ahora = previas[percentil], metricas[percentil]
+                if antes > 0 and (ahora - antes) / antes > umbral:
+                    regresiones += 1
+                    print(f"  REGRESIÓN {seccion}/{clave} {percentil}: {antes:.4f} -> {ahora:.4f} ms "
+                          f"({(ahora - antes) / antes:+.0%})")
+    if not regresiones:
+        print("  Sin regresiones por encima del umbral.")
+    return regresiones
+
+
+def imprimir(seccion, resultados):
+    print(f"\n{seccion}")
+    print(f"  {'':<20}{'n':>8}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}{'por s':>12}")
+    for clave, m in resultados.items():
+        if 'p50_ms' in m:
+            por_s = m.get('por_s', m.get('pares_por_s', ''))
+            print(f"  {clave:<20}{m['n']:>8}{m['p50_ms']:>12.4f}{m['p95_ms']:>12.4f}"
+                  f"{m['p99_ms']:>12.4f}{por_s:>12}")
+
+
+def main(args):
+    import app
+    r = app.recursos
+    usuarios = [u for _, u in zip(range(args.usuarios), r.mapa_usuarios)]
+    informe = {
+        'commit': commit_actual(),
+        'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'motor': app.MOTOR_INFERENCIA,
+        'version_modelo': r.version,
+        'matriz_precalculada': r.matriz_probs is not None,
+        'parametros': vars(args),
+    }
+    opciones = dict(usuarios=usuarios, hilos=args.hilos, preguntas_max=args.preguntas,
+                    prob_acierto=args.prob_acierto, semilla=args.semilla)
+
+    if 'test_client' in args.modos:
+        informe['test_client'] = recorrer_api(lambda: ClientePruebas(app.app), **opciones)
+        imprimir("Cliente de pruebas de Flask", informe['test_client'])
+
+    if 'servidor' in args.modos:
+        servidor, puerto = iniciar_servidor(app.app)
+        try:
+            informe['servidor'] = recorrer_api(lambda: ClienteHTTP(puerto), **opciones)
+        finally:
+            servidor.shutdown()
+        imprimir(f"Servidor local (127.0.0.1:{puerto})", informe['servidor'])
+
+    if 'prediccion' in args.modos:
+        informe['prediccion'] = medir_prediccion(
+            r.modelo, len(r.mapa_usuarios), len(r.mapa_habilidades),
+            args.lotes, args.presupuesto, args.semilla
+        )
+        imprimir(f"modelo.predict ({app.MOTOR_INFERENCIA}) por tamaño de lote", informe['prediccion'])
+
+    informe['rss_pico_mb'] = round(rss_pico_mb(), 1)
+    print(f"\nMemoria pico (RSS): {informe['rss_pico_mb']} MB")
+
+    with open(args.salida, 'w') as f:
+        json.dump(informe, f, indent=4)
+    print(f"Informe guardado en '{args.salida}'.")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            anterior = json.load(f)
+        print(f"\nComparación con '{args.comparar}' (commit {anterior.get('commit')}):")
+        if comparar(informe, anterior, args.umbral):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de los endpoints y del modelo.')
+    parser.add_argument('--modos', nargs='+', default=['test_client', 'servidor', 'prediccion'],
+                        choices=['test_client', 'servidor', 'prediccion'])
+    parser.add_argument('--usuarios', type=int, default=50, help='Usuarios distintos que juegan una partida.')
+    parser.add_argument('--hilos', type=int, default=4, help='Clientes concurrentes.')
+    parser.add_argument('--preguntas', type=int, default=30, help='Preguntas máximas por partida.')
+    parser.add_argument('--prob-acierto', type=float, default=0.7)
+    parser.add_argument('--lotes', nargs='+', type=int, default=LOTES_PREDICCION)
+    parser.add_argument('--presupuesto', type=float, default=1.0,
+                        help='Segundos de medición por tamaño de lote.')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA)
+    parser.add_argument('--comparar', help='Informe anterior; sale con código 1 si hay regresiones.')
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help='Empeoramiento relativo de p50/p95 que cuenta como regresión.')
+    sys.exit(main(parser.parse_args()))
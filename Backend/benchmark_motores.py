@@ -0,0 +1,142 @@
+"""
+=============================================================================
+BENCHMARK DE MOTORES DE INFERENCIA
+Compara keras (tf.keras.models.load_model + predict), tflite y numpy:
+tiempo de carga, latencia por llamada y memoria residente (RSS). Cada motor
+se mide en su propio proceso para que la memoria de uno no ensucie la de otro.
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+MOTORES = ['keras', 'tflite', 'numpy']
+
+
+def rss_mb():
+    """Memoria residente actual del proceso en MB (Linux); si no, el pico"""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return rss_pico_mb()
+
+
+def rss_pico_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS.
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def cargar(motor):
+    if motor == 'keras':
+        import tensorflow as tf
+        return tf.keras.models.load_model('modelo_tutor.keras')
+    if motor == 'tflite':
+        import motor_tflite
+        return motor_tflite.cargar_motor()
+    import motor_numpy
+    return motor_numpy.cargar_motor()
+
+
+def medir(motor, lotes, repeticiones):
+    """Se ejecuta en el proceso hijo; devuelve un diccionario con los resultados"""
+    import numpy as np
+    resultado = {'motor': motor, 'rss_inicial_mb': round(rss_mb(), 1)}
+
+    inicio = time.perf_counter()
+    modelo = cargar(motor)
+    resultado['carga_s'] = round(time.perf_counter() - inicio, 3)
+    resultado['rss_tras_carga_mb'] = round(rss_mb(), 1)
+    if motor == 'tflite':
+        # Sin ai_edge_litert ni tflite_runtime el intérprete viene de TensorFlow completo.
+        resultado['interprete'] = type(modelo._interprete).__module__
+
+    with open('mapa_usuarios.json') as f:
+        num_usuarios = len(json.load(f))
+    with open('mapa_habilidades.json') as f:
+        num_habilidades = len(json.load(f))
+    rng = np.random.default_rng(0)
+
+    resultado['lotes'] = {}
+    for lote in lotes:
+        ids_usuarios = rng.integers(0, num_usuarios, lote).astype(np.int32)
+        ids_habilidades = rng.integers(0, num_habilidades, lote).astype(np.int32)
+        # La primera llamada se mide aparte: en Keras incluye el trazado del grafo.
+        inicio = time.perf_counter()
+        modelo.predict([ids_usuarios, ids_habilidades], batch_size=lote, verbose=0)
+        primera = time.perf_counter() - inicio
+
+        tiempos = np.empty(repeticiones)
+        for i in range(repeticiones):
+            inicio = time.perf_counter()
+            modelo.predict([ids_usuarios, ids_habilidades], batch_size=lote, verbose=0)
+            tiempos[i] = time.perf_counter() - inicio
+        resultado['lotes'][str(lote)] = {
+            'primera_ms': round(primera * 1000, 3),
+            'p50_ms': round(float(np.percentile(tiempos, 50)) * 1000, 4),
+            'p95_ms': round(float(np.percentile(tiempos, 95)) * 1000, 4),
+            'pares_por_s': round(lote / float(np.median(tiempos))),
+        }
+
+    resultado['rss_final_mb'] = round(rss_mb(), 1)
+    resultado['rss_pico_mb'] = round(rss_pico_mb(), 1)
+    return resultado
+
+
+def ejecutar_en_subproceso(motor, lotes, repeticiones):
+    comando = [sys.executable, os.path.abspath(__file__), '--medir', motor,
+               '--repeticiones', str(repeticiones), '--lotes', *map(str, lotes)]
+    entorno = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    salida = subprocess.run(comando, capture_output=True, text=True, env=entorno)
+    # El resultado es la última línea; lo anterior es ruido de las bibliotecas.
+    lineas = salida.stdout.strip().splitlines()
+    if salida.returncode != 0 or not lineas:
+        return {'motor': motor, 'error': (salida.stderr.strip().splitlines() or ['sin salida'])[-1]}
+    return json.loads(lineas[-1])
+
+
+def imprimir_tabla(resultados, lotes):
+    print(f"\n{'Motor':<8}{'Carga (s)':>11}{'RSS (MB)':>10}" +
+          ''.join(f"{f'p50 n={l} (ms)':>17}" for l in lotes))
+    print("-" * (29 + 17 * len(lotes)))
+    for r in resultados:
+        if 'error' in r:
+            print(f"{r['motor']:<8}  error: {r['error']}")
+            continue
+        fila = f"{r['motor']:<8}{r['carga_s']:>11.3f}{r['rss_final_mb']:>10.1f}"
+        fila += ''.join(f"{r['lotes'][str(l)]['p50_ms']:>17.4f}" for l in lotes)
+        print(fila)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara latencia y memoria de los motores de inferencia.')
+    parser.add_argument('--motores', nargs='+', default=MOTORES, choices=MOTORES)
+    parser.add_argument('--lotes', nargs='+', type=int, default=[1, 3, 1024],
+                        help='Pares por llamada; 3 es el perfil de un usuario (una fila por habilidad).')
+    parser.add_argument('--repeticiones', type=int, default=200)
+    parser.add_argument('--salida', help='Guarda los resultados en este JSON.')
+    parser.add_argument('--medir', choices=MOTORES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(args.medir, args.lotes, args.repeticiones)))
+        sys.exit(0)
+
+    resultados = []
+    for motor in args.motores:
+        print(f"Midiendo {motor}...")
+        resultados.append(ejecutar_en_subproceso(motor, args.lotes, args.repeticiones))
+    imprimir_tabla(resultados, args.lotes)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=4)
+        print(f"\nResultados guardados en '{args.salida}'.")
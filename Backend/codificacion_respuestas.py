@@ -0,0 +1,168 @@
+"""
+=============================================================================
+CODIFICACIÓN DE RESPUESTAS
+Preguntas serializadas una sola vez (JSON y msgpack) con ETag estable,
+armado de respuestas que insertan esos bytes sin volver a serializarlos,
+negociación de formato (Accept: application/msgpack, si está instalado) y
+compresión gzip para los cuerpos grandes
+=============================================================================
+"""
+
+import gzip
+import json
+import struct
+import hashlib
+
+try:
+    import msgpack
+except ImportError: # Opcional: sin msgpack solo se responde JSON.
+    msgpack = None
+
+TIPO_JSON = 'application/json'
+TIPO_MSGPACK = 'application/msgpack'
+
+# Por debajo de este tamaño gzip no compensa.
+COMPRESION_MINIMA = 512
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class Crudo:
+    """Un valor ya serializado en cada formato; se inserta tal cual en la respuesta"""
+
+    __slots__ = ('json', 'msgpack')
+
+    def __init__(self, valor):
+        self.json = _json(valor)
+        self.msgpack = msgpack.packb(valor) if msgpack is not None else None
+
+
+class PreguntasSerializadas:
+    """Bytes y ETag de cada pregunta del banco, calculados al arrancar"""
+
+    def __init__(self, banco):
+        self._crudas = {}
+        self._gzip = {}
+        self._huellas = {}
+        for id_pregunta, pregunta in banco.por_id.items():
+            crudo = Crudo(pregunta)
+            self._crudas[id_pregunta] = crudo
+            self._gzip[id_pregunta] = gzip.compress(crudo.json, compresslevel=9)
+            self._huellas[id_pregunta] = hashlib.sha1(crudo.json).hexdigest()[:20]
+
+    def crudo(self, id_pregunta):
+        return self._crudas.get(id_pregunta)
+
+    def etag(self, id_pregunta, formato='json'):
+        """
+        ETag débil: solo cambia si cambia la pregunta. Es el mismo con o sin
+        gzip, y distinto para msgpack, que es otra representación.
+        """
+        sufijo = '-msgpack' if formato == 'msgpack' else ''
+        return f'W/"{self._huellas[id_pregunta]}{sufijo}"'
+
+    def json_gzip(self, id_pregunta):
+        return self._gzip.get(id_pregunta)
+
+
+def _encabezado_mapa(n):
+    if n < 16:
+        return bytes([0x80 | n])
+    if n < 2 ** 16:
+        return b'\xde' + struct.pack('>H', n)
+    return b'\xdf' + struct.pack('>I', n)
+
+
+def _encabezado_lista(n):
+    if n < 16:
+        return bytes([0x90 | n])
+    if n < 2 ** 16:
+        return b'\xdc' + struct.pack('>H', n)
+    return b'\xdd' + struct.pack('>I', n)
+
+
+def _tiene_crudos(lista):
+    # Las listas sin Crudo (como las predicciones) se serializan de una vez en C.
+    return any(isinstance(v, Crudo) for v in lista)
+
+
+def codificar_json(valor):
+    """Como json.dumps, pero los Crudo (en diccionarios o listas) se copian sin tocar"""
+    if isinstance(valor, Crudo):
+        return valor.json
+    if isinstance(valor, dict):
+        return b'{' + b','.join(_json(str(k)) + b':' + codificar_json(v) for k, v in valor.items()) + b'}'
+    if isinstance(valor, (list, tuple)) and _tiene_crudos(valor):
+        return b'[' + b','.join(codificar_json(v) for v in valor) + b']'
+    return _json(valor)
+
+
+def codificar_msgpack(valor):
+    """msgpack concatena valores completos, así que los Crudo también se copian tal cual"""
+    if isinstance(valor, Crudo):
+        return valor.msgpack
+    if isinstance(valor, dict):
+        return _encabezado_mapa(len(valor)) + b''.join(
+            msgpack.packb(str(k)) + codificar_msgpack(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)) and _tiene_crudos(valor):
+        return _encabezado_lista(len(valor)) + b''.join(codificar_msgpack(v) for v in valor)
+    return msgpack.packb(valor)
+
+
+def _calidades(cabecera):
+    """{valor: q} de una cabecera Accept o Accept-Encoding ('gzip;q=0.5, br')"""
+    calidades = {}
+    for parte in (cabecera or '').split(','):
+        valor, *parametros = [p.strip() for p in parte.split(';')]
+        if not valor:
+            continue
+        calidad = 1.0
+        for parametro in parametros:
+            nombre, _, dato = parametro.partition('=')
+            if nombre.strip().lower() == 'q':
+                try:
+                    calidad = float(dato)
+                except ValueError:
+                    calidad = 0.0
+        calidades[valor.lower()] = calidad
+    return calidades
+
+
+def elegir_formato(accept):
+    """'msgpack' si el cliente lo pide en Accept (con q > 0) y está instalado; si no, 'json'"""
+    if msgpack is None or not accept:
+        return 'json'
+    calidades = _calidades(accept)
+    if max(calidades.get('application/msgpack', 0), calidades.get('application/x-msgpack', 0)) > 0:
+        return 'msgpack'
+    return 'json'
+
+
+def etag_coincide(if_none_match, etag):
+    """True si la cabecera If-None-Match incluye el ETag (o es '*')"""
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(',')]
+    # La comparación débil ignora el prefijo W/.
+    return '*' in candidatos or etag.removeprefix('W/') in (c.removeprefix('W/') for c in candidatos)
+
+
+def acepta_gzip(accept_encoding):
+    """gzip con q > 0, nombrado o a través de '*' ('gzip;q=0' lo rechaza)"""
+    calidades = _calidades(accept_encoding)
+    return calidades.get('gzip', calidades.get('x-gzip', calidades.get('*', 0))) > 0
+
+
+def codificar(valor, accept=None, accept_encoding=None):
+    """Devuelve (cuerpo, cabeceras) según lo que acepta el cliente"""
+    if elegir_formato(accept) == 'msgpack':
+        cuerpo, cabeceras = codificar_msgpack(valor), {'Content-Type': TIPO_MSGPACK}
+    else:
+        cuerpo, cabeceras = codificar_json(valor), {'Content-Type': TIPO_JSON}
+    cabeceras['Vary'] = 'Accept, Accept-Encoding'
+    if len(cuerpo) >= COMPRESION_MINIMA and acepta_gzip(accept_encoding):
+        cuerpo = gzip.compress(cuerpo, compresslevel=5)
+        cabeceras['Content-Encoding'] = 'gzip'
+    return cuerpo, cabeceras
@@ -0,0 +1,135 @@
+"""
+=============================================================================
+COLA DE INFERENCIA CON MICRO-LOTES
+Un hilo de fondo agrupa las peticiones (usuario, habilidad) que llegan casi
+a la vez, las puntúa en una sola pasada del modelo y resuelve sus futuros
+=============================================================================
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+
+class ColaLlenaError(RuntimeError):
+    """La cola alcanzó su profundidad máxima"""
+
+
+class ColaInferencia:
+    """
+    predecir(ids_usuarios, ids_habilidades) -> vector de probabilidades.
+    Un lote se cierra al juntar tamano_lote_max pares o al pasar espera_max
+    segundos desde la primera petición del lote.
+    """
+
+    def __init__(self, predecir, tamano_lote_max=1024, espera_max=0.002, profundidad_max=10000):
+        self._predecir = predecir
+        self.tamano_lote_max = tamano_lote_max
+        self.espera_max = espera_max
+        self.profundidad_max = profundidad_max
+        self._cola = queue.Queue(maxsize=profundidad_max)
+        self._detenida = threading.Event()
+
+        self._lock_metricas = threading.Lock()
+        self._lotes = 0
+        self._pares = 0
+        self._peticiones = 0
+        self._lote_max_visto = 0
+        self._rechazadas = 0
+        self._tiempo_inferencia = 0.0
+
+        self._hilo = threading.Thread(target=self._trabajar, name='cola-inferencia', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, ids_usuarios, ids_habilidades):
+        """Encola los pares y devuelve un Future con su vector de probabilidades"""
+        ids_usuarios = np.asarray(ids_usuarios, dtype=np.int32).reshape(-1)
+        ids_habilidades = np.asarray(ids_habilidades, dtype=np.int32).reshape(-1)
+        futuro = Future()
+        try:
+            self._cola.put_nowait((ids_usuarios, ids_habilidades, futuro))
+        except queue.Full:
+            with self._lock_metricas:
+                self._rechazadas += 1
+            raise ColaLlenaError(f"Cola de inferencia llena ({self.profundidad_max} peticiones)")
+        return futuro
+
+    def predecir(self, ids_usuarios, ids_habilidades, timeout=None):
+        """Versión bloqueante de enviar()"""
+        return self.enviar(ids_usuarios, ids_habilidades).result(timeout)
+
+    def _juntar_lote(self):
+        primera = self._cola.get()
+        if primera is None:
+            return None
+        lote = [primera]
+        pares = len(primera[0])
+        limite = time.monotonic() + self.espera_max
+        while pares < self.tamano_lote_max:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                peticion = self._cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            if peticion is None:
+                self._detenida.set()
+                break
+            lote.append(peticion)
+            pares += len(peticion[0])
+        return lote
+
+    def _trabajar(self):
+        while not self._detenida.is_set():
+            lote = self._juntar_lote()
+            if lote is None:
+                break
+            ids_usuarios = np.concatenate([p[0] for p in lote])
+            ids_habilidades = np.concatenate([p[1] for p in lote])
+            inicio = time.perf_counter()
+            try:
+                probs = np.asarray(self._predecir(ids_usuarios, ids_habilidades)).reshape(-1)
+            except Exception as e:
+                for _, _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+            duracion = time.perf_counter() - inicio
+
+            # Reparte el resultado entre las peticiones, en el mismo orden.
+            desplazamiento = 0
+            for usuarios, _, futuro in lote:
+                fin = desplazamiento + len(usuarios)
+                futuro.set_result(probs[desplazamiento:fin])
+                desplazamiento = fin
+
+            with self._lock_metricas:
+                self._lotes += 1
+                self._pares += len(ids_usuarios)
+                self._peticiones += len(lote)
+                self._lote_max_visto = max(self._lote_max_visto, len(ids_usuarios))
+                self._tiempo_inferencia += duracion
+
+    def metricas(self):
+        """Configuración y contadores de la cola"""
+        with self._lock_metricas:
+            return {
+                'profundidad_cola': self._cola.qsize(),
+                'profundidad_max': self.profundidad_max,
+                'tamano_lote_max': self.tamano_lote_max,
+                'espera_max_ms': self.espera_max * 1000,
+                'lotes_procesados': self._lotes,
+                'peticiones_procesadas': self._peticiones,
+                'pares_procesados': self._pares,
+                'peticiones_rechazadas': self._rechazadas,
+                'tamano_lote_promedio': self._pares / self._lotes if self._lotes else 0.0,
+                'tamano_lote_maximo_visto': self._lote_max_visto,
+                'tiempo_inferencia_s': self._tiempo_inferencia,
+            }
+
+    def detener(self):
+        """Termina el hilo de fondo después de los lotes ya encolados"""
+        self._cola.put(None)
+        self._hilo.join()
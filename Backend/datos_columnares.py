@@ -0,0 +1,81 @@
+"""
+=============================================================================
+FORMATO COLUMNAR BINARIO PARA LOS DATOS DE ENTRENAMIENTO
+Un directorio con un .npy por columna (enteros) y un vocabulario.json que
+traduce los ids numéricos a nombres. Se lee con memory mapping, sin copias
+=============================================================================
+"""
+
+import os
+import json
+import numpy as np
+
+DIRECTORIO_COLUMNAS = 'datos_entrenamiento_columnas'
+ARCHIVO_VOCABULARIO = 'vocabulario.json'
+
+# Columna -> tipo de dato en disco.
+COLUMNAS = {
+    'id_usuario': np.int32,
+    'id_pregunta': np.int32,
+    'habilidad': np.int16,
+    'resultado_correcto': np.int8,
+}
+
+
+class EscritorColumnas:
+    """
+    Escribe las columnas por bloques directamente en archivos .npy.
+    `columnas` es el esquema {nombre: tipo}; por defecto, el de entrenamiento.
+    """
+
+    def __init__(self, directorio, total_filas, columnas=COLUMNAS):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.total_filas = total_filas
+        self.filas_escritas = 0
+        self._columnas = {
+            nombre: np.lib.format.open_memmap(
+                os.path.join(directorio, f'{nombre}.npy'), mode='w+',
+                dtype=tipo, shape=(total_filas,)
+            )
+            for nombre, tipo in columnas.items()
+        }
+
+    def escribir_bloque(self, **columnas):
+        n = len(next(iter(columnas.values())))
+        fin = self.filas_escritas + n
+        for nombre, destino in self._columnas.items():
+            destino[self.filas_escritas:fin] = columnas[nombre]
+        self.filas_escritas = fin
+
+    def cerrar(self, usuarios, habilidades):
+        """Vuelca las columnas y guarda el vocabulario (listas de nombres por id)"""
+        if self.filas_escritas != self.total_filas:
+            raise ValueError(
+                f"Se escribieron {self.filas_escritas} filas de {self.total_filas} esperadas"
+            )
+        for columna in self._columnas.values():
+            columna.flush()
+        self._columnas = {}
+        with open(os.path.join(self.directorio, ARCHIVO_VOCABULARIO), 'w', encoding='utf-8') as f:
+            json.dump({'usuarios': list(usuarios), 'habilidades': list(habilidades)}, f)
+
+
+def existe(directorio=DIRECTORIO_COLUMNAS):
+    return os.path.exists(os.path.join(directorio, ARCHIVO_VOCABULARIO))
+
+
+def fecha_modificacion(directorio=DIRECTORIO_COLUMNAS):
+    """El vocabulario se escribe al final (cerrar), así que marca cuándo terminó la escritura"""
+    return os.path.getmtime(os.path.join(directorio, ARCHIVO_VOCABULARIO))
+
+
+def cargar_columnas(directorio=DIRECTORIO_COLUMNAS, columnas=COLUMNAS):
+    """Devuelve ({columna: arreglo memory-mapped}, vocabulario)"""
+    columnas = {
+        nombre: np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode='r')
+        for nombre in columnas
+    }
+    with open(os.path.join(directorio, ARCHIVO_VOCABULARIO), 'r', encoding='utf-8') as f:
+        vocabulario = json.load(f)
+    return columnas, vocabulario
@@ -0,0 +1,183 @@
+"""
+=============================================================================
+ENTRENAMIENTO INCREMENTAL
+Ajusta modelo_tutor.keras solo con las respuestas nuevas del registro de
+eventos (eventos_respuestas.csv), agregando filas de embedding para los
+usuarios y habilidades que el modelo aún no conoce
+=============================================================================
+"""
+
+import io
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+import motor_numpy
+import motor_tflite
+import registro_modelos
+from entrenar_modelo import construir_modelo, configuracion_de_modelo
+from registro_eventos import ARCHIVO_EVENTOS, ENCABEZADO
+
+ARCHIVO_MODELO = motor_numpy.ARCHIVO_MODELO_KERAS
+ARCHIVO_MAPA_USUARIOS = 'mapa_usuarios.json'
+ARCHIVO_MAPA_HABILIDADES = 'mapa_habilidades.json'
+
+# Hasta qué byte del registro ya se entrenó, junto con el inodo del archivo
+# para notar si se rotó. Hay uno por registro, al lado de él.
+ARCHIVO_POSICION = 'eventos_respuestas.posicion'
+
+
+def ruta_posicion(ruta_eventos=ARCHIVO_EVENTOS):
+    return os.path.splitext(ruta_eventos)[0] + '.posicion'
+
+
+def leer_posicion(ruta=ARCHIVO_POSICION):
+    """Devuelve (posicion, inodo); el inodo es None si no se conoce"""
+    try:
+        with open(ruta, 'r') as f:
+            partes = f.read().split()
+    except FileNotFoundError:
+        return 0, None
+    if not partes:
+        return 0, None
+    # Formato anterior: solo la posición.
+    return int(partes[0]), int(partes[1]) if len(partes) > 1 else None
+
+
+def guardar_posicion(posicion, inodo, ruta=ARCHIVO_POSICION):
+    with open(ruta + '.tmp', 'w') as f:
+        f.write(f'{posicion} {inodo}')
+    os.replace(ruta + '.tmp', ruta)
+
+
+def leer_eventos_nuevos(ruta_eventos, posicion, inodo=None):
+    """
+    Devuelve (DataFrame, nueva_posicion, inodo) con las líneas completas
+    escritas después de `posicion`. Una línea a medio escribir se deja para la
+    próxima vez. Si el registro se rotó (otro inodo) o se truncó (es más corto
+    que la posición), se vuelve a leer desde el principio.
+    """
+    if not os.path.exists(ruta_eventos):
+        return None, posicion, inodo
+    with open(ruta_eventos, 'rb') as f:
+        estado = os.fstat(f.fileno())
+        if (inodo is not None and estado.st_ino != inodo) or posicion > estado.st_size:
+            print(f"'{ruta_eventos}' se rotó o se truncó; se lee desde el principio.")
+            posicion = 0
+        f.seek(posicion)
+        contenido = f.read()
+    fin = contenido.rfind(b'\n') + 1
+    contenido = contenido[:fin]
+    if posicion == 0 and contenido.startswith(ENCABEZADO.encode()):
+        contenido = contenido[len(ENCABEZADO):]
+    if not contenido:
+        return None, posicion + fin, estado.st_ino
+    eventos = pd.read_csv(
+        io.BytesIO(contenido), header=None,
+        names=['id_usuario', 'id_pregunta', 'habilidad', 'resultado_correcto']
+    )
+    return eventos, posicion + fin, estado.st_ino
+
+
+def ampliar_mapa(mapa, nombres):
+    """Agrega al final los nombres nuevos; devuelve cuántos se agregaron"""
+    agregados = 0
+    for nombre in pd.unique(nombres):
+        if nombre not in mapa:
+            mapa[nombre] = len(mapa)
+            agregados += 1
+    return agregados
+
+
+def ampliar_modelo(modelo, num_usuarios, num_habilidades):
+    """
+    Copia los pesos en un modelo con tablas de embedding más grandes. Las
+    filas nuevas arrancan en la media de las existentes (un usuario "promedio").
+    """
+    nuevo = construir_modelo(num_usuarios, num_habilidades, configuracion_de_modelo(modelo))
+    for capa_vieja, capa_nueva in zip(modelo.layers, nuevo.layers):
+        pesos = capa_vieja.get_weights()
+        if type(capa_vieja).__name__ == 'Embedding':
+            tabla = pesos[0]
+            filas_nuevas = capa_nueva.get_weights()[0].shape[0] - tabla.shape[0]
+            if filas_nuevas > 0:
+                media = tabla.mean(axis=0, keepdims=True)
+                tabla = np.vstack([tabla, np.repeat(media, filas_nuevas, axis=0)])
+            pesos = [tabla]
+        capa_nueva.set_weights(pesos)
+    return nuevo
+
+
+def actualizar(ruta_eventos=ARCHIVO_EVENTOS, epocas=2, batch_size=256, tasa_aprendizaje=5e-4,
+               min_eventos=1):
+    """Un ciclo incremental. Devuelve cuántos eventos nuevos se usaron"""
+    archivo_posicion = ruta_posicion(ruta_eventos)
+    eventos, nueva_posicion, inodo = leer_eventos_nuevos(ruta_eventos, *leer_posicion(archivo_posicion))
+    if eventos is None or len(eventos) < min_eventos:
+        print(f"Sin eventos suficientes ({0 if eventos is None else len(eventos)}); nada que hacer.")
+        return 0
+
+    with open(ARCHIVO_MAPA_USUARIOS, 'r') as f:
+        mapa_usuarios = json.load(f)
+    with open(ARCHIVO_MAPA_HABILIDADES, 'r') as f:
+        mapa_habilidades = json.load(f)
+
+    modelo = tf.keras.models.load_model(ARCHIVO_MODELO)
+    usuarios_nuevos = ampliar_mapa(mapa_usuarios, eventos['id_usuario'])
+    habilidades_nuevas = ampliar_mapa(mapa_habilidades, eventos['habilidad'])
+    if usuarios_nuevos or habilidades_nuevas:
+        print(f"Ampliando embeddings: +{usuarios_nuevos} usuarios, +{habilidades_nuevas} habilidades.")
+        modelo = ampliar_modelo(modelo, len(mapa_usuarios), len(mapa_habilidades))
+
+    # Ajuste fino solo con los eventos nuevos y una tasa de aprendizaje baja.
+    modelo.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=tasa_aprendizaje),
+                   loss='binary_crossentropy', metrics=['accuracy'])
+    ids_usuarios = eventos['id_usuario'].map(mapa_usuarios).to_numpy(dtype=np.int32)
+    ids_habilidades = eventos['habilidad'].map(mapa_habilidades).to_numpy(dtype=np.int32)
+    resultados = eventos['resultado_correcto'].to_numpy(dtype=np.float32)
+
+    inicio = time.perf_counter()
+    modelo.fit([ids_usuarios, ids_habilidades], resultados, epochs=epocas,
+               batch_size=batch_size, shuffle=True, verbose=0)
+    print(f"Ajuste con {len(eventos)} eventos en {time.perf_counter() - inicio:.2f}s.")
+
+    # Primero el modelo y los mapas; la posición al final, así un fallo a
+    # mitad de camino solo provoca repetir el ciclo.
+    modelo.save(ARCHIVO_MODELO)
+    with open(ARCHIVO_MAPA_USUARIOS, 'w') as f:
+        json.dump(mapa_usuarios, f)
+    with open(ARCHIVO_MAPA_HABILIDADES, 'w') as f:
+        json.dump(mapa_habilidades, f)
+    motor_numpy.exportar_pesos(modelo, motor_numpy.ARCHIVO_PESOS_NPZ)
+    motor_numpy.verificar_paridad(modelo, motor_numpy.ModeloNumpy.cargar())
+    if os.path.exists(motor_tflite.ARCHIVO_TFLITE):
+        motor_tflite.exportar_y_verificar(modelo_keras=modelo)
+    guardar_posicion(nueva_posicion, inodo, archivo_posicion)
+    return len(eventos)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ajusta el modelo con las respuestas nuevas.')
+    parser.add_argument('--eventos', default=ARCHIVO_EVENTOS)
+    parser.add_argument('--epocas', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--tasa-aprendizaje', type=float, default=5e-4)
+    parser.add_argument('--min-eventos', type=int, default=1,
+                        help='No ajusta hasta juntar al menos esta cantidad de eventos nuevos.')
+    parser.add_argument('--intervalo', type=float, default=0,
+                        help='Segundos entre ciclos; 0 ejecuta un solo ciclo.')
+    parser.add_argument('--publicar', action='store_true',
+                        help='Publica y activa una versión nueva del registro tras cada ajuste.')
+    args = parser.parse_args()
+
+    while True:
+        usados = actualizar(args.eventos, args.epocas, args.batch_size, args.tasa_aprendizaje,
+                            args.min_eventos)
+        if usados and args.publicar:
+            registro_modelos.publicar(metadata={'origen': 'entrenamiento_incremental', 'eventos': usados})
+        if args.intervalo <= 0:
+            break
+        time.sleep(args.intervalo)
@@ -1,126 +1,434 @@
-import pandas as pd
+import argparse
+import os
 import json
-from sklearn.model_selection import train_test_split
+import time
+import shutil
+import numpy as np
+import pandas as pd
 import tensorflow as tf
+import motor_numpy
+import motor_tflite
+import datos_columnares
+import registro_modelos
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Input, Embedding, Flatten, Concatenate, Dense
 
-print("Iniciando el proceso de entrenamiento...")
+ARCHIVO_CSV = 'datos_entrenamiento.csv'
+
+# Filas que se leen de disco en cada bloque del flujo de entrenamiento.
+TAMANO_BLOQUE = 65536
+
+# Porcentaje de filas que van a validación (antes: test_size=0.2).
+PORCENTAJE_VALIDACION = 20
+
+# Checkpoint del entrenamiento en curso (pesos, optimizador y época); se
+# borra solo al terminar bien, así que si existe es que el último se cortó.
+DIRECTORIO_CHECKPOINT = 'checkpoint_entrenamiento'
 
 # --- 1. CARGAR DATOS ---
-try:
-    data = pd.read_csv('datos_entrenamiento.csv')
-except FileNotFoundError:
-    print("Error: No se encontró 'datos_entrenamiento.csv'.")
-    print("Asegúrate de ejecutar 'generar_datos.py' primero.")
-    exit()
+# Los datos nunca se cargan completos en memoria: se leen por bloques, ya
+# sea del formato columnar (generar_datos.py --formato columnas, abierto con
+# memory mapping) o del CSV con pd.read_csv(chunksize=...).
+
+def elegir_fuente(ruta_csv=None, directorio_columnas=None):
+    """
+    Una ruta dada explícitamente manda. Sin ninguna, se usan las rutas por
+    defecto y, si existen las dos, la más reciente (generar_datos.py pudo
+    haberse vuelto a ejecutar en el otro formato). Imprime la elegida.
+    """
+    if ruta_csv and not directorio_columnas:
+        fuente, motivo = {'tipo': 'csv', 'ruta': ruta_csv}, 'indicada con --csv'
+    elif directorio_columnas and not ruta_csv:
+        fuente, motivo = {'tipo': 'columnas', 'ruta': directorio_columnas}, 'indicada con --columnas'
+    else:
+        ruta_csv = ruta_csv or ARCHIVO_CSV
+        directorio_columnas = directorio_columnas or datos_columnares.DIRECTORIO_COLUMNAS
+        hay_csv = os.path.exists(ruta_csv)
+        if not datos_columnares.existe(directorio_columnas):
+            fuente, motivo = {'tipo': 'csv', 'ruta': ruta_csv}, 'no hay datos columnares'
+        elif not hay_csv:
+            fuente, motivo = {'tipo': 'columnas', 'ruta': directorio_columnas}, 'no hay CSV'
+        elif datos_columnares.fecha_modificacion(directorio_columnas) >= os.path.getmtime(ruta_csv):
+            fuente, motivo = {'tipo': 'columnas', 'ruta': directorio_columnas}, 'más reciente que el CSV'
+        else:
+            fuente, motivo = {'tipo': 'csv', 'ruta': ruta_csv}, 'más reciente que los datos columnares'
+    print(f"Fuente de datos: '{fuente['ruta']}' ({fuente['tipo']}, {motivo}).")
+    return fuente
 
-print(f"Datos cargados: {len(data)} registros.")
 
 # --- 2. PREPROCESAMIENTO Y MAPEO ---
 # La red neuronal no entiende "usuario_1" o "Programacion".
 # Necesitamos convertirlos a números enteros (IDs).
 
-# Crear los mapas (diccionarios)
-# {'usuario_1': 0, 'usuario_2': 1, ...}
-user_map = {name: i for i, name in enumerate(data['id_usuario'].unique())}
+def crear_mapas(fuente, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Devuelve (user_map, skill_map, total_filas).
+    {'usuario_1': 0, 'usuario_2': 1, ...} y {'Programacion': 0, ...},
+    numerados en orden de aparición.
+    """
+    if fuente['tipo'] == 'columnas':
+        # El vocabulario ya trae los nombres en el orden de sus ids.
+        columnas, vocabulario = datos_columnares.cargar_columnas(fuente['ruta'])
+        user_map = {name: i for i, name in enumerate(vocabulario['usuarios'])}
+        skill_map = {name: i for i, name in enumerate(vocabulario['habilidades'])}
+        return user_map, skill_map, len(columnas['resultado_correcto'])
 
-# {'Programacion': 0, 'RedesNeuronales': 1, ...}
-skill_map = {name: i for i, name in enumerate(data['habilidad'].unique())}
+    # Primera pasada sobre el CSV: solo las columnas de nombres.
+    user_map, skill_map, total_filas = {}, {}, 0
+    for bloque in pd.read_csv(fuente['ruta'], usecols=['id_usuario', 'habilidad'],
+                              chunksize=tamano_bloque):
+        for nombre in pd.unique(bloque['id_usuario']):
+            user_map.setdefault(nombre, len(user_map))
+        for nombre in pd.unique(bloque['habilidad']):
+            skill_map.setdefault(nombre, len(skill_map))
+        total_filas += len(bloque)
+    return user_map, skill_map, total_filas
 
-# Aplicar los mapas a nuestras columnas de datos
-data['user_id_num'] = data['id_usuario'].map(user_map)
-data['skill_id_num'] = data['habilidad'].map(skill_map)
 
-# Guardar estos mapas. Serán CRUCIALES para la Fase 3.
-with open('mapa_usuarios.json', 'w') as f:
-    json.dump(user_map, f)
-with open('mapa_habilidades.json', 'w') as f:
-    json.dump(skill_map, f)
+def leer_bloques(fuente, user_map, skill_map, tamano_bloque=TAMANO_BLOQUE):
+    """Genera (fila_inicial, ids_usuarios, ids_habilidades, resultados) por bloques"""
+    if fuente['tipo'] == 'columnas':
+        columnas, _ = datos_columnares.cargar_columnas(fuente['ruta'])
+        total = len(columnas['resultado_correcto'])
+        for inicio in range(0, total, tamano_bloque):
+            fin = inicio + tamano_bloque
+            yield (
+                inicio,
+                np.asarray(columnas['id_usuario'][inicio:fin], dtype=np.int32),
+                np.asarray(columnas['habilidad'][inicio:fin], dtype=np.int32),
+                np.asarray(columnas['resultado_correcto'][inicio:fin], dtype=np.float32),
+            )
+        return
+
+    categorias_usuarios = pd.Index(list(user_map))
+    categorias_habilidades = pd.Index(list(skill_map))
+    inicio = 0
+    for bloque in pd.read_csv(fuente['ruta'], chunksize=tamano_bloque):
+        yield (
+            inicio,
+            pd.Categorical(bloque['id_usuario'], categories=categorias_usuarios).codes.astype(np.int32),
+            pd.Categorical(bloque['habilidad'], categories=categorias_habilidades).codes.astype(np.int32),
+            bloque['resultado_correcto'].to_numpy(dtype=np.float32),
+        )
+        inicio += len(bloque)
 
-print("Mapas de IDs creados y guardados.")
 
 # --- 3. PREPARAR DATOS PARA EL MODELO ---
 
-# Definir entradas (X) y salida (y)
-X = data[['user_id_num', 'skill_id_num']]
-y = data['resultado_correcto']
+def mascara_validacion(filas, porcentaje=PORCENTAJE_VALIDACION):
+    """
+    Decide por número de fila si va a validación. Es un hash multiplicativo,
+    así la partición es estable entre épocas y no requiere ver todo el dataset.
+    """
+    filas = filas.astype(np.uint64)
+    return (filas * np.uint64(2654435761) % np.uint64(2 ** 32)) % np.uint64(100) < porcentaje
+
+
+def _en_lotes(usuarios, habilidades, resultados, batch_size):
+    for inicio in range(0, len(resultados), batch_size):
+        fin = inicio + batch_size
+        yield usuarios[inicio:fin], habilidades[inicio:fin], resultados[inicio:fin]
+
+
+def construir_dataset(fuente, user_map, skill_map, validacion=False, batch_size=32,
+                      buffer_mezcla=100000, tamano_bloque=TAMANO_BLOQUE, semilla=42):
+    """
+    Flujo tf.data: bloques de disco -> mezcla con buffer acotado -> lotes ->
+    formato de entrada en paralelo -> prefetch.
+    La mezcla y el corte en lotes se hacen con NumPy sobre bloques enteros,
+    así Python entrega lotes completos en lugar de filas sueltas.
+    """
+    rng = np.random.default_rng(semilla)
+
+    def generador():
+        # Una mezcla distinta cada vez que Keras recorre el dataset (cada época).
+        resto = None
+        for inicio, usuarios, habilidades, resultados in leer_bloques(
+                fuente, user_map, skill_map, tamano_bloque):
+            mascara = mascara_validacion(np.arange(inicio, inicio + len(resultados)))
+            if not validacion:
+                mascara = ~mascara
+            bloque = (usuarios[mascara], habilidades[mascara], resultados[mascara])
+
+            if validacion:
+                yield from _en_lotes(*bloque, batch_size)
+                continue
+
+            # Buffer de mezcla: lo que sobró del bloque anterior + el bloque
+            # nuevo, permutado. Se entregan los lotes que exceden el buffer y
+            # el resto se queda para mezclarse con el siguiente bloque.
+            if resto is not None:
+                bloque = tuple(np.concatenate([r, b]) for r, b in zip(resto, bloque))
+            orden = rng.permutation(len(bloque[2]))
+            bloque = tuple(columna[orden] for columna in bloque)
+            entregar = max(0, len(orden) - buffer_mezcla) // batch_size * batch_size
+            yield from _en_lotes(*(columna[:entregar] for columna in bloque), batch_size)
+            resto = tuple(columna[entregar:] for columna in bloque)
+
+        if resto is not None:
+            yield from _en_lotes(*resto, batch_size)
+
+    firma = (
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+        tf.TensorSpec(shape=(None,), dtype=tf.float32),
+    )
+    dataset = tf.data.Dataset.from_generator(generador, output_signature=firma)
+
+    # Keras necesita las entradas como una tupla, una por cada Input
+    def dar_formato(usuarios, habilidades, resultados):
+        return (usuarios, habilidades), resultados
+
+    dataset = dataset.map(dar_formato, num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
 
-# Dividir en datos de entrenamiento y validación
-X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
 
 # --- 4. CONSTRUIR LA ARQUITECTURA DEL MODELO ---
 # Usaremos "Embeddings" para crear un "perfil" vectorial para cada
 # usuario y cada habilidad.
 
-# Contar cuántos usuarios y habilidades únicos tenemos
-num_usuarios = len(user_map)
-num_habilidades = len(skill_map)
+# Hiperparámetros por defecto. entrenar() recibe un diccionario con
+# cualquiera de estas claves; las que falten toman estos valores.
+CONFIGURACION_POR_DEFECTO = {
+    'embedding_usuario': 10,    # Tamaño del vector de cada usuario.
+    'embedding_habilidad': 5,   # Tamaño del vector de cada habilidad.
+    'capas_densas': (16, 8),    # Neuronas de cada capa Dense oculta.
+    'tasa_aprendizaje': 0.001,  # La de Adam por defecto.
+    'epocas': 10,               # Cuántas veces "ve" los datos. 10-20 es un buen inicio.
+    'batch_size': 32,           # Cuántas muestras procesa a la vez.
+}
+
+
+def completar_configuracion(config=None):
+    completa = dict(CONFIGURACION_POR_DEFECTO)
+    completa.update(config or {})
+    completa['capas_densas'] = tuple(int(n) for n in completa['capas_densas'])
+    return completa
+
 
-# Tamaño de los vectores de Embedding (hiperparámetro)
-EMBEDDING_SIZE_USUARIO = 10
-EMBEDDING_SIZE_HABILIDAD = 5
+def configuracion_de_modelo(modelo):
+    """Hiperparámetros de arquitectura leídos de un modelo ya construido"""
+    densas = [capa for capa in modelo.layers if isinstance(capa, Dense)]
+    return completar_configuracion({
+        'embedding_usuario': modelo.get_layer('embedding_usuario').output_dim,
+        'embedding_habilidad': modelo.get_layer('embedding_habilidad').output_dim,
+        'capas_densas': [capa.units for capa in densas[:-1]],
+    })
 
-# --- Definición de la Red (API Funcional de Keras) ---
 
-# Entrada 1: ID del Usuario
-input_user = Input(shape=(1,), name='input_usuario')
-# Capa de Embedding para Usuarios
-embed_user = Embedding(input_dim=num_usuarios, 
-                       output_dim=EMBEDDING_SIZE_USUARIO, 
-                       name='embedding_usuario')(input_user)
-embed_user_flat = Flatten()(embed_user)
+def construir_modelo(num_usuarios, num_habilidades, config=None):
+    config = completar_configuracion(config)
 
-# Entrada 2: ID de la Habilidad
-input_skill = Input(shape=(1,), name='input_habilidad')
-# Capa de Embedding para Habilidades
-embed_skill = Embedding(input_dim=num_habilidades, 
-                        output_dim=EMBEDDING_SIZE_HABILIDAD, 
-                        name='embedding_habilidad')(input_skill)
-embed_skill_flat = Flatten()(embed_skill)
+    # --- Definición de la Red (API Funcional de Keras) ---
 
-# Concatenar los dos vectores de embedding
-concatenated = Concatenate()([embed_user_flat, embed_skill_flat])
+    # Entrada 1: ID del Usuario
+    input_user = Input(shape=(1,), name='input_usuario')
+    # Capa de Embedding para Usuarios
+    embed_user = Embedding(input_dim=num_usuarios,
+                           output_dim=config['embedding_usuario'],
+                           name='embedding_usuario')(input_user)
+    embed_user_flat = Flatten()(embed_user)
 
-# Capas Densas (la "inteligencia" que encuentra patrones)
-dense1 = Dense(16, activation='relu')(concatenated)
-dense2 = Dense(8, activation='relu')(dense1)
+    # Entrada 2: ID de la Habilidad
+    input_skill = Input(shape=(1,), name='input_habilidad')
+    # Capa de Embedding para Habilidades
+    embed_skill = Embedding(input_dim=num_habilidades,
+                            output_dim=config['embedding_habilidad'],
+                            name='embedding_habilidad')(input_skill)
+    embed_skill_flat = Flatten()(embed_skill)
 
-# Capa de Salida: 1 neurona con activación 'sigmoid'
-# Sigmoid nos da una probabilidad (un número entre 0 y 1)
-output = Dense(1, activation='sigmoid', name='output')(dense2)
+    # Concatenar los dos vectores de embedding
+    x = Concatenate()([embed_user_flat, embed_skill_flat])
 
-# Crear el modelo final
-model = Model(inputs=[input_user, input_skill], outputs=output)
+    # Capas Densas (la "inteligencia" que encuentra patrones)
+    for unidades in config['capas_densas']:
+        x = Dense(unidades, activation='relu')(x)
 
-# Compilar el modelo
-model.compile(optimizer='adam',
-              loss='binary_crossentropy', # Perfecto para predicción binaria (0 o 1)
-              metrics=['accuracy'])
+    # Capa de Salida: 1 neurona con activación 'sigmoid'
+    # Sigmoid nos da una probabilidad (un número entre 0 y 1)
+    output = Dense(1, activation='sigmoid', name='output')(x)
+
+    # Crear el modelo final
+    model = Model(inputs=[input_user, input_skill], outputs=output)
+
+    # Compilar el modelo
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=config['tasa_aprendizaje']),
+                  loss='binary_crossentropy', # Perfecto para predicción binaria (0 o 1)
+                  metrics=['accuracy'])
+    return model
 
-model.summary() # Imprime un resumen de la arquitectura
 
 # --- 5. ENTRENAR EL MODELO ---
 
-# Keras necesita las entradas como una lista, una por cada Input
-X_train_inputs = [X_train['user_id_num'], X_train['skill_id_num']]
-X_val_inputs = [X_val['user_id_num'], X_val['skill_id_num']]
+def entrenar(config, datos, callbacks=(), verbose=1):
+    """
+    Construye y entrena un modelo. `datos` es un diccionario con 'train' y
+    'val' (datasets de tf.data ya en lotes), 'num_usuarios' y 'num_habilidades'.
+    Devuelve (modelo, history, segundos de entrenamiento).
+    """
+    config = completar_configuracion(config)
+    model = construir_modelo(datos['num_usuarios'], datos['num_habilidades'], config)
+    if verbose:
+        model.summary() # Imprime un resumen de la arquitectura
+
+    inicio = time.perf_counter()
+    history = model.fit(
+        datos['train'],
+        validation_data=datos['val'],
+        epochs=config['epocas'],
+        callbacks=list(callbacks),
+        verbose=verbose
+    )
+    return model, history, time.perf_counter() - inicio
+
+
+def callbacks_entrenamiento(paciencia, directorio_checkpoint=DIRECTORIO_CHECKPOINT,
+                            frecuencia='epoch', reanudar=False):
+    """
+    Parada temprana sobre val_loss (restaura los mejores pesos) y checkpoint
+    periódico con BackupAndRestore. Sin `reanudar` se descarta un checkpoint
+    anterior; con él, fit() continúa desde esa época con el estado del optimizador.
+    """
+    callbacks = []
+    if os.path.isdir(directorio_checkpoint):
+        if reanudar:
+            print(f"Reanudando desde el checkpoint en '{directorio_checkpoint}'.")
+        else:
+            print(f"Descartando el checkpoint anterior en '{directorio_checkpoint}' (usa --reanudar para continuarlo).")
+            shutil.rmtree(directorio_checkpoint)
+    elif reanudar:
+        print(f"No hay checkpoint en '{directorio_checkpoint}': se entrena desde cero.")
+
+    callbacks.append(tf.keras.callbacks.BackupAndRestore(directorio_checkpoint, save_freq=frecuencia))
+    if paciencia > 0:
+        callbacks.append(tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=paciencia,
+                                                          restore_best_weights=True, verbose=1))
+    return callbacks
+
+
+def main(args):
+    print("Iniciando el proceso de entrenamiento...")
+
+    fuente = elegir_fuente(args.csv, args.columnas)
+    try:
+        user_map, skill_map, total_filas = crear_mapas(fuente, args.tamano_bloque)
+    except FileNotFoundError:
+        print(f"Error: No se encontró '{fuente['ruta']}'.")
+        print("Asegúrate de ejecutar 'generar_datos.py' primero.")
+        return
+
+    print(f"Datos disponibles ({fuente['tipo']}): {total_filas} registros.")
+
+    # Guardar estos mapas. Serán CRUCIALES para la Fase 3.
+    with open('mapa_usuarios.json', 'w') as f:
+        json.dump(user_map, f)
+    with open('mapa_habilidades.json', 'w') as f:
+        json.dump(skill_map, f)
+
+    print("Mapas de IDs creados y guardados.")
+
+    config = completar_configuracion({
+        'embedding_usuario': args.embedding_usuario,
+        'embedding_habilidad': args.embedding_habilidad,
+        'capas_densas': args.capas_densas,
+        'tasa_aprendizaje': args.tasa_aprendizaje,
+        'epocas': args.epocas,
+        'batch_size': args.batch_size,
+    })
+    opciones_flujo = dict(batch_size=config['batch_size'], tamano_bloque=args.tamano_bloque)
+    datos = {
+        'train': construir_dataset(fuente, user_map, skill_map, buffer_mezcla=args.buffer_mezcla,
+                                   **opciones_flujo),
+        'val': construir_dataset(fuente, user_map, skill_map, validacion=True, **opciones_flujo),
+        # Contar cuántos usuarios y habilidades únicos tenemos
+        'num_usuarios': len(user_map),
+        'num_habilidades': len(skill_map),
+    }
+
+    print("\nIniciando entrenamiento...")
+
+    callbacks = callbacks_entrenamiento(args.paciencia, args.directorio_checkpoint,
+                                        args.checkpoint_pasos or 'epoch', args.reanudar)
+    if args.perfilar:
+        # Importado aquí: solo hace falta en modo perfilado.
+        import perfilado_entrenamiento
+        perfilador = perfilado_entrenamiento.PerfiladorEntrenamiento(
+            args.batch_size, pasos_traza=args.traza_pasos, directorio_traza=args.directorio_traza
+        )
+        callbacks.append(perfilador)
+
+    model, history, duracion = entrenar(config, datos, callbacks)
+
+    historial = history.history
+    # Con parada temprana el modelo queda con los pesos de la mejor época, no de la última.
+    mejor = int(np.argmin(historial['val_loss'])) if historial.get('val_loss') else -1
+    print(f"Entrenamiento completado en {duracion:.1f}s ({len(historial.get('loss', []))} épocas).")
+
+    if args.perfilar:
+        configuracion = {k: v for k, v in vars(args).items() if not callable(v)}
+        configuracion['registros'] = int(total_filas)
+        perfilado_entrenamiento.escribir_reporte(perfilador, model, configuracion, args.reporte,
+                                                 flujo_entrada=datos['train'])
+
+    # --- 6. GUARDAR EL MODELO ---
+    # Usamos el nuevo formato .keras que es más moderno
+    model.save('modelo_tutor.keras')
+
+    print("¡Modelo guardado exitosamente como 'modelo_tutor.keras'!")
 
-print("\nIniciando entrenamiento...")
+    # --- 7. EXPORTAR PESOS PARA EL MOTOR NUMPY ---
+    # El backend sirve desde 'modelo_tutor.npz' sin importar TensorFlow.
+    motor_numpy.exportar_pesos(model, motor_numpy.ARCHIVO_PESOS_NPZ)
+    diferencia = motor_numpy.verificar_paridad(model, motor_numpy.ModeloNumpy.cargar())
+    print(f"Pesos exportados a '{motor_numpy.ARCHIVO_PESOS_NPZ}' (diferencia máxima con Keras: {diferencia:.2e}).")
 
-history = model.fit(
-    X_train_inputs,
-    y_train,
-    validation_data=(X_val_inputs, y_val),
-    epochs=10,        # Cuántas veces "ve" los datos. 10-20 es un buen inicio.
-    batch_size=32,    # Cuántas muestras procesa a la vez.
-    verbose=1
-)
+    # Artefacto liviano para servir en CPU con MOTOR_INFERENCIA=tflite.
+    if args.tflite:
+        motor_tflite.exportar_y_verificar(ruta_tflite=motor_tflite.ARCHIVO_TFLITE, modelo_keras=model)
 
-print("Entrenamiento completado.")
+    # --- 8. PUBLICAR EN EL REGISTRO DE VERSIONES ---
+    # El backend la toma con POST /api/modelo/recargar (o solo, con VIGILAR_REGISTRO).
+    if args.publicar:
+        registro_modelos.publicar(metadata={
+            'origen': 'entrenar_modelo',
+            'configuracion': {k: list(v) if isinstance(v, tuple) else v for k, v in config.items()},
+            'registros': int(total_filas),
+            'metricas': {k: float(v[mejor]) for k, v in historial.items()},
+        })
+    return history
 
-# --- 6. GUARDAR EL MODELO ---
-# Usamos el nuevo formato .keras que es más moderno
-model.save('modelo_tutor.keras')
 
-print("¡Modelo guardado exitosamente como 'modelo_tutor.keras'!")
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Entrena el modelo del tutor.')
+    parser.add_argument('--csv', help=f"CSV de entrenamiento (por defecto '{ARCHIVO_CSV}').")
+    parser.add_argument('--columnas', help=f"Directorio columnar (por defecto '{datos_columnares.DIRECTORIO_COLUMNAS}'). "
+                                           "Sin ninguno de los dos se usa el más reciente.")
+    parser.add_argument('--epocas', type=int, default=CONFIGURACION_POR_DEFECTO['epocas'])
+    parser.add_argument('--batch-size', type=int, default=CONFIGURACION_POR_DEFECTO['batch_size'],
+                        help='Muestras por lote; con datasets grandes conviene usar miles.')
+    parser.add_argument('--embedding-usuario', type=int, default=CONFIGURACION_POR_DEFECTO['embedding_usuario'])
+    parser.add_argument('--embedding-habilidad', type=int, default=CONFIGURACION_POR_DEFECTO['embedding_habilidad'])
+    parser.add_argument('--capas-densas', type=int, nargs='+', default=CONFIGURACION_POR_DEFECTO['capas_densas'],
+                        help='Neuronas de cada capa oculta, por ejemplo: --capas-densas 32 16')
+    parser.add_argument('--tasa-aprendizaje', type=float, default=CONFIGURACION_POR_DEFECTO['tasa_aprendizaje'])
+    parser.add_argument('--paciencia', type=int, default=3,
+                        help='Épocas sin mejorar val_loss antes de parar (0 la desactiva).')
+    parser.add_argument('--directorio-checkpoint', default=DIRECTORIO_CHECKPOINT)
+    parser.add_argument('--checkpoint-pasos', type=int,
+                        help='Guarda el checkpoint cada N lotes en lugar de al final de cada época.')
+    parser.add_argument('--reanudar', action='store_true',
+                        help='Continúa un entrenamiento cortado desde su último checkpoint.')
+    parser.add_argument('--buffer-mezcla', type=int, default=100000,
+                        help='Filas en el buffer de mezcla (acota la memoria).')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    parser.add_argument('--perfilar', action='store_true',
+                        help='Mide tiempos por época, espera por datos y memoria, y escribe un reporte JSON.')
+    parser.add_argument('--traza-pasos', type=int, nargs=2, metavar=('INICIO', 'FIN'),
+                        help='Con --perfilar, captura una traza del profiler entre estos pasos.')
+    parser.add_argument('--directorio-traza', default='trazas_entrenamiento')
+    parser.add_argument('--reporte', default='reporte_entrenamiento.json')
+    parser.add_argument('--tflite', action='store_true',
+                        help=f"Exporta también '{motor_tflite.ARCHIVO_TFLITE}' para servir con MOTOR_INFERENCIA=tflite.")
+    parser.add_argument('--publicar', action='store_true',
+                        help='Publica el modelo entrenado como versión nueva del registro y la activa.')
+    main(parser.parse_args())
@@ -1,12 +1,15 @@
 import json
-import random
-import csv
+import argparse
+import numpy as np
+import datos_columnares
 
 # --- 1. CONFIGURACIÓN DE LA SIMULACIÓN ---
 NUM_USUARIOS_SINTETICOS = 200  # ¿Cuántos estudiantes ficticios creamos?
 PREGUNTAS_POR_USUARIO = 40    # ¿Cuántas preguntas responderá cada uno?
 ARCHIVO_SALIDA = 'datos_entrenamiento.csv'
+DIRECTORIO_SALIDA_COLUMNAS = datos_columnares.DIRECTORIO_COLUMNAS
 ARCHIVO_PREGUNTAS = 'preguntas.json'
+USUARIOS_POR_BLOQUE = 25000   # Usuarios simulados por bloque (acota la memoria)
 
 # --- 2. DEFINICIÓN DE "ARQUETIPOS" DE ESTUDIANTES ---
 # Definimos perfiles de conocimiento. 
@@ -59,67 +62,132 @@ def cargar_preguntas():
         return None, None
 
 # --- 4. FUNCIÓN PRINCIPAL DE SIMULACIÓN ---
-def generar_datos():
+# Todo se simula con arreglos de NumPy: arquetipos por usuario, preguntas
+# por respuesta y aciertos como Bernoulli en bloque. Se trabaja por bloques
+# de usuarios para que la memoria no crezca con el tamaño del dataset.
+def simular_bloque(rng, num_usuarios, habilidades_preguntas, matriz_probs, preguntas_por_usuario):
+    # 1. Asignar un arquetipo al azar a cada usuario del bloque
+    arquetipos = rng.integers(0, matriz_probs.shape[0], size=num_usuarios)
+
+    # 2. Elegir al azar las preguntas de todas las respuestas del bloque
+    total = num_usuarios * preguntas_por_usuario
+    indices_preguntas = rng.integers(0, len(habilidades_preguntas), size=total)
+    indices_habilidad = habilidades_preguntas[indices_preguntas]
+
+    # 3. Probabilidad base de cada respuesta según el arquetipo de su usuario
+    arquetipo_por_respuesta = np.repeat(arquetipos, preguntas_por_usuario)
+    prob_base_acierto = matriz_probs[arquetipo_por_respuesta, indices_habilidad]
+
+    # 4. Decidir si acierta o no: acierta si el número es MENOR que su probabilidad
+    resultado_correcto = (rng.random(total) < prob_base_acierto).astype(np.int8)
+
+    return indices_preguntas, resultado_correcto
+
+
+def generar_datos(num_usuarios=NUM_USUARIOS_SINTETICOS, preguntas_por_usuario=PREGUNTAS_POR_USUARIO,
+                  archivo_salida=ARCHIVO_SALIDA, semilla=None, usuarios_por_bloque=USUARIOS_POR_BLOQUE,
+                  formato='csv', directorio_columnas=DIRECTORIO_SALIDA_COLUMNAS):
+    # formato: 'csv', 'columnas' (un .npy por columna, ver datos_columnares.py) o 'ambos'
     mapa_preguntas, lista_ids = cargar_preguntas()
     
     if mapa_preguntas is None:
         return
 
-    # Lista para guardar todas las filas de nuestro futuro CSV
-    datos_para_csv = []
-    
-    # Lista de nombres de arquetipos para elegir al azar
-    lista_arquetipos = list(ARQUETIPOS.keys())
+    # Tablas de consulta: habilidades en orden de aparición y una matriz
+    # arquetipo x habilidad con la probabilidad base de acierto.
+    # Usamos .get() por si alguna habilidad del JSON no está en el arquetipo (0.5 de default)
+    lista_habilidades = list(dict.fromkeys(mapa_preguntas.values()))
+    indice_habilidad = {h: i for i, h in enumerate(lista_habilidades)}
+    ids_preguntas = np.array(lista_ids)
+    habilidades_preguntas = np.array([indice_habilidad[mapa_preguntas[i]] for i in lista_ids])
+    matriz_probs = np.array([
+        [perfil.get(h, 0.5) for h in lista_habilidades]
+        for perfil in ARQUETIPOS.values()
+    ])
+    # Texto final de cada fila salvo el usuario, por (pregunta, resultado).
+    sufijos = np.array([
+        f'{id_pregunta},{mapa_preguntas[id_pregunta]},{resultado}\n'
+        for id_pregunta in lista_ids
+        for resultado in (0, 1)
+    ], dtype=object)
 
-    print(f"Iniciando simulación para {NUM_USUARIOS_SINTETICOS} usuarios...")
+    escribir_csv = formato in ('csv', 'ambos')
+    escribir_columnas = formato in ('columnas', 'ambos')
 
-    # Bucle principal: 1 por cada usuario sintético
-    for i in range(NUM_USUARIOS_SINTETICOS):
-        id_usuario = f'usuario_{i+1}'
-        
-        # 1. Asignar un arquetipo al azar a este usuario
-        arquetipo_nombre = random.choice(lista_arquetipos)
-        perfil_usuario = ARQUETIPOS[arquetipo_nombre]
-        
-        # 2. Bucle de respuestas: Simular que responde N preguntas
-        for _ in range(PREGUNTAS_POR_USUARIO):
-            # 3. Elegir una pregunta al azar
-            id_pregunta_aleatoria = random.choice(lista_ids)
-            habilidad_pregunta = mapa_preguntas[id_pregunta_aleatoria]
-            
-            # 4. Obtener la probabilidad de acierto base del usuario
-            # Usamos .get() por si alguna habilidad del JSON no está en el arquetipo
-            prob_base_acierto = perfil_usuario.get(habilidad_pregunta, 0.5) # 0.5 de default
-            
-            # 5. Decidir si acierta o no
-            # random.random() da un número entre 0.0 y 1.0
-            # Si el número es MENOR que su probabilidad, acierta.
-            resultado_correcto = 1 if random.random() < prob_base_acierto else 0
-            
-            # 6. Guardar la fila de datos
-            datos_para_csv.append([
-                id_usuario,
-                id_pregunta_aleatoria,
-                habilidad_pregunta,
-                resultado_correcto
-            ])
-            
-    print(f"Simulación completa. Se generaron {len(datos_para_csv)} registros.")
-    
-    # --- 5. GUARDAR EN CSV ---
+    rng = np.random.default_rng(semilla)
+
+    print(f"Iniciando simulación para {num_usuarios} usuarios...")
+
+    # --- 5. GUARDAR EN CSV Y/O COLUMNAS (POR BLOQUES) ---
+    total_registros = 0
+    archivo_csv = None
     try:
-        with open(ARCHIVO_SALIDA, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
+        if escribir_csv:
+            archivo_csv = open(archivo_salida, 'w', newline='', encoding='utf-8')
             # Escribir la fila de encabezado (header)
-            writer.writerow(['id_usuario', 'id_pregunta', 'habilidad', 'resultado_correcto'])
-            # Escribir todos los datos generados
-            writer.writerows(datos_para_csv)
-            
-        print(f"¡Éxito! Datos sintéticos guardados en {ARCHIVO_SALIDA}")
+            archivo_csv.write('id_usuario,id_pregunta,habilidad,resultado_correcto\n')
+        if escribir_columnas:
+            escritor = datos_columnares.EscritorColumnas(
+                directorio_columnas, num_usuarios * preguntas_por_usuario
+            )
+
+        for inicio in range(0, num_usuarios, usuarios_por_bloque):
+            tamano = min(usuarios_por_bloque, num_usuarios - inicio)
+            preguntas, resultados = simular_bloque(
+                rng, tamano, habilidades_preguntas, matriz_probs, preguntas_por_usuario
+            )
+            if escribir_csv:
+                # Cada fila es "usuario_N," + el sufijo precalculado de su
+                # combinación (pregunta, resultado): una sola suma de cadenas.
+                prefijos = np.array(
+                    [f'usuario_{n},' for n in range(inicio + 1, inicio + tamano + 1)], dtype=object
+                )
+                filas = np.repeat(prefijos, preguntas_por_usuario) + sufijos[preguntas * 2 + resultados]
+                archivo_csv.write(''.join(filas))
+            if escribir_columnas:
+                # El id numérico del usuario es su posición: 'usuario_1' -> 0.
+                escritor.escribir_bloque(
+                    id_usuario=np.repeat(np.arange(inicio, inicio + tamano), preguntas_por_usuario),
+                    id_pregunta=ids_preguntas[preguntas],
+                    habilidad=habilidades_preguntas[preguntas],
+                    resultado_correcto=resultados
+                )
+            total_registros += len(preguntas)
+
+        if archivo_csv is not None:
+            archivo_csv.close()
+        if escribir_columnas:
+            escritor.cerrar(
+                [f'usuario_{n}' for n in range(1, num_usuarios + 1)], lista_habilidades
+            )
+
+        print(f"Simulación completa. Se generaron {total_registros} registros.")
+        if escribir_csv:
+            print(f"¡Éxito! Datos sintéticos guardados en {archivo_salida}")
+        if escribir_columnas:
+            print(f"¡Éxito! Columnas binarias guardadas en {directorio_columnas}/")
         
     except IOError:
-        print(f"Error: No se pudo escribir en el archivo {ARCHIVO_SALIDA}")
+        print(f"Error: No se pudo escribir la salida ({archivo_salida} / {directorio_columnas})")
 
 # --- 6. EJECUTAR EL SCRIPT ---
 if __name__ == '__main__':
-    generar_datos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos de entrenamiento.')
+    parser.add_argument('--usuarios', type=int, default=NUM_USUARIOS_SINTETICOS)
+    parser.add_argument('--preguntas-por-usuario', type=int, default=PREGUNTAS_POR_USUARIO)
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA)
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--usuarios-por-bloque', type=int, default=USUARIOS_POR_BLOQUE)
+    parser.add_argument('--formato', choices=['csv', 'columnas', 'ambos'], default='csv')
+    parser.add_argument('--directorio-columnas', default=DIRECTORIO_SALIDA_COLUMNAS)
+    args = parser.parse_args()
+
+    generar_datos(
+        num_usuarios=args.usuarios,
+        preguntas_por_usuario=args.preguntas_por_usuario,
+        archivo_salida=args.salida,
+        semilla=args.semilla,
+        usuarios_por_bloque=args.usuarios_por_bloque,
+        formato=args.formato,
+        directorio_columnas=args.directorio_columnas
+    )
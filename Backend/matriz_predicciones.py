@@ -0,0 +1,83 @@
+"""
+=============================================================================
+MATRIZ DE PREDICCIONES PRECALCULADA
+Guarda la probabilidad de acierto de todos los pares (usuario, habilidad)
+en un .npy junto al modelo, validado con la huella SHA-256 del modelo
+=============================================================================
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+ARCHIVO_MATRIZ = 'matriz_predicciones.npy'
+ARCHIVO_META = 'matriz_predicciones.json'
+
+# Pares por llamada a predict al construir la matriz.
+TAMANO_LOTE = 65536
+
+
+def huella_archivo(ruta):
+    """SHA-256 del archivo, leído por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def calcular_matriz(modelo, num_usuarios, num_habilidades):
+    """Puntúa la rejilla completa usuarios x habilidades por lotes grandes"""
+    ids_usuarios = np.repeat(np.arange(num_usuarios, dtype=np.int32), num_habilidades)
+    ids_habilidades = np.tile(np.arange(num_habilidades, dtype=np.int32), num_usuarios)
+    probs = np.empty(len(ids_usuarios), dtype=np.float32)
+    for inicio in range(0, len(ids_usuarios), TAMANO_LOTE):
+        fin = inicio + TAMANO_LOTE
+        probs[inicio:fin] = modelo.predict(
+            [ids_usuarios[inicio:fin], ids_habilidades[inicio:fin]],
+            batch_size=min(fin - inicio, TAMANO_LOTE),
+            verbose=0
+        ).reshape(-1)
+    return probs.reshape(num_usuarios, num_habilidades)
+
+
+def _leer_meta(ruta_meta):
+    try:
+        with open(ruta_meta, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def cargar_o_construir(modelo, ruta_modelo, num_usuarios, num_habilidades,
+                       ruta_matriz=ARCHIVO_MATRIZ, ruta_meta=ARCHIVO_META):
+    """
+    Devuelve la matriz (memory-mapped) si su huella coincide con el modelo;
+    si no, la recalcula con el modelo ya cargado y la guarda.
+    """
+    huella = huella_archivo(ruta_modelo)
+    forma = [num_usuarios, num_habilidades]
+
+    meta = _leer_meta(ruta_meta)
+    vigente = (
+        meta is not None and
+        meta.get('huella_modelo') == huella and
+        meta.get('forma') == forma and
+        os.path.exists(ruta_matriz)
+    )
+    if vigente:
+        return np.load(ruta_matriz, mmap_mode='r'), False
+
+    matriz = calcular_matriz(modelo, num_usuarios, num_habilidades)
+
+    # Escritura atómica: otro proceso nunca ve una matriz a medias.
+    # np.save añade '.npy' si falta, por eso el temporal ya lo lleva.
+    temporal = ruta_matriz + '.tmp.npy'
+    np.save(temporal, matriz)
+    os.replace(temporal, ruta_matriz)
+    with open(ruta_meta + '.tmp', 'w') as f:
+        json.dump({'huella_modelo': huella, 'forma': forma}, f)
+    os.replace(ruta_meta + '.tmp', ruta_meta)
+
+    return np.load(ruta_matriz, mmap_mode='r'), True
@@ -0,0 +1,163 @@
+"""
+=============================================================================
+MÉTRICAS EN FORMATO PROMETHEUS
+Contadores, histogramas y medidores mínimos, sin dependencias, que se
+exponen en el formato de texto de Prometheus (GET /metrics)
+=============================================================================
+"""
+
+import bisect
+import threading
+
+# Límites por defecto en segundos: de 100 µs a 10 s.
+LIMITES_LATENCIA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _etiquetas_texto(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ''
+    escapar = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{n}="{escapar(v)}"' for n, v in pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas):
+        return tuple(etiquetas[n] for n in self.etiquetas)
+
+    def encabezado(self):
+        return [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (peticiones, errores...)"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores = {}
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def exponer(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        return self.encabezado() + [
+            f'{self.nombre}{_etiquetas_texto(self.etiquetas, clave)} {_numero(v)}' for clave, v in valores
+        ]
+
+
+class Histograma(_Metrica):
+    """Distribución de observaciones en cubetas acumuladas, con suma y cuenta"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+        # clave -> [cuentas por cubeta (la última es +Inf), suma]
+        self._series = {}
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exponer(self):
+        with self._lock:
+            series = [(clave, list(cuentas), suma) for clave, (cuentas, suma) in self._series.items()]
+        lineas = self.encabezado()
+        for clave, cuentas, suma in series:
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + (float('inf'),), cuentas):
+                acumulado += cuenta
+                etiquetas = _etiquetas_texto(self.etiquetas, clave, [('le', _numero(limite))])
+                lineas.append(f'{self.nombre}_bucket{etiquetas} {acumulado}')
+            etiquetas = _etiquetas_texto(self.etiquetas, clave)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {acumulado}')
+        return lineas
+
+
+class Medidor(_Metrica):
+    """
+    Valor que sube y baja. Si se da `funcion`, se llama al exponer y debe
+    devolver un número o un diccionario {tupla_de_etiquetas: número}.
+    """
+
+    tipo = 'gauge'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), funcion=None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._funcion = funcion
+        self._valores = {}
+
+    def fijar(self, valor, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+    def exponer(self):
+        if self._funcion is not None:
+            valores = self._funcion()
+            if not isinstance(valores, dict):
+                valores = {(): valores}
+            valores = list(valores.items())
+        else:
+            with self._lock:
+                valores = list(self._valores.items())
+        return self.encabezado() + [
+            f'{self.nombre}{_etiquetas_texto(self.etiquetas, clave)} {_numero(v)}' for clave, v in valores
+        ]
+
+
+class RegistroMetricas:
+    """Conjunto de métricas de la aplicación"""
+
+    def __init__(self):
+        self._metricas = []
+
+    def _agregar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._agregar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), limites=LIMITES_LATENCIA):
+        return self._agregar(Histograma(nombre, ayuda, etiquetas, limites))
+
+    def medidor(self, nombre, ayuda, etiquetas=(), funcion=None):
+        return self._agregar(Medidor(nombre, ayuda, etiquetas, funcion))
+
+    def exponer(self):
+        """Todas las métricas en el formato de texto de Prometheus"""
+        lineas = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
@@ -0,0 +1,102 @@
+"""
+=============================================================================
+MONTÍCULO INDEXADO
+Min-heap binario con un índice clave -> posición: cambiar la prioridad de
+una clave, quitarla o consultar la mínima cuesta O(log n) u O(1), sin
+reordenar todo. Se usa para elegir la habilidad más débil de cada sesión.
+=============================================================================
+"""
+
+
+class MonticuloIndexado:
+    """Claves únicas (hashables) con prioridad numérica; la raíz es la mínima"""
+
+    __slots__ = ('_claves', '_prioridades', '_posiciones')
+
+    def __init__(self, pares=()):
+        """`pares` es un iterable de (clave, prioridad); se ordena en O(n)"""
+        self._claves = []
+        self._prioridades = []
+        self._posiciones = {}
+        for clave, prioridad in pares:
+            self._posiciones[clave] = len(self._claves)
+            self._claves.append(clave)
+            self._prioridades.append(prioridad)
+        for i in range(len(self._claves) // 2 - 1, -1, -1):
+            self._bajar(i)
+
+    def __len__(self):
+        return len(self._claves)
+
+    def __contains__(self, clave):
+        return clave in self._posiciones
+
+    def prioridad(self, clave):
+        return self._prioridades[self._posiciones[clave]]
+
+    def minimo(self):
+        """(clave, prioridad) de la raíz, o None si está vacío"""
+        if not self._claves:
+            return None
+        return self._claves[0], self._prioridades[0]
+
+    def fijar(self, clave, prioridad):
+        """Inserta la clave o cambia su prioridad"""
+        posicion = self._posiciones.get(clave)
+        if posicion is None:
+            self._posiciones[clave] = len(self._claves)
+            self._claves.append(clave)
+            self._prioridades.append(prioridad)
+            self._subir(len(self._claves) - 1)
+            return
+        anterior = self._prioridades[posicion]
+        self._prioridades[posicion] = prioridad
+        if prioridad < anterior:
+            self._subir(posicion)
+        else:
+            self._bajar(posicion)
+
+    def quitar(self, clave):
+        """Saca la clave si está; devuelve True si estaba"""
+        posicion = self._posiciones.pop(clave, None)
+        if posicion is None:
+            return False
+        ultima_clave = self._claves.pop()
+        ultima_prioridad = self._prioridades.pop()
+        if posicion < len(self._claves):
+            # El último elemento ocupa el hueco y se reubica.
+            self._claves[posicion] = ultima_clave
+            self._prioridades[posicion] = ultima_prioridad
+            self._posiciones[ultima_clave] = posicion
+            self._subir(posicion)
+            self._bajar(self._posiciones[ultima_clave])
+        return True
+
+    def _intercambiar(self, i, j):
+        claves, prioridades = self._claves, self._prioridades
+        claves[i], claves[j] = claves[j], claves[i]
+        prioridades[i], prioridades[j] = prioridades[j], prioridades[i]
+        self._posiciones[claves[i]] = i
+        self._posiciones[claves[j]] = j
+
+    def _subir(self, i):
+        prioridades = self._prioridades
+        while i > 0:
+            padre = (i - 1) // 2
+            if prioridades[i] >= prioridades[padre]:
+                break
+            self._intercambiar(i, padre)
+            i = padre
+
+    def _bajar(self, i):
+        prioridades = self._prioridades
+        n = len(prioridades)
+        while True:
+            menor = i
+            for hijo in (2 * i + 1, 2 * i + 2):
+                if hijo < n and prioridades[hijo] < prioridades[menor]:
+                    menor = hijo
+            if menor == i:
+                return
+            self._intercambiar(i, menor)
+            i = menor
@@ -1,33 +1,33 @@
-_from tensorflow import keras
-import os
+from motor_numpy import cargar_motor
 
 print("="*60)
 print("  VISUALIZACIÓN DEL MODELO DE RED NEURONAL")
 print("="*60)
 
-# Cargar modelo
-modelo = keras.models.load_model('modelo_tutor.keras')
+# Cargar modelo (motor NumPy, sin TensorFlow)
+modelo = cargar_motor()
 
 print("\n🏗️  ARQUITECTURA DEL MODELO:\n")
-modelo.summary()
+modelo.resumen()
 
 print("\n📊 INFORMACIÓN DETALLADA:\n")
-print(f"Total de capas: {len(modelo.layers)}")
+capas = modelo.describir_capas()
+print(f"Total de capas: {len(capas)}")
 print(f"Parámetros entrenables: {modelo.count_params():,}")
 
 print("\n🔍 DETALLE DE CADA CAPA:\n")
-for i, layer in enumerate(modelo.layers, 1):
-    print(f"Capa {i}: {layer.name}")
-    print(f"  • Tipo: {type(layer).__name__}")
-    print(f"  • Output shape: {layer.output_shape}")
+for i, capa in enumerate(capas, 1):
+    print(f"Capa {i}: {capa['nombre']}")
+    print(f"  • Tipo: {capa['tipo']}")
+    print(f"  • Output shape: {capa['salida']}")
     
-    if hasattr(layer, 'activation'):
-        print(f"  • Activación: {layer.activation.__name__}")
+    if 'activacion' in capa:
+        print(f"  • Activación: {capa['activacion']}")
     
-    if hasattr(layer, 'units'):
-        print(f"  • Neuronas: {layer.units}")
+    if 'unidades' in capa:
+        print(f"  • Neuronas: {capa['unidades']}")
     
     print()
 
 print("\n✅ Visualización completada")
-print("="*60)
\ No newline at end of file
+print("="*60)
@@ -0,0 +1,244 @@
+"""
+=============================================================================
+MOTOR DE INFERENCIA EN NUMPY
+Exporta los pesos de modelo_tutor.keras a un .npz y predice sin TensorFlow
+=============================================================================
+"""
+
+import os
+import numpy as np
+
+ARCHIVO_MODELO_KERAS = 'modelo_tutor.keras'
+ARCHIVO_PESOS_NPZ = 'modelo_tutor.npz'
+
+# Diferencia máxima aceptada entre Keras y NumPy en la comprobación de paridad.
+TOLERANCIA_PARIDAD = 1e-5
+
+ACTIVACIONES = {
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'linear': lambda x: x,
+}
+
+
+class ModeloNumpy:
+    """Réplica en NumPy de la red: dos Embeddings, Concatenate y capas Dense."""
+
+    def __init__(self, embedding_usuario, embedding_habilidad, capas):
+        self.embedding_usuario = embedding_usuario
+        self.embedding_habilidad = embedding_habilidad
+        # Lista de tuplas (nombre, kernel, bias, activacion) en orden de ejecución.
+        self.capas = capas
+
+    @classmethod
+    def cargar(cls, ruta=ARCHIVO_PESOS_NPZ):
+        """Carga los pesos exportados por exportar_pesos()"""
+        with np.load(ruta) as datos:
+            nombres = [str(n) for n in datos['nombres_densas']]
+            activaciones = [str(a) for a in datos['activaciones']]
+            capas = [
+                (nombre, datos[f'{nombre}_kernel'], datos[f'{nombre}_bias'], activacion)
+                for nombre, activacion in zip(nombres, activaciones)
+            ]
+            return cls(datos['embedding_usuario'], datos['embedding_habilidad'], capas)
+
+    @property
+    def num_usuarios(self):
+        return self.embedding_usuario.shape[0]
+
+    @property
+    def num_habilidades(self):
+        return self.embedding_habilidad.shape[0]
+
+    def predecir(self, ids_usuarios, ids_habilidades):
+        """Devuelve un vector con la probabilidad de acierto de cada par (usuario, habilidad)"""
+        ids_usuarios = np.asarray(ids_usuarios, dtype=np.int64).reshape(-1)
+        ids_habilidades = np.asarray(ids_habilidades, dtype=np.int64).reshape(-1)
+        x = np.concatenate([
+            self.embedding_usuario[ids_usuarios],
+            self.embedding_habilidad[ids_habilidades]
+        ], axis=1)
+        for _, kernel, bias, activacion in self.capas:
+            x = ACTIVACIONES[activacion](x @ kernel + bias)
+        return x.reshape(-1)
+
+    # --- Arranque en frío: usuarios sin fila en embedding_usuario ---
+
+    def embedding_inicial(self):
+        """Embedding de partida para un usuario nuevo: la media de la tabla"""
+        return self.embedding_usuario.mean(axis=0)
+
+    def _propagar(self, embedding, ids_habilidades):
+        ids_habilidades = np.asarray(ids_habilidades, dtype=np.int64).reshape(-1)
+        x = np.concatenate([
+            np.broadcast_to(embedding, (len(ids_habilidades), len(embedding))),
+            self.embedding_habilidad[ids_habilidades]
+        ], axis=1)
+        activaciones = [x]
+        for _, kernel, bias, activacion in self.capas:
+            x = ACTIVACIONES[activacion](x @ kernel + bias)
+            activaciones.append(x)
+        return activaciones
+
+    def predecir_con_embedding(self, embedding, ids_habilidades):
+        """Como predecir(), pero con un vector de usuario dado en lugar de un id"""
+        return self._propagar(embedding, ids_habilidades)[-1].reshape(-1)
+
+    def ajustar_embedding(self, ids_habilidades, resultados, embedding=None, previo=None, pasos=50,
+                          tasa=0.5, paso_maximo=0.5):
+        """
+        Ajusta solo el vector del usuario a sus respuestas con unos pasos de
+        descenso de gradiente. Es una estimación MAP: entropía cruzada sumada
+        sobre las respuestas más un prior normal centrado en `previo` (por
+        defecto la media de la tabla) con la varianza de la tabla en cada
+        dimensión, así una sola respuesta pesa como una observación frente a
+        toda la población. Cada paso se escala por esa varianza y su norma,
+        medida en desviaciones típicas, no pasa de `paso_maximo`.
+        Parte de `embedding` (por defecto, de `previo`). Los pesos del modelo
+        no cambian; cuesta microsegundos por paso.
+        """
+        if self.capas[-1][3] != 'sigmoid':
+            raise ValueError("El ajuste en frío requiere una salida sigmoid.")
+        previo = (self.embedding_inicial() if previo is None else previo).astype(np.float64)
+        embedding = (previo if embedding is None else embedding).astype(np.float64).copy()
+        resultados = np.asarray(resultados, dtype=np.float64).reshape(-1)
+        if len(resultados) == 0:
+            return embedding
+        dim_usuario = len(embedding)
+        varianza = self.embedding_usuario.var(axis=0) + 1e-6
+        desviacion = np.sqrt(varianza)
+
+        for _ in range(pasos):
+            activaciones = self._propagar(embedding, ids_habilidades)
+            # Derivada de la entropía cruzada respecto a la entrada del sigmoid.
+            delta = activaciones[-1].reshape(-1, 1) - resultados.reshape(-1, 1)
+            for i in range(len(self.capas) - 1, -1, -1):
+                kernel = self.capas[i][1]
+                delta = delta @ kernel.T
+                if i > 0:
+                    activacion_previa = self.capas[i - 1][3]
+                    if activacion_previa == 'relu':
+                        delta = delta * (activaciones[i] > 0)
+                    elif activacion_previa == 'sigmoid':
+                        delta = delta * activaciones[i] * (1 - activaciones[i])
+            gradiente = delta[:, :dim_usuario].sum(axis=0) + (embedding - previo) / varianza
+            paso = tasa * varianza * gradiente
+            norma = np.linalg.norm(paso / desviacion)
+            if norma > paso_maximo:
+                paso *= paso_maximo / norma
+            embedding -= paso
+        return embedding
+
+    def predict(self, entradas, batch_size=None, verbose=0):
+        """Misma firma que keras.Model.predict: [usuarios, habilidades] -> (n, 1)"""
+        ids_usuarios, ids_habilidades = entradas
+        return self.predecir(ids_usuarios, ids_habilidades).reshape(-1, 1)
+
+    def describir_capas(self):
+        """Lista de diccionarios con la descripción de cada capa del modelo"""
+        dim_usuario = self.embedding_usuario.shape[1]
+        dim_habilidad = self.embedding_habilidad.shape[1]
+        capas = [
+            {'nombre': 'embedding_usuario', 'tipo': 'Embedding',
+             'salida': (None, dim_usuario), 'parametros': self.embedding_usuario.size},
+            {'nombre': 'embedding_habilidad', 'tipo': 'Embedding',
+             'salida': (None, dim_habilidad), 'parametros': self.embedding_habilidad.size},
+            {'nombre': 'concatenate', 'tipo': 'Concatenate',
+             'salida': (None, dim_usuario + dim_habilidad), 'parametros': 0},
+        ]
+        for nombre, kernel, bias, activacion in self.capas:
+            capas.append({
+                'nombre': nombre, 'tipo': 'Dense', 'salida': (None, kernel.shape[1]),
+                'activacion': activacion, 'unidades': kernel.shape[1],
+                'parametros': kernel.size + bias.size
+            })
+        return capas
+
+    def count_params(self):
+        return sum(capa['parametros'] for capa in self.describir_capas())
+
+    def resumen(self):
+        """Imprime un resumen de la arquitectura al estilo de model.summary()"""
+        print(f"{'Capa (tipo)':<36}{'Salida':<16}{'Parámetros':>12}")
+        print("-" * 64)
+        for capa in self.describir_capas():
+            etiqueta = f"{capa['nombre']} ({capa['tipo']})"
+            print(f"{etiqueta:<36}{str(capa['salida']):<16}{capa['parametros']:>12,}")
+        print("-" * 64)
+        print(f"Total de parámetros: {self.count_params():,}")
+
+
+def exportar_pesos(modelo_keras, ruta=ARCHIVO_PESOS_NPZ):
+    """Escribe los pesos de las capas del modelo Keras en un .npz comprimido"""
+    pesos = {}
+    nombres_densas = []
+    activaciones = []
+    for capa in modelo_keras.layers:
+        tipo = type(capa).__name__
+        if tipo == 'Embedding':
+            pesos[capa.name] = capa.get_weights()[0].astype(np.float32)
+        elif tipo == 'Dense':
+            kernel, bias = capa.get_weights()
+            pesos[f'{capa.name}_kernel'] = kernel.astype(np.float32)
+            pesos[f'{capa.name}_bias'] = bias.astype(np.float32)
+            nombres_densas.append(capa.name)
+            activaciones.append(capa.activation.__name__)
+
+    if 'embedding_usuario' not in pesos or 'embedding_habilidad' not in pesos:
+        raise ValueError("El modelo no tiene las capas 'embedding_usuario' y 'embedding_habilidad'.")
+
+    np.savez_compressed(
+        ruta,
+        nombres_densas=np.array(nombres_densas),
+        activaciones=np.array(activaciones),
+        **pesos
+    )
+    return ruta
+
+
+def verificar_paridad(modelo_keras, modelo_numpy, tolerancia=TOLERANCIA_PARIDAD):
+    """Compara ambos modelos sobre todas las combinaciones (usuario, habilidad)"""
+    ids_usuarios = np.repeat(np.arange(modelo_numpy.num_usuarios), modelo_numpy.num_habilidades)
+    ids_habilidades = np.tile(np.arange(modelo_numpy.num_habilidades), modelo_numpy.num_usuarios)
+    esperado = modelo_keras.predict(
+        [ids_usuarios, ids_habilidades], batch_size=len(ids_usuarios), verbose=0
+    ).reshape(-1)
+    obtenido = modelo_numpy.predecir(ids_usuarios, ids_habilidades)
+    diferencia = float(np.max(np.abs(esperado - obtenido)))
+    if diferencia > tolerancia:
+        raise ValueError(
+            f"Paridad fallida: diferencia máxima {diferencia:.2e} > {tolerancia:.0e}"
+        )
+    return diferencia
+
+
+def exportar_y_verificar(ruta_keras=ARCHIVO_MODELO_KERAS, ruta_npz=ARCHIVO_PESOS_NPZ):
+    """Carga el .keras (importa TensorFlow), exporta el .npz y comprueba la paridad"""
+    import tensorflow as tf
+    modelo_keras = tf.keras.models.load_model(ruta_keras)
+    exportar_pesos(modelo_keras, ruta_npz)
+    diferencia = verificar_paridad(modelo_keras, ModeloNumpy.cargar(ruta_npz))
+    print(f"Pesos exportados a '{ruta_npz}' (diferencia máxima con Keras: {diferencia:.2e}).")
+    return ruta_npz
+
+
+def cargar_motor(ruta_npz=ARCHIVO_PESOS_NPZ, ruta_keras=ARCHIVO_MODELO_KERAS):
+    """Carga el motor NumPy, regenerando el .npz si falta o es más viejo que el .keras"""
+    desactualizado = (
+        os.path.exists(ruta_keras) and
+        (not os.path.exists(ruta_npz) or os.path.getmtime(ruta_npz) < os.path.getmtime(ruta_keras))
+    )
+    if desactualizado:
+        print(f"'{ruta_npz}' no existe o está desactualizado; exportando desde '{ruta_keras}'...")
+        try:
+            exportar_y_verificar(ruta_keras, ruta_npz)
+        except ImportError:
+            # Sin TensorFlow no se puede reexportar; se sirve el .npz existente.
+            if not os.path.exists(ruta_npz):
+                raise
+            print("TensorFlow no está instalado; se usa el .npz existente.")
+    return ModeloNumpy.cargar(ruta_npz)
+
+
+if __name__ == '__main__':
+    exportar_y_verificar()
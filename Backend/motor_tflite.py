@@ -0,0 +1,124 @@
+"""
+=============================================================================
+MOTOR DE INFERENCIA TFLITE
+Convierte modelo_tutor.keras a un .tflite y predice con el intérprete de
+LiteRT (ai_edge_litert o tflite_runtime), sin cargar Keras
+=============================================================================
+"""
+
+import os
+import threading
+import numpy as np
+
+ARCHIVO_MODELO_KERAS = 'modelo_tutor.keras'
+ARCHIVO_TFLITE = 'modelo_tutor.tflite'
+
+# Diferencia máxima aceptada entre Keras y TFLite en la comprobación de paridad.
+TOLERANCIA_PARIDAD = 1e-5
+
+
+def _clase_interprete():
+    """El intérprete más liviano disponible; TensorFlow completo es el último recurso"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class MotorTFLite:
+    """Predictor sobre un intérprete TFLite con la misma interfaz que ModeloNumpy.predict"""
+
+    def __init__(self, interprete):
+        self._interprete = interprete
+        self._lock = threading.Lock() # El intérprete guarda estado entre llamadas.
+        entradas = {d['name']: d['index'] for d in interprete.get_input_details()}
+        self._entrada_usuario = next(i for n, i in entradas.items() if 'usuario' in n)
+        self._entrada_habilidad = next(i for n, i in entradas.items() if 'habilidad' in n)
+        self._salida = interprete.get_output_details()[0]['index']
+        self._tamano_actual = None
+
+    @classmethod
+    def cargar(cls, ruta=ARCHIVO_TFLITE, num_hilos=1):
+        return cls(_clase_interprete()(model_path=ruta, num_threads=num_hilos))
+
+    def _redimensionar(self, tamano):
+        if tamano != self._tamano_actual:
+            self._interprete.resize_tensor_input(self._entrada_usuario, [tamano, 1])
+            self._interprete.resize_tensor_input(self._entrada_habilidad, [tamano, 1])
+            self._interprete.allocate_tensors()
+            self._tamano_actual = tamano
+
+    def predecir(self, ids_usuarios, ids_habilidades):
+        """Devuelve un vector con la probabilidad de acierto de cada par (usuario, habilidad)"""
+        ids_usuarios = np.asarray(ids_usuarios, dtype=np.float32).reshape(-1, 1)
+        ids_habilidades = np.asarray(ids_habilidades, dtype=np.float32).reshape(-1, 1)
+        with self._lock:
+            self._redimensionar(len(ids_usuarios))
+            self._interprete.set_tensor(self._entrada_usuario, ids_usuarios)
+            self._interprete.set_tensor(self._entrada_habilidad, ids_habilidades)
+            self._interprete.invoke()
+            return self._interprete.get_tensor(self._salida).reshape(-1).copy()
+
+    def predict(self, entradas, batch_size=None, verbose=0):
+        """Misma firma que keras.Model.predict: [usuarios, habilidades] -> (n, 1)"""
+        ids_usuarios, ids_habilidades = entradas
+        return self.predecir(ids_usuarios, ids_habilidades).reshape(-1, 1)
+
+
+def exportar_tflite(modelo_keras, ruta=ARCHIVO_TFLITE):
+    """Convierte el modelo Keras a TFLite (pesos congelados, tamaño de lote libre)"""
+    import tensorflow as tf
+    contenido = tf.lite.TFLiteConverter.from_keras_model(modelo_keras).convert()
+    with open(ruta + '.tmp', 'wb') as f:
+        f.write(contenido)
+    os.replace(ruta + '.tmp', ruta)
+    return ruta
+
+
+def verificar_paridad(modelo_keras, motor, tolerancia=TOLERANCIA_PARIDAD):
+    """Compara ambos modelos sobre todas las combinaciones (usuario, habilidad)"""
+    num_usuarios = modelo_keras.get_layer('embedding_usuario').input_dim
+    num_habilidades = modelo_keras.get_layer('embedding_habilidad').input_dim
+    ids_usuarios = np.repeat(np.arange(num_usuarios), num_habilidades)
+    ids_habilidades = np.tile(np.arange(num_habilidades), num_usuarios)
+    esperado = modelo_keras.predict(
+        [ids_usuarios, ids_habilidades], batch_size=len(ids_usuarios), verbose=0
+    ).reshape(-1)
+    diferencia = float(np.max(np.abs(esperado - motor.predecir(ids_usuarios, ids_habilidades))))
+    if not diferencia <= tolerancia: # También falla si hay NaN.
+        raise ValueError(
+            f"Paridad fallida: diferencia máxima {diferencia:.2e} > {tolerancia:.0e}"
+        )
+    return diferencia
+
+
+def exportar_y_verificar(ruta_keras=ARCHIVO_MODELO_KERAS, ruta_tflite=ARCHIVO_TFLITE, modelo_keras=None):
+    """Exporta el .tflite desde el .keras (o el modelo ya cargado) y comprueba la paridad"""
+    if modelo_keras is None:
+        import tensorflow as tf
+        modelo_keras = tf.keras.models.load_model(ruta_keras)
+    exportar_tflite(modelo_keras, ruta_tflite)
+    diferencia = verificar_paridad(modelo_keras, MotorTFLite.cargar(ruta_tflite))
+    print(f"Modelo TFLite exportado a '{ruta_tflite}' (diferencia máxima con Keras: {diferencia:.2e}).")
+    return ruta_tflite
+
+
+def cargar_motor(ruta_tflite=ARCHIVO_TFLITE, ruta_keras=ARCHIVO_MODELO_KERAS, num_hilos=1):
+    """Carga el motor TFLite, regenerando el .tflite si falta o es más viejo que el .keras"""
+    desactualizado = (
+        os.path.exists(ruta_keras) and
+        (not os.path.exists(ruta_tflite) or os.path.getmtime(ruta_tflite) < os.path.getmtime(ruta_keras))
+    )
+    if desactualizado:
+        print(f"'{ruta_tflite}' no existe o está desactualizado; exportando desde '{ruta_keras}'...")
+        exportar_y_verificar(ruta_keras, ruta_tflite)
+    return MotorTFLite.cargar(ruta_tflite, num_hilos)
+
+
+if __name__ == '__main__':
+    exportar_y_verificar()
@@ -0,0 +1,231 @@
+"""
+=============================================================================
+PERFILADO DEL ENTRENAMIENTO
+Callback que mide por época el tiempo total, las muestras por segundo, el
+tiempo por paso y la memoria pico; opcionalmente captura una traza del
+profiler de TensorFlow. Además mide por separado el flujo de entrada (solo
+leer lotes) para compararlo con el paso, y el costo de los embeddings y de
+las capas densas en un paso de entrenamiento.
+=============================================================================
+"""
+
+import json
+import time
+import numpy as np
+import tensorflow as tf
+from benchmark_motores import rss_mb, rss_pico_mb
+
+ARCHIVO_REPORTE = 'reporte_entrenamiento.json'
+DIRECTORIO_TRAZA = 'trazas_entrenamiento'
+
+
+class PerfiladorEntrenamiento(tf.keras.callbacks.Callback):
+    """
+    Mide cada paso entre on_train_batch_begin y on_train_batch_end. En
+    Keras 3 la lectura del lote ocurre dentro del paso (train_function), así
+    que ese tiempo incluye la espera por datos y no sirve para separarla: eso
+    lo hace medir_flujo(). El hueco entre pasos es sobrecarga de Keras y de
+    los callbacks. Las muestras se estiman como pasos x batch_size (el
+    último lote de cada época puede ser menor).
+    """
+
+    def __init__(self, batch_size, pasos_traza=None, directorio_traza=DIRECTORIO_TRAZA):
+        super().__init__()
+        self.batch_size = batch_size
+        # (primer_paso, ultimo_paso) globales a capturar con el profiler, o None.
+        self.pasos_traza = pasos_traza
+        self.directorio_traza = directorio_traza
+        self.epocas = []
+        self._paso_global = 0
+        self._trazando = False
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._inicio_epoca = time.perf_counter()
+        self._fin_ultimo_paso = self._inicio_epoca
+        self._entre_pasos = 0.0
+        self._en_pasos = 0.0
+        self._validacion = 0.0
+        self._pasos = 0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        ahora = time.perf_counter()
+        self._entre_pasos += ahora - self._fin_ultimo_paso
+        self._inicio_paso = ahora
+        if self.pasos_traza and self._paso_global == self.pasos_traza[0]:
+            tf.profiler.experimental.start(self.directorio_traza)
+            self._trazando = True
+
+    def on_train_batch_end(self, batch, logs=None):
+        ahora = time.perf_counter()
+        self._en_pasos += ahora - self._inicio_paso
+        self._fin_ultimo_paso = ahora
+        self._pasos += 1
+        self._paso_global += 1
+        if self._trazando and self._paso_global > self.pasos_traza[1]:
+            self._detener_traza()
+
+    def on_test_begin(self, logs=None):
+        self._inicio_validacion = time.perf_counter()
+
+    def on_test_end(self, logs=None):
+        self._validacion += time.perf_counter() - self._inicio_validacion
+
+    def on_epoch_end(self, epoch, logs=None):
+        duracion = time.perf_counter() - self._inicio_epoca
+        entrenamiento = duracion - self._validacion
+        muestras = self._pasos * self.batch_size
+        self.epocas.append({
+            'epoca': epoch + 1,
+            'duracion_s': round(duracion, 3),
+            'pasos': self._pasos,
+            'muestras': muestras,
+            'muestras_por_s': round(muestras / entrenamiento) if entrenamiento > 0 else None,
+            'pasos_s': round(self._en_pasos, 3),
+            'ms_por_paso': round(1000 * self._en_pasos / self._pasos, 4) if self._pasos else None,
+            'entre_pasos_s': round(self._entre_pasos, 3),
+            'validacion_s': round(self._validacion, 3),
+            'rss_mb': round(rss_mb(), 1),
+            'rss_pico_mb': round(rss_pico_mb(), 1),
+            'metricas': {k: float(v) for k, v in (logs or {}).items()},
+        })
+
+    def on_train_end(self, logs=None):
+        if self._trazando:
+            self._detener_traza()
+
+    def _detener_traza(self):
+        tf.profiler.experimental.stop()
+        self._trazando = False
+        print(f"Traza del profiler guardada en '{self.directorio_traza}' (ábrela con TensorBoard).")
+
+    def resumen(self):
+        if not self.epocas:
+            return {}
+        en_pasos = sum(e['pasos_s'] for e in self.epocas)
+        pasos = sum(e['pasos'] for e in self.epocas)
+        return {
+            'epocas': len(self.epocas),
+            'duracion_s': round(sum(e['duracion_s'] for e in self.epocas), 3),
+            'muestras_por_s_media': round(float(np.mean([e['muestras_por_s'] or 0 for e in self.epocas]))),
+            'pasos_s': round(en_pasos, 3),
+            'ms_por_paso': round(1000 * en_pasos / pasos, 4) if pasos else None,
+            'entre_pasos_s': round(sum(e['entre_pasos_s'] for e in self.epocas), 3),
+            'rss_pico_mb': max(e['rss_pico_mb'] for e in self.epocas),
+        }
+
+
+def medir_flujo(dataset, max_lotes=500):
+    """
+    Recorre el flujo de entrada solo, sin entrenar: lo que tarda en entregar
+    cada lote. Si se acerca al tiempo por paso, el entrenamiento espera datos.
+    """
+    if max_lotes:
+        dataset = dataset.take(max_lotes)
+    lotes = 0
+    inicio = time.perf_counter()
+    for _ in dataset:
+        lotes += 1
+    duracion = time.perf_counter() - inicio
+    return {
+        'lotes': lotes,
+        'duracion_s': round(duracion, 3),
+        'ms_por_lote': round(1000 * duracion / lotes, 4) if lotes else None,
+    }
+
+
+def comparar_entrada(entrada, epocas):
+    """
+    Con prefetch la lectura se solapa con el cómputo, así que el paso no
+    baja del tiempo por lote del flujo: la fracción es cuánto del paso
+    explica la entrada (cerca de 1, el cuello de botella son los datos).
+    Se compara con la época más rápida; la primera incluye trazar el grafo.
+    """
+    pasos = [e['ms_por_paso'] for e in epocas if e['ms_por_paso']]
+    ms_lote, ms_paso = entrada.get('ms_por_lote'), min(pasos, default=None)
+    if not ms_lote or not ms_paso:
+        return None
+    return round(min(ms_lote / ms_paso, 1.0), 4)
+
+
+def perfil_capas(modelo, batch_size, repeticiones=50, semilla=0):
+    """
+    Mide un paso de entrenamiento (adelante + gradientes) por partes:
+    las búsquedas en los embeddings y la pila de capas densas, en ms por lote.
+    """
+    rng = np.random.default_rng(semilla)
+    emb_usuario = modelo.get_layer('embedding_usuario')
+    emb_habilidad = modelo.get_layer('embedding_habilidad')
+    densas = [capa for capa in modelo.layers if isinstance(capa, tf.keras.layers.Dense)]
+
+    usuarios = tf.constant(rng.integers(0, emb_usuario.input_dim, batch_size), dtype=tf.int32)
+    habilidades = tf.constant(rng.integers(0, emb_habilidad.input_dim, batch_size), dtype=tf.int32)
+    objetivo = tf.constant(rng.integers(0, 2, (batch_size, 1)), dtype=tf.float32)
+
+    @tf.function
+    def paso_embeddings():
+        with tf.GradientTape() as cinta:
+            salida = tf.concat([emb_usuario(usuarios), emb_habilidad(habilidades)], axis=-1)
+            perdida = tf.reduce_sum(salida)
+        return cinta.gradient(perdida, emb_usuario.trainable_variables + emb_habilidad.trainable_variables)
+
+    entrada_densa = tf.concat([emb_usuario(usuarios), emb_habilidad(habilidades)], axis=-1)
+    variables_densas = [v for capa in densas for v in capa.trainable_variables]
+
+    @tf.function
+    def paso_densas():
+        with tf.GradientTape() as cinta:
+            x = entrada_densa
+            for capa in densas:
+                x = capa(x)
+            perdida = tf.reduce_mean(tf.keras.losses.binary_crossentropy(objetivo, x))
+        return cinta.gradient(perdida, variables_densas)
+
+    resultados = {}
+    for nombre, paso in (('embeddings', paso_embeddings), ('densas', paso_densas)):
+        paso() # Trazado del grafo fuera de la medición.
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            gradientes = paso()
+            # Espera a que el cálculo termine antes de detener el reloj.
+            _ = [g.values.numpy() if hasattr(g, 'values') else g.numpy() for g in gradientes]
+            tiempos.append(time.perf_counter() - inicio)
+        resultados[nombre] = {'ms_por_lote': round(float(np.median(tiempos)) * 1000, 4)}
+
+    total = sum(r['ms_por_lote'] for r in resultados.values())
+    for r in resultados.values():
+        r['fraccion'] = round(r['ms_por_lote'] / total, 4) if total > 0 else None
+    return resultados
+
+
+def escribir_reporte(perfilador, modelo, configuracion, ruta=ARCHIVO_REPORTE, flujo_entrada=None):
+    """
+    Junta el resumen, el detalle por época, la medición del flujo de entrada
+    (si se pasa `flujo_entrada`, el dataset de entrenamiento) y el perfil por
+    capas en un JSON
+    """
+    resumen = perfilador.resumen()
+    if flujo_entrada is not None:
+        resumen['entrada'] = medir_flujo(flujo_entrada)
+        resumen['fraccion_entrada'] = comparar_entrada(resumen['entrada'], perfilador.epocas)
+    reporte = {
+        'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'configuracion': configuracion,
+        'resumen': resumen,
+        'epocas': perfilador.epocas,
+        'capas': perfil_capas(modelo, configuracion.get('batch_size', 32)),
+        'traza': perfilador.directorio_traza if perfilador.pasos_traza else None,
+    }
+    with open(ruta, 'w') as f:
+        json.dump(reporte, f, indent=4, ensure_ascii=False)
+
+    print(f"\nPerfil: {resumen.get('muestras_por_s_media')} muestras/s, "
+          f"{resumen.get('ms_por_paso')} ms por paso, RSS pico {resumen.get('rss_pico_mb')} MB.")
+    if 'entrada' in resumen:
+        print(f"Flujo de entrada solo: {resumen['entrada']['ms_por_lote']} ms por lote "
+              f"({100 * (resumen['fraccion_entrada'] or 0):.1f}% del paso).")
+    capas = reporte['capas']
+    print("Paso de entrenamiento por partes: " +
+          ", ".join(f"{n} {c['ms_por_lote']:.3f} ms ({100 * (c['fraccion'] or 0):.0f}%)" for n, c in capas.items()))
+    print(f"Reporte guardado en '{ruta}'.")
+    return reporte
@@ -0,0 +1,209 @@
+"""
+=============================================================================
+PUNTUACIÓN POR LOTES
+Calcula la probabilidad de acierto de muchos pares (usuario, habilidad) con
+el motor NumPy: lee la entrada por bloques grandes, los puntúa vectorizados
+(opcionalmente en varios procesos) y escribe el resultado en formato columnar
+
+    python puntuar_lote.py --todos                      # usuarios x habilidades
+    python puntuar_lote.py --pares pares.csv            # columnas id_usuario,habilidad
+    python puntuar_lote.py --columnas datos_entrenamiento_columnas --procesos 4
+=============================================================================
+"""
+
+import os
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import motor_numpy
+import datos_columnares
+from recursos_modelo import directorio_version
+
+DIRECTORIO_SALIDA = 'puntajes_lote'
+TAMANO_BLOQUE = 1_000_000
+
+# Esquema de la salida; los ids se traducen con el vocabulario.json del directorio.
+COLUMNAS_SALIDA = {
+    'id_usuario': np.int32,
+    'habilidad': np.int16,
+    'prob_acierto': np.float32,
+}
+
+
+class Puntuador:
+    """
+    Motor + probabilidades de arranque en frío. Los usuarios que el modelo no
+    conoce (id -1) se puntúan con el embedding medio, como en el backend;
+    las habilidades desconocidas dan NaN.
+    """
+
+    def __init__(self, ruta_npz):
+        self.modelo = motor_numpy.ModeloNumpy.cargar(ruta_npz)
+        self.probs_frio = self.modelo.predecir_con_embedding(
+            self.modelo.embedding_inicial(), np.arange(self.modelo.num_habilidades)
+        ).astype(np.float32)
+
+    def puntuar(self, ids_usuarios, ids_habilidades):
+        probs = np.full(len(ids_usuarios), np.nan, dtype=np.float32)
+        habilidad_valida = ids_habilidades >= 0
+        conocido = habilidad_valida & (ids_usuarios >= 0)
+        frio = habilidad_valida & ~conocido
+        if conocido.any():
+            probs[conocido] = self.modelo.predecir(ids_usuarios[conocido], ids_habilidades[conocido])
+        probs[frio] = self.probs_frio[ids_habilidades[frio]]
+        return probs
+
+
+# Un Puntuador por proceso trabajador, creado una sola vez al iniciar.
+_puntuador = None
+
+def _iniciar_trabajador(ruta_npz):
+    global _puntuador
+    _puntuador = Puntuador(ruta_npz)
+
+def _puntuar_en_trabajador(ids_usuarios, ids_habilidades):
+    return _puntuador.puntuar(ids_usuarios, ids_habilidades)
+
+
+class Vocabulario:
+    """Nombres -> ids del modelo; los nombres nuevos se agregan al final para la salida"""
+
+    def __init__(self, mapa):
+        self.nombres = list(mapa)
+        self.num_modelo = len(self.nombres)
+        self._indice = pd.Index(self.nombres)
+        self._extra = {}
+
+    def codificar(self, nombres):
+        """Devuelve (ids_modelo con -1 si no existe, ids_salida)"""
+        ids_modelo = self._indice.get_indexer(nombres).astype(np.int32)
+        ids_salida = ids_modelo.copy()
+        desconocidos = ids_modelo < 0
+        if desconocidos.any():
+            nombres = np.asarray(nombres, dtype=object)
+            for nombre in pd.unique(nombres[desconocidos]):
+                if nombre not in self._extra:
+                    self._extra[nombre] = len(self.nombres)
+                    self.nombres.append(nombre)
+            ids_salida[desconocidos] = [self._extra[n] for n in nombres[desconocidos]]
+        return ids_modelo, ids_salida
+
+
+def contar_filas_csv(ruta, tamano_bloque=1_000_000):
+    """
+    Filas de datos (sin encabezado), con el mismo parser que bloques_csv:
+    contar saltos de línea no coincide si hay líneas en blanco o campos
+    entre comillas con saltos de línea.
+    """
+    return sum(len(bloque) for bloque in pd.read_csv(ruta, usecols=['id_usuario'], dtype=str,
+                                                     chunksize=tamano_bloque))
+
+
+def bloques_todos(num_usuarios, num_habilidades, tamano_bloque):
+    """La rejilla completa en orden usuario-mayor, sin materializarla"""
+    total = num_usuarios * num_habilidades
+    for inicio in range(0, total, tamano_bloque):
+        filas = np.arange(inicio, min(inicio + tamano_bloque, total), dtype=np.int64)
+        usuarios = (filas // num_habilidades).astype(np.int32)
+        habilidades = (filas % num_habilidades).astype(np.int32)
+        yield usuarios, habilidades, usuarios, habilidades
+
+
+def bloques_csv(ruta, vocab_usuarios, vocab_habilidades, tamano_bloque):
+    for bloque in pd.read_csv(ruta, usecols=['id_usuario', 'habilidad'], dtype=str,
+                              chunksize=tamano_bloque):
+        u_modelo, u_salida = vocab_usuarios.codificar(bloque['id_usuario'].to_numpy())
+        h_modelo, h_salida = vocab_habilidades.codificar(bloque['habilidad'].to_numpy())
+        yield u_modelo, h_modelo, u_salida, h_salida
+
+
+def bloques_columnas(directorio, vocab_usuarios, vocab_habilidades, tamano_bloque):
+    """Columnas de generar_datos.py: sus ids se traducen por nombre a los del modelo"""
+    columnas, vocabulario = datos_columnares.cargar_columnas(directorio)
+    u_modelo, u_salida = vocab_usuarios.codificar(np.array(vocabulario['usuarios'], dtype=object))
+    h_modelo, h_salida = vocab_habilidades.codificar(np.array(vocabulario['habilidades'], dtype=object))
+    total = len(columnas['id_usuario'])
+    for inicio in range(0, total, tamano_bloque):
+        usuarios = np.asarray(columnas['id_usuario'][inicio:inicio + tamano_bloque])
+        habilidades = np.asarray(columnas['habilidad'][inicio:inicio + tamano_bloque])
+        yield u_modelo[usuarios], h_modelo[habilidades], u_salida[usuarios], h_salida[habilidades]
+
+
+def puntuar(bloques, total_filas, ruta_npz, directorio_salida, vocab_usuarios, vocab_habilidades,
+            procesos=1):
+    """Puntúa los bloques en orden y los escribe a medida que terminan"""
+    escritor = datos_columnares.EscritorColumnas(directorio_salida, total_filas, COLUMNAS_SALIDA)
+
+    def escribir(u_salida, h_salida, probs):
+        escritor.escribir_bloque(id_usuario=u_salida, habilidad=h_salida, prob_acierto=probs)
+
+    if procesos <= 1:
+        puntuador = Puntuador(ruta_npz)
+        for u_modelo, h_modelo, u_salida, h_salida in bloques:
+            escribir(u_salida, h_salida, puntuador.puntuar(u_modelo, h_modelo))
+    else:
+        # A lo sumo 2 bloques por proceso en vuelo: la memoria queda acotada
+        # aunque la entrada sea mucho más grande que la RAM.
+        with ProcessPoolExecutor(procesos, initializer=_iniciar_trabajador, initargs=(ruta_npz,)) as ejecutor:
+            en_vuelo = deque()
+            for u_modelo, h_modelo, u_salida, h_salida in bloques:
+                en_vuelo.append((ejecutor.submit(_puntuar_en_trabajador, u_modelo, h_modelo), u_salida, h_salida))
+                if len(en_vuelo) >= 2 * procesos:
+                    futuro, u, h = en_vuelo.popleft()
+                    escribir(u, h, futuro.result())
+            while en_vuelo:
+                futuro, u, h = en_vuelo.popleft()
+                escribir(u, h, futuro.result())
+
+    escritor.cerrar(vocab_usuarios.nombres, vocab_habilidades.nombres)
+    return escritor.filas_escritas
+
+
+def main(args):
+    version, directorio = directorio_version(args.version)
+    ruta_npz = os.path.join(directorio, motor_numpy.ARCHIVO_PESOS_NPZ)
+    # Regenera el .npz si falta o quedó viejo respecto del .keras.
+    motor_numpy.cargar_motor(ruta_npz, os.path.join(directorio, motor_numpy.ARCHIVO_MODELO_KERAS))
+    with open(os.path.join(directorio, 'mapa_usuarios.json')) as f:
+        vocab_usuarios = Vocabulario(json.load(f))
+    with open(os.path.join(directorio, 'mapa_habilidades.json')) as f:
+        vocab_habilidades = Vocabulario(json.load(f))
+
+    if args.todos:
+        total = vocab_usuarios.num_modelo * vocab_habilidades.num_modelo
+        bloques = bloques_todos(vocab_usuarios.num_modelo, vocab_habilidades.num_modelo, args.tamano_bloque)
+    elif args.pares:
+        total = contar_filas_csv(args.pares, args.tamano_bloque)
+        bloques = bloques_csv(args.pares, vocab_usuarios, vocab_habilidades, args.tamano_bloque)
+    else:
+        columnas, _ = datos_columnares.cargar_columnas(args.columnas)
+        total = len(columnas['id_usuario'])
+        bloques = bloques_columnas(args.columnas, vocab_usuarios, vocab_habilidades, args.tamano_bloque)
+
+    print(f"Puntuando {total:,} pares con el modelo '{version}' ({args.procesos} proceso(s))...")
+    inicio = time.perf_counter()
+    filas = puntuar(bloques, total, ruta_npz, args.salida, vocab_usuarios, vocab_habilidades, args.procesos)
+    duracion = time.perf_counter() - inicio
+    nuevos = len(vocab_usuarios.nombres) - vocab_usuarios.num_modelo
+    print(f"{filas:,} pares en {duracion:.2f}s ({filas / max(duracion, 1e-9):,.0f} pares/s). "
+          f"Usuarios sin fila en el modelo (embedding medio): {nuevos}.")
+    print(f"Resultado en '{args.salida}/' ({', '.join(COLUMNAS_SALIDA)} + vocabulario.json).")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Puntúa pares (usuario, habilidad) por lotes.')
+    entrada = parser.add_mutually_exclusive_group(required=True)
+    entrada.add_argument('--todos', action='store_true', help='Todos los usuarios x todas las habilidades.')
+    entrada.add_argument('--pares', help='CSV con columnas id_usuario,habilidad (nombres).')
+    entrada.add_argument('--columnas', help='Directorio columnar de generar_datos.py.')
+    parser.add_argument('--salida', default=DIRECTORIO_SALIDA)
+    parser.add_argument('--version', help='Versión del registro de modelos (por defecto, la activa).')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE)
+    parser.add_argument('--procesos', type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,143 @@
+"""
+=============================================================================
+RECURSOS DEL MODELO
+Agrupa todo lo que depende de una versión del modelo (modelo, mapas y
+matriz de predicciones) en un objeto inmutable que el backend reemplaza
+de una sola vez al recargar
+=============================================================================
+"""
+
+import os
+import json
+import time
+import numpy as np
+
+import motor_numpy
+import motor_tflite
+import matriz_predicciones
+import registro_modelos
+
+
+class RecursosModelo:
+    """Una versión cargada. No se modifica: recargar crea otra instancia"""
+
+    __slots__ = ('version', 'directorio', 'ruta_modelo', 'modelo', 'modelo_frio',
+                 'mapa_usuarios', 'mapa_habilidades', 'lista_habilidades', 'matriz_probs',
+                 'cargado_en', 'tiempos')
+
+    def __init__(self, version, directorio, ruta_modelo, modelo, modelo_frio,
+                 mapa_usuarios, mapa_habilidades, matriz_probs=None):
+        self.version = version
+        self.directorio = directorio
+        self.ruta_modelo = ruta_modelo
+        self.modelo = modelo
+        # Motor NumPy para el arranque en frío (es el mismo objeto si ya se sirve con NumPy).
+        self.modelo_frio = modelo_frio
+        self.mapa_usuarios = mapa_usuarios
+        self.mapa_habilidades = mapa_habilidades
+        # Nombres ordenados por id: lista_habilidades[i] es la habilidad de la columna i.
+        self.lista_habilidades = sorted(mapa_habilidades, key=mapa_habilidades.get)
+        self.matriz_probs = matriz_probs
+        self.cargado_en = time.time()
+        # Segundos por etapa de la carga (los completa cargar_recursos).
+        self.tiempos = {}
+
+    def calentar(self, tamanos_lote=(1, 64)):
+        """
+        Predicciones de prueba para que la primera petición real no pague la
+        inicialización (en Keras, el trazado del grafo de predict).
+        """
+        for tamano in tamanos_lote:
+            ceros = np.zeros(tamano, dtype=np.int32)
+            self.modelo.predict([ceros, ceros], batch_size=tamano, verbose=0)
+        ceros = np.zeros(1, dtype=np.int32)
+        self.modelo_frio.predecir_con_embedding(self.modelo_frio.embedding_inicial(), ceros)
+        if self.matriz_probs is not None:
+            # Fuerza a leer las páginas del memmap.
+            float(self.matriz_probs.sum())
+
+    def describir(self):
+        return {
+            'version': self.version,
+            'modelo': self.ruta_modelo,
+            'usuarios': len(self.mapa_usuarios),
+            'habilidades': len(self.mapa_habilidades),
+            'matriz_precalculada': self.matriz_probs is not None,
+            'cargado_en': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.cargado_en)),
+            'tiempos_carga_s': self.tiempos,
+        }
+
+
+def directorio_version(version=None, registro=registro_modelos.DIRECTORIO_REGISTRO):
+    """
+    (version, directorio) a cargar: la pedida, la activa del registro o,
+    si el registro está vacío, los archivos sueltos del directorio actual ('local').
+    """
+    version = version or registro_modelos.version_actual(registro)
+    if version is None:
+        return 'local', '.'
+    directorio = registro_modelos.ruta_version(version, registro)
+    if not os.path.isdir(directorio):
+        raise FileNotFoundError(f"La versión '{version}' no existe en {registro}/")
+    return version, directorio
+
+
+def cargar_recursos(version=None, motor='numpy', usar_matriz=True,
+                    registro=registro_modelos.DIRECTORIO_REGISTRO):
+    """
+    Carga y calienta una versión completa. Lanza una excepción si algo falta.
+    TensorFlow solo se importa aquí: con motor='keras', o con 'tflite' si no
+    hay un intérprete LiteRT instalado o hay que reexportar el .tflite.
+    """
+    tiempos = {}
+    marca = time.perf_counter()
+
+    def medir(etapa):
+        nonlocal marca
+        ahora = time.perf_counter()
+        tiempos[etapa] = round(ahora - marca, 4)
+        marca = ahora
+
+    version, directorio = directorio_version(version, registro)
+    ruta_npz = os.path.join(directorio, motor_numpy.ARCHIVO_PESOS_NPZ)
+    ruta_keras = os.path.join(directorio, motor_numpy.ARCHIVO_MODELO_KERAS)
+
+    if motor == 'keras':
+        import tensorflow as tf
+        medir('import_tensorflow')
+        ruta_modelo = ruta_keras
+        modelo = tf.keras.models.load_model(ruta_keras)
+        modelo_frio = motor_numpy.cargar_motor(ruta_npz, ruta_keras)
+    elif motor == 'tflite':
+        ruta_modelo = os.path.join(directorio, motor_tflite.ARCHIVO_TFLITE)
+        modelo = motor_tflite.cargar_motor(ruta_modelo, ruta_keras)
+        modelo_frio = motor_numpy.cargar_motor(ruta_npz, ruta_keras)
+    else:
+        ruta_modelo = ruta_npz
+        modelo = modelo_frio = motor_numpy.cargar_motor(ruta_npz, ruta_keras)
+    medir('modelo')
+
+    with open(os.path.join(directorio, 'mapa_usuarios.json'), 'r') as f:
+        mapa_usuarios = json.load(f)
+    with open(os.path.join(directorio, 'mapa_habilidades.json'), 'r') as f:
+        mapa_habilidades = json.load(f)
+    medir('mapas')
+
+    matriz_probs = None
+    if usar_matriz:
+        # Cada versión guarda su propia matriz junto a sus archivos.
+        matriz_probs, reconstruida = matriz_predicciones.cargar_o_construir(
+            modelo, ruta_modelo, len(mapa_usuarios), len(mapa_habilidades),
+            ruta_matriz=os.path.join(directorio, matriz_predicciones.ARCHIVO_MATRIZ),
+            ruta_meta=os.path.join(directorio, matriz_predicciones.ARCHIVO_META)
+        )
+        estado = "recalculada" if reconstruida else "cargada desde caché"
+        print(f"Matriz de predicciones {matriz_probs.shape} {estado}.")
+        medir('matriz')
+
+    recursos = RecursosModelo(version, directorio, ruta_modelo, modelo, modelo_frio,
+                              mapa_usuarios, mapa_habilidades, matriz_probs)
+    recursos.calentar()
+    medir('primera_inferencia')
+    recursos.tiempos = tiempos
+    return recursos
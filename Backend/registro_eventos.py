@@ -0,0 +1,41 @@
+"""
+=============================================================================
+REGISTRO DE EVENTOS DE RESPUESTA
+Anexa cada respuesta en vivo a un CSV con el mismo esquema que
+datos_entrenamiento.csv, para el entrenamiento incremental
+=============================================================================
+"""
+
+import os
+import threading
+
+ARCHIVO_EVENTOS = 'eventos_respuestas.csv'
+ENCABEZADO = 'id_usuario,id_pregunta,habilidad,resultado_correcto\n'
+
+
+class RegistroEventos:
+    """Escritor de solo-anexar, seguro entre hilos"""
+
+    def __init__(self, ruta=ARCHIVO_EVENTOS):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        nuevo = not os.path.exists(ruta) or os.path.getsize(ruta) == 0
+        # buffering=1: cada línea completa llega al archivo al escribirla.
+        self._archivo = open(ruta, 'a', encoding='utf-8', buffering=1)
+        if nuevo:
+            self._archivo.write(ENCABEZADO)
+
+    def agregar(self, usuario, id_pregunta, habilidad, correcta):
+        linea = f'{usuario},{id_pregunta},{habilidad},{int(correcta)}\n'
+        with self._lock:
+            self._archivo.write(linea)
+
+    def agregar_varios(self, eventos):
+        """eventos: iterable de (usuario, id_pregunta, habilidad, correcta)"""
+        lineas = ''.join(f'{u},{p},{h},{int(c)}\n' for u, p, h, c in eventos)
+        with self._lock:
+            self._archivo.write(lineas)
+
+    def cerrar(self):
+        with self._lock:
+            self._archivo.close()
@@ -0,0 +1,174 @@
+"""
+=============================================================================
+REGISTRO DE VERSIONES DEL MODELO
+registro_modelos/
+    v0001/  modelo_tutor.keras, modelo_tutor.npz, mapas y metadata.json
+    v0002/  ...
+    ACTUAL              versión que debe servir el backend
+    activaciones.json   historial de versiones activadas (para rollback)
+=============================================================================
+"""
+
+import os
+import sys
+import json
+import shutil
+from datetime import datetime
+from matriz_predicciones import huella_archivo
+
+DIRECTORIO_REGISTRO = 'registro_modelos'
+ARCHIVO_ACTUAL = 'ACTUAL'
+ARCHIVO_ACTIVACIONES = 'activaciones.json'
+ARCHIVO_METADATA = 'metadata.json'
+
+# Archivos que forman una versión; el .keras es opcional si hay .npz, y el
+# .tflite solo se copia si existe.
+ARCHIVOS_VERSION = [
+    'modelo_tutor.keras',
+    'modelo_tutor.npz',
+    'modelo_tutor.tflite',
+    'mapa_usuarios.json',
+    'mapa_habilidades.json',
+]
+ARCHIVOS_OBLIGATORIOS = ['mapa_usuarios.json', 'mapa_habilidades.json']
+
+
+def _escribir_atomico(ruta, contenido):
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(contenido)
+    os.replace(ruta + '.tmp', ruta)
+
+
+def listar(registro=DIRECTORIO_REGISTRO):
+    """Versiones publicadas, de la más vieja a la más nueva"""
+    if not os.path.isdir(registro):
+        return []
+    return sorted(
+        nombre for nombre in os.listdir(registro)
+        if nombre.startswith('v') and os.path.isdir(os.path.join(registro, nombre))
+    )
+
+
+def ruta_version(version, registro=DIRECTORIO_REGISTRO):
+    return os.path.join(registro, version)
+
+
+def version_actual(registro=DIRECTORIO_REGISTRO):
+    """Versión activa, o None si el registro está vacío"""
+    try:
+        with open(os.path.join(registro, ARCHIVO_ACTUAL), 'r', encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def leer_metadata(version, registro=DIRECTORIO_REGISTRO):
+    try:
+        with open(os.path.join(ruta_version(version, registro), ARCHIVO_METADATA), 'r',
+                  encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _activaciones(registro):
+    try:
+        with open(os.path.join(registro, ARCHIVO_ACTIVACIONES), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def activar(version, registro=DIRECTORIO_REGISTRO):
+    """Marca la versión como activa (el backend la toma al recargar)"""
+    if version not in listar(registro):
+        raise ValueError(f"La versión '{version}' no existe en {registro}/")
+    historial = _activaciones(registro)
+    if not historial or historial[-1] != version:
+        historial.append(version)
+    _escribir_atomico(os.path.join(registro, ARCHIVO_ACTIVACIONES), json.dumps(historial))
+    _escribir_atomico(os.path.join(registro, ARCHIVO_ACTUAL), version)
+    return version
+
+
+def version_anterior(registro=DIRECTORIO_REGISTRO):
+    """La versión activada antes de la actual, o None"""
+    historial = _activaciones(registro)
+    actual = version_actual(registro)
+    while historial and historial[-1] == actual:
+        historial.pop()
+    return historial[-1] if historial else None
+
+
+def rollback(registro=DIRECTORIO_REGISTRO):
+    """Vuelve a activar la versión anterior y la quita del historial"""
+    anterior = version_anterior(registro)
+    if anterior is None:
+        raise ValueError("No hay una versión anterior a la cual volver.")
+    historial = _activaciones(registro)
+    while historial and historial[-1] != anterior:
+        historial.pop()
+    _escribir_atomico(os.path.join(registro, ARCHIVO_ACTIVACIONES), json.dumps(historial))
+    _escribir_atomico(os.path.join(registro, ARCHIVO_ACTUAL), anterior)
+    return anterior
+
+
+def publicar(origen='.', metadata=None, activar_version=True, registro=DIRECTORIO_REGISTRO):
+    """
+    Copia el modelo y los mapas de `origen` a una versión nueva. Se arma en
+    un directorio temporal y se renombra, así nunca se ve una versión a medias.
+    """
+    for nombre in ARCHIVOS_OBLIGATORIOS:
+        if not os.path.exists(os.path.join(origen, nombre)):
+            raise FileNotFoundError(f"Falta '{nombre}' en {origen}/")
+    if not any(os.path.exists(os.path.join(origen, n)) for n in ARCHIVOS_VERSION[:2]):
+        raise FileNotFoundError(f"No hay modelo (.keras ni .npz) en {origen}/")
+
+    os.makedirs(registro, exist_ok=True)
+    versiones = listar(registro)
+    numero = int(versiones[-1][1:]) + 1 if versiones else 1
+    version = f'v{numero:04d}'
+    temporal = os.path.join(registro, f'.{version}.tmp')
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    huellas = {}
+    for nombre in ARCHIVOS_VERSION:
+        ruta = os.path.join(origen, nombre)
+        if os.path.exists(ruta):
+            shutil.copy2(ruta, os.path.join(temporal, nombre))
+            huellas[nombre] = huella_archivo(ruta)
+
+    datos = {
+        'version': version,
+        'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'archivos': huellas,
+    }
+    datos.update(metadata or {})
+    with open(os.path.join(temporal, ARCHIVO_METADATA), 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=4, ensure_ascii=False)
+
+    os.replace(temporal, ruta_version(version, registro))
+    if activar_version:
+        activar(version, registro)
+    print(f"Versión {version} publicada en {registro}/" + (" y activada." if activar_version else "."))
+    return version
+
+
+if __name__ == '__main__':
+    uso = "Uso: python registro_modelos.py [publicar | listar | activar <version> | rollback]"
+    if len(sys.argv) < 2:
+        print(uso)
+    elif sys.argv[1] == 'publicar':
+        publicar()
+    elif sys.argv[1] == 'listar':
+        actual = version_actual()
+        for v in listar():
+            print(f"{'*' if v == actual else ' '} {v}  {leer_metadata(v).get('fecha', '')}")
+    elif sys.argv[1] == 'activar' and len(sys.argv) == 3:
+        print(f"Versión activa: {activar(sys.argv[2])}")
+    elif sys.argv[1] == 'rollback':
+        print(f"Versión activa: {rollback()}")
+    else:
+        print(uso)
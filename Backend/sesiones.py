@@ -0,0 +1,268 @@
+"""
+=============================================================================
+ALMACÉN DE SESIONES
+Estado por usuario (puntajes e historial) con expulsión LRU/TTL y respaldo
+opcional en SQLite (modo WAL)
+=============================================================================
+"""
+
+import time
+import sqlite3
+import weakref
+import threading
+from array import array
+from collections import OrderedDict
+import numpy as np
+
+from trazado_conocimiento import EstadoConocimiento
+
+
+class Sesion:
+    """
+    Estado en vivo de un usuario. Se modifica siempre bajo self.lock.
+    Los puntajes viven en una fila de `estado` (la matriz de dominio
+    compartida); la fila se libera cuando la sesión deja de existir.
+    """
+
+    __slots__ = ('clave', 'usuario', 'respondidas', 'resultados', 'embedding', 'embedding_base', 'pool',
+                 'prioridad', 'recursos', 'lock', 'ultimo_acceso', '_estado', '_fila', '_num_habilidades',
+                 '__weakref__')
+
+    def __init__(self, clave, usuario, puntajes, pool, embedding=None, estado=None):
+        self.clave = clave
+        self.usuario = usuario
+        puntajes = np.asarray(puntajes, dtype=np.float64)
+        self._estado = estado if estado is not None else EstadoConocimiento(len(puntajes), capacidad=1)
+        self._fila = self._estado.reservar()
+        # Con finalize y no en __del__: la fila no se reutiliza mientras
+        # algún hilo todavía tenga la sesión (por ejemplo, recién expulsada).
+        weakref.finalize(self, self._estado.liberar, self._fila)
+        # Un float por habilidad, indexado por el id numérico de la habilidad.
+        self.puntajes = puntajes
+        # Ids de preguntas respondidas, en orden, como enteros de 32 bits.
+        self.respondidas = array('i')
+        # Acierto (1) o error (0) de cada pregunta respondida, alineado con respondidas.
+        self.resultados = array('b')
+        # Vector propio de los usuarios en arranque en frío (sin fila en el modelo).
+        self.embedding = embedding
+        # Prior del reajuste de ese vector: la media al empezar, el vector
+        # aprendido después de un reinicio.
+        self.embedding_base = embedding
+        self.pool = pool
+        # Montículo indexado habilidad -> probabilidad de las habilidades con
+        # preguntas pendientes (lo arma el backend; None = hay que reconstruirlo).
+        self.prioridad = None
+        # Versión del modelo con la que están indexados los puntajes (la asigna el backend).
+        self.recursos = None
+        self.lock = threading.Lock()
+        self.ultimo_acceso = time.monotonic()
+
+    @property
+    def puntajes(self):
+        """Probabilidad de acierto por habilidad (una copia: para cambiarla, asignar)"""
+        return self._estado.leer(self._fila, self._num_habilidades)
+
+    @puntajes.setter
+    def puntajes(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        self._num_habilidades = len(valores)
+        self._estado.sembrar(self._fila, valores)
+        self.prioridad = None
+
+    @property
+    def fila(self):
+        """Fila de la sesión en la matriz de dominio"""
+        return self._fila
+
+    def registrar_respuesta(self, indice_habilidad, correcta):
+        """Actualiza el dominio de una habilidad con BKT; devuelve la nueva probabilidad"""
+        return float(self.registrar_respuestas([indice_habilidad], [correcta])[0])
+
+    def registrar_respuestas(self, indices_habilidades, correctas):
+        """Varias respuestas en orden, en una sola actualización de la matriz"""
+        filas = np.full(len(indices_habilidades), self._fila, dtype=np.int64)
+        probs = self._estado.aplicar(filas, indices_habilidades, correctas)
+        if self.prioridad is not None:
+            # En orden: si una habilidad se repite, queda su último valor.
+            for indice, prob in zip(indices_habilidades, probs):
+                if indice in self.prioridad:
+                    self.prioridad.fijar(indice, float(prob))
+        return probs
+
+    def simular_respuesta(self, indice_habilidad, correctas):
+        """Probabilidad que quedaría tras cada resultado posible, sin registrarlo"""
+        return self._estado.simular(self._fila, indice_habilidad, correctas)
+
+    def marcar_respondida(self, id_pregunta, correcta):
+        """Quita la pregunta del pool; devuelve False si ya estaba respondida"""
+        if not self.pool.quitar(id_pregunta):
+            return False
+        self.respondidas.append(id_pregunta)
+        self.resultados.append(int(correcta))
+        return True
+
+    def limpiar_historial(self):
+        del self.respondidas[:]
+        del self.resultados[:]
+        self.pool.reiniciar()
+        self.prioridad = None
+
+
+def _a_bytes(vector):
+    return None if vector is None else vector.astype(np.float64).tobytes()
+
+
+def _de_bytes(blob):
+    return None if blob is None else np.frombuffer(blob, dtype=np.float64).copy()
+
+
+class RespaldoSQLite:
+    """Persistencia de sesiones en SQLite con journal WAL"""
+
+    def __init__(self, ruta):
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute('PRAGMA synchronous=NORMAL')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS sesiones ('
+                ' clave TEXT PRIMARY KEY,'
+                ' usuario TEXT NOT NULL,'
+                ' puntajes BLOB NOT NULL,'
+                ' respondidas BLOB NOT NULL,'
+                ' resultados BLOB NOT NULL,'
+                ' embedding BLOB,'
+                ' actualizado REAL NOT NULL,'
+                ' embedding_base BLOB)'
+            )
+            columnas = {fila[1] for fila in self._conexion.execute('PRAGMA table_info(sesiones)')}
+            if 'embedding_base' not in columnas: # Respaldo creado por una versión anterior.
+                self._conexion.execute('ALTER TABLE sesiones ADD COLUMN embedding_base BLOB')
+            self._conexion.commit()
+
+    def guardar(self, sesion):
+        fila = (
+            sesion.clave, sesion.usuario, sesion.puntajes.tobytes(),
+            sesion.respondidas.tobytes(), sesion.resultados.tobytes(),
+            _a_bytes(sesion.embedding), time.time(), _a_bytes(sesion.embedding_base)
+        )
+        with self._lock:
+            self._conexion.execute(
+                'INSERT OR REPLACE INTO sesiones (clave, usuario, puntajes, respondidas, resultados,'
+                ' embedding, actualizado, embedding_base) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', fila
+            )
+            self._conexion.commit()
+
+    def leer(self, clave):
+        """Devuelve un diccionario con el estado guardado, o None"""
+        with self._lock:
+            fila = self._conexion.execute(
+                'SELECT usuario, puntajes, respondidas, resultados, embedding, embedding_base'
+                ' FROM sesiones WHERE clave = ?', (clave,)
+            ).fetchone()
+        if fila is None:
+            return None
+        usuario, puntajes, respondidas, resultados, embedding, embedding_base = fila
+        ids, aciertos = array('i'), array('b')
+        ids.frombytes(respondidas)
+        aciertos.frombytes(resultados)
+        return {
+            'usuario': usuario,
+            'puntajes': np.frombuffer(puntajes, dtype=np.float64).copy(),
+            'respondidas': ids,
+            'resultados': aciertos,
+            'embedding': _de_bytes(embedding),
+            'embedding_base': _de_bytes(embedding_base),
+        }
+
+    def borrar(self, clave):
+        with self._lock:
+            self._conexion.execute('DELETE FROM sesiones WHERE clave = ?', (clave,))
+            self._conexion.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+class AlmacenSesiones:
+    """
+    Sesiones en memoria ordenadas por último acceso (LRU).
+    crear_sesion(clave, usuario) construye una sesión nueva; si hay respaldo,
+    las sesiones expulsadas se restauran desde disco al volver a pedirlas.
+    """
+
+    def __init__(self, crear_sesion, capacidad=10000, ttl=3600, ruta_sqlite=None):
+        self._crear_sesion = crear_sesion
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._sesiones = OrderedDict()
+        self._lock = threading.Lock()
+        self.respaldo = RespaldoSQLite(ruta_sqlite) if ruta_sqlite else None
+
+    def __len__(self):
+        return len(self._sesiones)
+
+    def sesiones(self):
+        """Copia de las sesiones activas (para métricas e inspección)"""
+        with self._lock:
+            return list(self._sesiones.values())
+
+    def _expulsar(self, ahora):
+        # Las sesiones más antiguas están al principio del OrderedDict.
+        while self._sesiones:
+            clave, sesion = next(iter(self._sesiones.items()))
+            caducada = ahora - sesion.ultimo_acceso > self.ttl
+            if not caducada and len(self._sesiones) <= self.capacidad:
+                break
+            del self._sesiones[clave]
+
+    def _restaurar(self, clave, usuario):
+        sesion = self._crear_sesion(clave, usuario)
+        guardada = self.respaldo.leer(clave) if self.respaldo else None
+        if guardada is not None and guardada['usuario'] == usuario:
+            if len(guardada['puntajes']) == len(sesion.puntajes):
+                sesion.puntajes = guardada['puntajes']
+                for id_pregunta, correcta in zip(guardada['respondidas'], guardada['resultados']):
+                    sesion.marcar_respondida(id_pregunta, correcta)
+                if guardada['embedding'] is not None:
+                    sesion.embedding = guardada['embedding']
+                if guardada['embedding_base'] is not None:
+                    sesion.embedding_base = guardada['embedding_base']
+        return sesion
+
+    def obtener(self, clave, usuario=None):
+        """Sesión de la clave; la crea (o la restaura del respaldo) si no existe"""
+        usuario = clave if usuario is None else usuario
+        ahora = time.monotonic()
+        with self._lock:
+            sesion = self._sesiones.get(clave)
+            if sesion is not None and ahora - sesion.ultimo_acceso > self.ttl:
+                del self._sesiones[clave]
+                sesion = None
+            if sesion is not None:
+                self._sesiones.move_to_end(clave)
+                sesion.ultimo_acceso = ahora
+                return sesion
+
+        # Se construye fuera del lock global para no bloquear a otros usuarios.
+        nueva = self._restaurar(clave, usuario)
+        with self._lock:
+            # Otro hilo pudo crear la misma sesión mientras tanto.
+            sesion = self._sesiones.setdefault(clave, nueva)
+            self._sesiones.move_to_end(clave)
+            sesion.ultimo_acceso = ahora
+            self._expulsar(ahora)
+        return sesion
+
+    def guardar(self, sesion):
+        """Persiste la sesión si hay respaldo configurado"""
+        if self.respaldo is not None:
+            self.respaldo.guardar(sesion)
+
+    def eliminar(self, clave):
+        with self._lock:
+            self._sesiones.pop(clave, None)
+        if self.respaldo is not None:
+            self.respaldo.borrar(clave)
@@ -0,0 +1,202 @@
+"""
+=============================================================================
+TRAZADO DE CONOCIMIENTO (BKT)
+Dominio de cada habilidad para todas las sesiones activas en una sola
+matriz NumPy (filas = sesiones, columnas = habilidades), actualizado con
+Bayesian Knowledge Tracing. Adivinar y desliz se guardan por celda para que
+cualquier probabilidad del modelo sea un dominio interior. Un lote de
+respuestas se aplica con operaciones vectorizadas.
+=============================================================================
+"""
+
+import threading
+from collections import namedtuple
+import numpy as np
+
+# transicion: probabilidad de aprender la habilidad después de cada respuesta.
+# desliz: fallar sabiendo. adivinar: acertar sin saber.
+ParametrosBKT = namedtuple('ParametrosBKT', ['transicion', 'desliz', 'adivinar'])
+PARAMETROS_POR_DEFECTO = ParametrosBKT(transicion=0.1, desliz=0.1, adivinar=0.2)
+
+# El dominio sembrado nunca es exactamente 0 ni 1: en BKT son estados
+# absorbentes y ninguna respuesta los movería.
+DOMINIO_MINIMO = 1e-6
+
+
+def acierto_desde_dominio(dominio, parametros=PARAMETROS_POR_DEFECTO):
+    """P(acierto) = P(sabe)·(1 - desliz) + P(no sabe)·adivinar"""
+    return dominio * (1 - parametros.desliz) + (1 - dominio) * parametros.adivinar
+
+
+def dominio_desde_acierto(prob_acierto, parametros=PARAMETROS_POR_DEFECTO):
+    """
+    Inversa de acierto_desde_dominio: así la probabilidad que da el modelo
+    sirve como dominio inicial. Se recorta a [DOMINIO_MINIMO, 1 - DOMINIO_MINIMO];
+    con parametros_para_acierto() la probabilidad ya cae dentro.
+    """
+    escala = 1 - parametros.desliz - parametros.adivinar
+    dominio = (np.asarray(prob_acierto, dtype=np.float64) - parametros.adivinar) / escala
+    return np.clip(dominio, DOMINIO_MINIMO, 1 - DOMINIO_MINIMO)
+
+
+def parametros_para_acierto(prob_acierto, parametros=PARAMETROS_POR_DEFECTO):
+    """
+    Adivinar y desliz por celda para que [adivinar, 1 - desliz] contenga la
+    probabilidad del modelo: se bajan a la mitad de la distancia a 0 (o a 1)
+    solo donde hace falta. Con los valores fijos, 0.07 o 0.95 se recortarían
+    a un dominio de 0 o 1 y las respuestas no los moverían.
+    """
+    prob_acierto = np.asarray(prob_acierto, dtype=np.float64)
+    return ParametrosBKT(
+        transicion=parametros.transicion,
+        desliz=np.minimum(parametros.desliz, (1 - prob_acierto) / 2),
+        adivinar=np.minimum(parametros.adivinar, prob_acierto / 2),
+    )
+
+
+def actualizar_dominio(dominio, correctas, parametros=PARAMETROS_POR_DEFECTO):
+    """
+    Posterior tras observar cada respuesta y luego la transición de
+    aprendizaje. Con dominio bajo la transición sube más de lo que baja un
+    error; en ese caso se omite, así un error nunca sube el dominio.
+    """
+    dominio = np.asarray(dominio, dtype=np.float64)
+    correctas = np.asarray(correctas, dtype=bool)
+    sabe = np.where(correctas, dominio * (1 - parametros.desliz), dominio * parametros.desliz)
+    no_sabe = np.where(correctas, (1 - dominio) * parametros.adivinar,
+                       (1 - dominio) * (1 - parametros.adivinar))
+    posterior = sabe / (sabe + no_sabe)
+    aprendido = posterior + (1 - posterior) * parametros.transicion
+    return np.where(correctas | (aprendido <= dominio), aprendido, posterior)
+
+
+def acierto_tras_respuesta(dominio, correctas, parametros=PARAMETROS_POR_DEFECTO):
+    """Probabilidad de acierto que quedaría tras cada respuesta, sin guardar nada"""
+    return acierto_desde_dominio(actualizar_dominio(dominio, correctas, parametros), parametros)
+
+
+def rondas_sin_repetir(claves):
+    """
+    Número de ronda de cada elemento: la k-ésima aparición de una misma
+    clave va en la ronda k. Dentro de una ronda no hay claves repetidas.
+    """
+    claves = np.asarray(claves)
+    if len(claves) == 0:
+        return np.zeros(0, dtype=np.int64)
+    orden = np.argsort(claves, kind='stable')
+    ordenadas = claves[orden]
+    nuevo_grupo = np.empty(len(claves), dtype=bool)
+    nuevo_grupo[0] = True
+    nuevo_grupo[1:] = ordenadas[1:] != ordenadas[:-1]
+    posiciones = np.arange(len(claves))
+    inicio_grupo = np.maximum.accumulate(np.where(nuevo_grupo, posiciones, 0))
+    rondas = np.empty(len(claves), dtype=np.int64)
+    rondas[orden] = posiciones - inicio_grupo
+    return rondas
+
+
+class EstadoConocimiento:
+    """
+    Matriz de dominio compartida por todas las sesiones. Cada sesión reserva
+    una fila y usa sus primeras columnas según su mapa de habilidades. Otras
+    dos matrices guardan adivinar y desliz de cada celda, fijados al sembrar
+    (parametros_para_acierto), así sembrar y leer devuelven la misma
+    probabilidad. Las matrices crecen duplicando su tamaño, así que nadie
+    guarda vistas sobre ellas: todo acceso pasa por estos métodos, bajo self._lock.
+    """
+
+    def __init__(self, num_habilidades=8, parametros=PARAMETROS_POR_DEFECTO, capacidad=1024):
+        self.parametros = parametros
+        forma = (max(capacidad, 1), max(num_habilidades, 1))
+        self._dominio = np.zeros(forma)
+        self._adivinar = np.full(forma, parametros.adivinar)
+        self._desliz = np.full(forma, parametros.desliz)
+        self._libres = list(range(len(self._dominio) - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Filas en uso"""
+        with self._lock:
+            return len(self._dominio) - len(self._libres)
+
+    def _ampliar(self, filas, ancho):
+        filas_previas, ancho_previo = self._dominio.shape
+        for nombre, relleno in (('_dominio', 0.0), ('_adivinar', self.parametros.adivinar),
+                                ('_desliz', self.parametros.desliz)):
+            ampliada = np.full((filas, ancho), relleno)
+            ampliada[:filas_previas, :ancho_previo] = getattr(self, nombre)
+            setattr(self, nombre, ampliada)
+
+    def _parametros(self, filas, columnas):
+        """Parámetros de las celdas indicadas (índices o cortes de NumPy)"""
+        return ParametrosBKT(self.parametros.transicion, self._desliz[filas, columnas],
+                             self._adivinar[filas, columnas])
+
+    def _asegurar_ancho(self, num_habilidades):
+        filas, ancho = self._dominio.shape
+        if num_habilidades > ancho:
+            self._ampliar(filas, max(num_habilidades, 2 * ancho))
+
+    def reservar(self):
+        with self._lock:
+            if not self._libres:
+                filas, ancho = self._dominio.shape
+                self._ampliar(2 * filas, ancho)
+                self._libres = list(range(2 * filas - 1, filas - 1, -1))
+            return self._libres.pop()
+
+    def liberar(self, fila):
+        with self._lock:
+            self._dominio[fila] = 0.0
+            self._adivinar[fila] = self.parametros.adivinar
+            self._desliz[fila] = self.parametros.desliz
+            self._libres.append(fila)
+
+    def sembrar(self, fila, prob_acierto):
+        """Fija una fila a partir de probabilidades de acierto, sin recortarlas"""
+        parametros = parametros_para_acierto(prob_acierto, self.parametros)
+        dominio = dominio_desde_acierto(prob_acierto, parametros)
+        with self._lock:
+            self._asegurar_ancho(len(dominio))
+            self._dominio[fila, :len(dominio)] = dominio
+            self._adivinar[fila, :len(dominio)] = parametros.adivinar
+            self._desliz[fila, :len(dominio)] = parametros.desliz
+
+    def leer(self, fila, num_habilidades):
+        """Probabilidades de acierto de una fila (copia)"""
+        with self._lock:
+            dominio = self._dominio[fila, :num_habilidades].copy()
+            parametros = self._parametros(fila, slice(0, num_habilidades))
+        return acierto_desde_dominio(dominio, parametros)
+
+    def simular(self, fila, habilidad, correctas):
+        """Probabilidad de acierto de una celda tras cada respuesta posible, sin guardarla"""
+        with self._lock:
+            dominio = self._dominio[fila, habilidad]
+            parametros = self._parametros(fila, habilidad)
+        return acierto_tras_respuesta(dominio, correctas, parametros)
+
+    def aplicar(self, filas, habilidades, correctas):
+        """
+        Aplica un lote de respuestas (fila, habilidad, correcta), en orden.
+        Las respuestas de una misma fila y habilidad dependen de la anterior,
+        así que van en rondas sucesivas; cada ronda es una sola operación
+        vectorizada. Devuelve la probabilidad de acierto tras cada respuesta.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        habilidades = np.asarray(habilidades, dtype=np.int64)
+        correctas = np.asarray(correctas, dtype=bool)
+        resultado = np.empty(len(filas))
+        adivinar, desliz = np.empty(len(filas)), np.empty(len(filas))
+        with self._lock:
+            self._asegurar_ancho(int(habilidades.max()) + 1 if len(habilidades) else 0)
+            rondas = rondas_sin_repetir(filas * self._dominio.shape[1] + habilidades)
+            for ronda in range(int(rondas.max()) + 1 if len(rondas) else 0):
+                sel = np.flatnonzero(rondas == ronda)
+                f, h = filas[sel], habilidades[sel]
+                parametros = self._parametros(f, h)
+                nuevo = actualizar_dominio(self._dominio[f, h], correctas[sel], parametros)
+                self._dominio[f, h] = nuevo
+                resultado[sel] = nuevo
+                adivinar[sel], desliz[sel] = parametros.adivinar, parametros.desliz
+        return acierto_desde_dominio(resultado, ParametrosBKT(self.parametros.transicion, desliz, adivinar))
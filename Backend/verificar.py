@@ -1,11 +1,11 @@
-import tensorflow as tf
 import json
 import numpy as np
+from motor_numpy import cargar_motor
 
 print("Verificando red neuronal...")
 
-# Cargar modelo
-modelo = tf.keras.models.load_model('modelo_tutor.keras')
+# Cargar modelo (motor NumPy, sin TensorFlow)
+modelo = cargar_motor()
 print("✓ Modelo cargado")
 
 # Cargar mapas
@@ -19,13 +19,13 @@ print(f"✓ {len(habilidades)} habilidades")
 
 # Mostrar arquitectura
 print("\nARQUITECTURA:")
-modelo.summary()
+modelo.resumen()
 
 # Hacer 1 predicción
 usuario_id = 0
 habilidad_id = 0
-prob = modelo.predict([np.array([usuario_id]), np.array([habilidad_id])], verbose=0)[0][0]
+prob = modelo.predecir(np.array([usuario_id]), np.array([habilidad_id]))[0]
 
 print(f"\nEJEMPLO DE PREDICCIÓN:")
 print(f"Usuario 0 + Habilidad 0 = {prob:.3f} ({prob*100:.1f}%)")
-print("\n✅ La red neuronal funciona correctamente")
\ No newline at end of file
+print("\n✅ La red neuronal funciona correctamente")
@@ -28,6 +28,14 @@ const PanelHabilidades = ({ preds }) => (
   </div>
 )
 
+// Aplica las habilidades que cambiaron sobre el ranking actual y lo reordena.
+const aplicarDelta = (preds, delta) => {
+  const cambios = new Map(delta.map((d) => [d.habilidad, d.prob_acierto]))
+  return preds
+    .map((p) => (cambios.has(p.habilidad) ? { ...p, prob_acierto: cambios.get(p.habilidad) } : p))
+    .sort((a, b) => a.prob_acierto - b.prob_acierto)
+}
+
 function App() {
   // El estado "pregunta" guardará el objeto de la pregunta actual.
   const [pregunta, setPregunta] = useState(null)
@@ -45,6 +53,9 @@ function App() {
 
   // "predicciones" guardará el ranking de habilidades.
   const [predicciones, setPredicciones] = useState([])
+
+  // "siguiente" guarda la próxima pregunta que ya vino con la verificación.
+  const [siguiente, setSiguiente] = useState(null)
  
   // Carga una nueva pregunta desde el backend.
   const fetchPregunta = async () => {
@@ -81,6 +92,8 @@ function App() {
       body: JSON.stringify({
         id: pregunta.id,
         respuesta: opcionSeleccionada,
+        siguiente: true, // Pide la próxima pregunta en la misma respuesta.
+        delta: true, // Solo las habilidades que cambiaron.
       }),
     })
     const data = await response.json()
@@ -89,18 +102,40 @@ function App() {
       resultado: data.resultado,
       respuesta_correcta: data.respuesta_correcta
     })
-    // Actualiza el panel de habilidades.
-    setPredicciones(data.predicciones_actualizadas)
+    // Actualiza el panel de habilidades (la lista completa llega si el modelo cambió).
+    if (data.predicciones_actualizadas) {
+      setPredicciones(data.predicciones_actualizadas)
+    } else {
+      setPredicciones((prev) => aplicarDelta(prev, data.predicciones_delta || []))
+    }
+    setSiguiente(data.siguiente || null)
     setVerificando(false)
   }
 
+  // Muestra la pregunta que ya llegó con la verificación, sin volver a
+  // llamar al backend. Si no vino, la pide como antes.
+  const mostrarSiguiente = () => {
+    if (!siguiente) {
+      fetchPregunta()
+      return
+    }
+    setResultado(null)
+    if (siguiente.completado) {
+      setTestCompletado(true)
+    } else {
+      setPregunta(siguiente.pregunta)
+    }
+    setSiguiente(null)
+  }
+
     // Maneja el reinicio del test.
   const handleReiniciar = async () => {
     // 1. Llama a la API para limpiar el historial del backend
     await fetch(`${API_URL}/api/reiniciar`, { method: 'POST' }) 
     
     // 2. Resetea el estado del frontend
-    setJuegoCompletado(false)
+    setTestCompletado(false)
+    setSiguiente(null)
     setPregunta(null)
     setPredicciones([])
     
@@ -178,7 +213,7 @@ function App() {
                     </p>
                   )}
                   
-                  <button onClick={fetchPregunta} disabled={cargando}>
+                  <button onClick={mostrarSiguiente} disabled={cargando || verificando}>
                     {cargando ? "Cargando..." : "Siguiente Pregunta"}
                   </button>
                 </div>